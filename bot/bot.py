@@ -1,15 +1,28 @@
+import time
 import discord
+import multiprocessing
 import secret as sc
 import config as cfg
 from classes.Bot import Bot
 from discord.ext import tasks
 
-def run_discord_bot():
+def run_discord_bot( shard_ids=None, shard_count=None, runs_updates=True, started=None ):
+
+    # startup is timed from run.py when it's the entry point, otherwise from here
+    entered = time.perf_counter()
+    started = started if started is not None else entered
 
     # Set up bot
     intents = discord.Intents.default()
     intents.message_content = True
-    client = discord.Client( intents=intents )
+
+    # one connection, or shards in this process
+    if cfg.shard_mode == "single":
+        client = discord.Client( intents=intents )
+    else:
+        client = discord.AutoShardedClient( intents=intents,
+                                            shard_ids=shard_ids,
+                                            shard_count=shard_count )
 
     # initialize variables
     name      = cfg.name
@@ -18,7 +31,9 @@ def run_discord_bot():
     token     = sc.TOKEN
 
     # initialize bot
-    bot = Bot(name, client, prefix, dft_color, token)
+    bot = Bot(name, client, prefix, dft_color, token, runs_updates=runs_updates)
+    bot.startup_times[ "imports" ] = entered - started
+    bot.record_startup( "bot", started )
 
     # Task loop to update data periodically
     @tasks.loop(hours=cfg.HOURS_UPDATE)  
@@ -26,10 +41,46 @@ def run_discord_bot():
         await bot.update_database() 
         # await embed.send()
 
+    # Other processes only pick up what the updating one wrote
+    @tasks.loop(minutes=cfg.shard_refresh_minutes)
+    async def passive_follow_database():
+        await bot.follow_updates()
+
     @client.event
     async def on_guild_join(guild): # check if we need to update bot on a new join
-        bot.add_guild( guild )
-        pass
+        bot.add_guild( guild ).validate()
+
+    @client.event
+    async def on_guild_remove(guild): # stop tracking guilds we've left
+        bot.remove_guild( guild )
+
+    @client.event
+    async def on_guild_update(before, after): # refresh the stored guild
+        bot.update_guild( before, after )
+
+    @client.event
+    async def on_guild_channel_create(channel): # keep channel lookups current
+        bot.refresh_channels( channel.guild, channel.name )
+
+    @client.event
+    async def on_guild_channel_delete(channel):
+        bot.refresh_channels( channel.guild, channel.name )
+
+    @client.event
+    async def on_guild_channel_update(before, after):
+        bot.refresh_channels( after.guild, before.name, after.name )
+
+    @client.event
+    async def on_guild_role_create(role): # keep role lookups current
+        bot.refresh_roles( role.guild, role.name )
+
+    @client.event
+    async def on_guild_role_delete(role):
+        bot.refresh_roles( role.guild, role.name )
+
+    @client.event
+    async def on_guild_role_update(before, after):
+        bot.refresh_roles( after.guild, before.name, after.name )
 
     # Show bot logged on successfully
     @client.event
@@ -41,11 +92,33 @@ def run_discord_bot():
         # initialize client guilds 
         bot.initialize_guilds( bot.client )
 
-        # Start database updating coroutine
-        print("Updating database...")
-        passive_update_database.start()
+        # per-guild prefixes and channels in the background, the first database use
+        # loads the ORM and on_ready shouldn't wait for it; the defaults apply until then
+        bot.start_settings_load()
+
+        # check their channels and roles in the background, between messages
+        bot.start_guild_validation( cfg.guild_validation_batch )
+
+        # Start database updating coroutine, on_ready can fire again after a reconnect
+        if bot.runs_updates and not passive_update_database.is_running():
+            print("Updating database...")
+            passive_update_database.start()
+
+        elif not bot.runs_updates and not passive_follow_database.is_running():
+            passive_follow_database.start()
+
+        # Prometheus scrape endpoint, one port per process
+        if cfg.metrics_port is not None:
+            await bot.start_metrics_server( cfg.metrics_port + ( shard_ids[0] if shard_ids else 0 ) )
+
+        # Print bot is now running, with how long it took the first time
+        if "on_ready" not in bot.startup_times:
+            ready_in = bot.record_startup( "on_ready", started )
+            print("Startup: " + ", ".join( f"{phase} {seconds:.2f}s" for phase, seconds in bot.startup_times.items() ))
+
+            if ready_in > cfg.startup_budget:
+                print(f"Startup took {ready_in:.2f}s, over the {cfg.startup_budget}s budget")
 
-        # Print bot is now running
         print(f"{bot.name} is now running!")
 
     # Message Handler
@@ -57,7 +130,11 @@ def run_discord_bot():
             return
 
         # Handle commands
-        if msg.content.startswith( bot.prefix ):
+        if msg.content.startswith( bot.prefix_for( msg.guild ) ):
+
+            # Over the user or guild limit, drop it quietly
+            if not bot.allow_message( msg ):
+                return
             
             # Bot is not ready to handle messages yet as it hasn't synced yet
             if not bot.ready:
@@ -78,6 +155,41 @@ def run_discord_bot():
     client.run( bot.token )
 
 async def send_embed( embed, guild, channel ):
+    # Nothing to send
+    if embed is None:
+        return
+
+    # commands can answer with several pages
+    embeds = embed if isinstance( embed, list ) else [ embed ]
+
     # Send 
-    if embed != None:
-        await embed.send( guild, channel )
+    for page in embeds:
+        await page.send( guild, channel )
+
+def run_sharded():
+
+    from classes.SQLHandler import SQLHandler
+
+    # set the shared database up once, before the processes race to do it
+    handler = SQLHandler( cfg.db_path, dbg=cfg.db_reset_on_start,
+                          profile=cfg.db_profiles[ cfg.db_profile ] )
+    handler.engine.dispose()
+
+    # split the shards into contiguous ranges, one per process
+    shard_ids = list( range( cfg.shard_count ) )
+    per_process = -( -cfg.shard_count // cfg.shard_processes ) # round up
+    ranges = [ shard_ids[i:i + per_process] for i in range( 0, cfg.shard_count, per_process ) ]
+
+    # only the first process writes the catalog, the rest read the shared database
+    processes = [
+        multiprocessing.Process( target=run_discord_bot,
+                                 args=( ids, cfg.shard_count, i == 0 ),
+                                 name=f"shards-{ids[0]}-{ids[-1]}" )
+        for i, ids in enumerate( ranges )
+    ]
+
+    for process in processes:
+        process.start()
+
+    for process in processes:
+        process.join()
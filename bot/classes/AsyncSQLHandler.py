@@ -0,0 +1,158 @@
+import asyncio
+import threading
+from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from classes.Metrics import QUERY_SECONDS
+
+# the ORM is imported on first use, only type checkers see it up here
+if TYPE_CHECKING:
+    from sqlmodel import SQLModel
+
+# Async handler, runs every SQLHandler call off of the event loop
+class AsyncSQLHandler():
+
+    def __init__(self, db_path, dbg=False, cache=None, profile=None, lazy=False) -> None:
+        """
+        Args:
+            lazy (bool, optional): Wait for the first database call to import the ORM
+                and open the database, on the worker thread instead of here.
+        """
+        self.queryCache = cache
+        self.courseIndex = None # in-memory CourseIndex, swapped in whole after each sync
+
+        self._sql_args = ( db_path, dbg, cache, profile )
+        self._sqlHandler = None
+        self._sql_lock = threading.Lock()
+
+        # one worker so SQLite writes never fight each other for the file lock
+        self._db_executor = ThreadPoolExecutor( max_workers=1,
+                                                thread_name_prefix="sql" )
+
+        if not lazy:
+            self.open_database()
+
+    @property
+    def sqlHandler(self):
+        """The SQLHandler, opened here if nothing has used the database yet."""
+        if self._sqlHandler is None:
+            return self.open_database()
+        return self._sqlHandler
+
+    def open_database(self):
+        """
+        Import the ORM and open the database, creating the schema if it's missing. Blocking.
+
+        Returns:
+            SQLHandler: The opened handler, the same one on every call.
+        """
+        with self._sql_lock:
+            if self._sqlHandler is None:
+                from classes.SQLHandler import SQLHandler
+
+                db_path, dbg, cache, profile = self._sql_args
+                self._sqlHandler = SQLHandler( db_path, dbg=dbg, cache=cache, profile=profile )
+
+        return self._sqlHandler
+
+    def database_open(self) -> bool:
+        """Check if the database was opened yet."""
+        return self._sqlHandler is not None
+
+    async def run_sync(self, func, *args, **kwargs):
+        """
+        Run a blocking function on the database worker thread.
+
+        Example Usage:
+            await self.run_sync(self.sqlHandler.insert, Course(id=1, name="CS126"))
+        """
+        loop = asyncio.get_running_loop()
+        with QUERY_SECONDS.time( func.__name__ ):
+            return await loop.run_in_executor( self._db_executor,
+                                               lambda: func(*args, **kwargs) )
+
+    async def run_sql(self, name, *args):
+        """
+        Call a SQLHandler method on the database worker thread.
+
+        Looked up there too, so a lazy first call opens the database off the event loop.
+
+        Example Usage:
+            await self.run_sql("retrieve", Course, {"id": 1})
+        """
+        loop = asyncio.get_running_loop()
+        with QUERY_SECONDS.time( name ):
+            return await loop.run_in_executor( self._db_executor,
+                                               lambda: getattr( self.sqlHandler, name )(*args) )
+
+    async def check_exists(self, model: "SQLModel", filters: dict) -> bool:
+        """Async version of SQLHandler.check_exists."""
+        return await self.run_sql( "check_exists", model, filters )
+
+    async def insert(self, model_instance: "SQLModel") -> bool:
+        """Async version of SQLHandler.insert."""
+        return await self.run_sql( "insert", model_instance )
+
+    async def bulk_upsert(self, model: "SQLModel", rows, batch_size: int = 500) -> dict:
+        """Async version of SQLHandler.bulk_upsert."""
+        return await self.run_sql( "bulk_upsert", model, rows, batch_size )
+
+    async def sync(self, model: "SQLModel", rows, batch_size: int = 500, remove_missing: bool = True) -> dict:
+        """Async version of SQLHandler.sync."""
+        return await self.run_sql( "sync", model, rows, batch_size, remove_missing )
+
+    async def needs_update(self, model: "SQLModel", record_id: int, updates: dict) -> bool:
+        """Async version of SQLHandler.needs_update."""
+        return await self.run_sql( "needs_update", model, record_id, updates )
+
+    async def remove(self, model: "SQLModel", record_id: int) -> bool:
+        """Async version of SQLHandler.remove."""
+        return await self.run_sql( "remove", model, record_id )
+
+    async def search_courses(self, query: str, after=None, limit: int = 10) -> tuple:
+        """Async version of SQLHandler.search_courses, answered from courseIndex when it can be."""
+
+        # read the reference once, a swap mid-search can't mix two copies
+        index = self.courseIndex
+        if index is not None:
+            result = index.search( query, after, limit )
+            if result is not None:
+                return result
+
+        return await self.run_sql( "search_courses", query, after, limit )
+
+    async def courses_named(self, names, batch_size: int = 500) -> list:
+        """Async version of SQLHandler.courses_named."""
+        return await self.run_sql( "courses_named", names, batch_size )
+
+    async def update_guild_settings(self, guild_id: int, updates: dict) -> dict:
+        """Async version of SQLHandler.update_guild_settings."""
+        return await self.run_sql( "update_guild_settings", guild_id, updates )
+
+    async def last_sync_id(self):
+        """Async version of SQLHandler.last_sync_id."""
+        return await self.run_sql( "last_sync_id" )
+
+    async def summary(self) -> dict:
+        """Async version of SQLHandler.summary."""
+        return await self.run_sql( "summary" )
+
+    async def course_stats(self, top: int = 10) -> dict:
+        """Async version of SQLHandler.course_stats."""
+        return await self.run_sql( "course_stats", top )
+
+    async def update(self, model: "SQLModel", record_id: int, updates: dict) -> bool:
+        """Async version of SQLHandler.update."""
+        return await self.run_sql( "update", model, record_id, updates )
+
+    async def retrieve(self, model: "SQLModel", filters: dict = None) -> "list[SQLModel]":
+        """Async version of SQLHandler.retrieve."""
+        return await self.run_sql( "retrieve", model, filters )
+
+    def clear_cache(self):
+        """Forget every cached query, if caching is on."""
+        if self.queryCache is not None:
+            self.queryCache.clear()
+
+    def close(self):
+        """Stop the database worker thread."""
+        self._db_executor.shutdown( wait=True )
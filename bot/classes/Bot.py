@@ -1,11 +1,21 @@
+import time
 import secret as sc
 import config as cfg
 from classes.EmbedHandler import EmbedHandler 
 from classes.GuildHandler import GuildHandler
-from classes.SQLHandler import SQLHandler, Course
+from classes.AsyncSQLHandler import AsyncSQLHandler
 from classes.DatabaseHandler import DatabaseHandler
-
-class Bot( EmbedHandler, SQLHandler, GuildHandler, DatabaseHandler ):
+from classes.CommandHandler import CommandHandler, command
+from classes.RateLimitHandler import RateLimitHandler
+from classes.QueryCache import QueryCache
+from classes.CatalogPipeline import CatalogPipeline
+from classes.MetricsHandler import MetricsHandler
+from classes.SubscriptionHandler import SubscriptionHandler
+from classes.SettingsHandler import SettingsHandler, COLOR_COLUMNS
+from classes.Metrics import COMMAND_SECONDS
+
+class Bot( EmbedHandler, AsyncSQLHandler, GuildHandler, DatabaseHandler, CommandHandler, RateLimitHandler, MetricsHandler,
+           SubscriptionHandler, SettingsHandler ):
 
     '''
     PUBLIC FUNCTIONS
@@ -14,101 +24,388 @@ class Bot( EmbedHandler, SQLHandler, GuildHandler, DatabaseHandler ):
     async def handle_command( self, msg ):
 
         # initialize variables
+        received = time.perf_counter()
         author_id = msg.author.id
+        prefix = self.prefix_for( msg.guild )
 
-        # Get command 
-        argv = msg.content.split()
-        command = argv[0].lower()
+        # Get command, only the first word matters for dispatch
+        trigger, rest = self.split_command( msg.content, prefix )
+        selected = self.get_command( trigger )
 
-        # check if command is valid
-        if command in self.commands.keys():
+        # Command not in the command registry
+        if selected is None:
+            embed = await self.get_embed("invalid-command", 
+                                            guild=msg.guild,
+                                            prefix = prefix)
 
-            # Grab the command tuple
-            selected_option = self.commands.get( command ) 
+            return embed # return early
 
-            # Ensure permissions, currently owner-only
-            if author_id != self.owner and selected_option[2] == True:
+        # Too many calls of this command, drop it quietly
+        if not self.allow_command( msg, selected.name ):
+            return None
 
-                embed = await self.get_embed("unauthorized-user", 
-                                            guild=msg.guild)
+        # Ensure permissions, currently owner-only
+        if author_id != self.owner and selected.admin_only:
 
-                return embed # return early
+            embed = await self.get_embed("unauthorized-user", 
+                                        guild=msg.guild,
+                                        mention=msg.author.mention)
 
-            # run the selected option
-            embed = await selected_option[0]( msg )
+            return embed # return early
 
-        # Command not in the command dictionary
-        else:  
-            embed = await self.get_embed("invalid-command", 
-                                            guild=msg.guild,
-                                            prefix = self.prefix)
+        # parse the arguments
+        kwargs = selected.parse( rest )
+
+        if kwargs is None:
+            embed = await self.get_embed("invalid-arguments",
+                                        guild=msg.guild,
+                                        usage=selected.usage( prefix ))
+
+            return embed # return early
+
+        # run the selected option
+        embed = await self.run_command( selected, msg, kwargs, received )
 
         return embed
 
+    @command("hello", "Test me to say hello!")
     async def hello(self, msg):
 
         embed = await self.get_embed("hello",
                              guild=msg.guild,
-                             prefix = self.prefix)
+                             prefix = self.prefix_for( msg.guild ))
 
         return embed
         
+    @command("help", "List of commands")
     async def help(self, msg):
 
-        # Help command, sorry this isnt more automatic. 
-        # You'll have to write it out for now
-        desc=f'''Hi, thanks for using {self.name}! 
-        
-        This bot was created by Claire Whittington. Try out the list of commands below:
-        
-        🤖💬
-        
-        '''
-
-        # iterate through the commands
-        for trigger, tuple in self.commands.items():
-            
-            # get desc
-            text = tuple[1]
-            admin_only = tuple[2]
-
-            if self._is_admin( msg.author ) or not admin_only:
+        # the text only depends on whether the caller is an admin, and the guild's prefix
+        key = ( self._is_admin( msg.author ), self.prefix_for( msg.guild ) )
 
-                desc += f"**{trigger}**: {text}\n"
+        desc = self._help_cache.get( key )
+        if desc is None:
+            desc = self._help_cache[ key ] = self._build_help( *key )
 
         return await self.get_embed("help", 
                                     guild = msg.guild, 
                                     desc = desc)
-    
-    async def update_database(self, msg=None):
+
+    @command("course", "Search courses by name or section.", aliases=("search",),
+             args={"query": str})
+    async def course(self, msg, query):
 
         # initialize variables
-            # None
+        embeds = []
+        key = None
 
-        # try to update the db
-        try: 
+        # pull one page at a time, each page becomes its own embed
+        for page in range( cfg.search_max_pages ):
 
-            self.insert( Course(id=1001, name="CS126") )
-            self.insert( Course(id=1002, name="CS126L", section="001") )
-            self.insert( Course(id=1003, name="CS126L", section="002") )
-            self.insert( Course(id=1004, name="CS126L", section="003") )
-            self.insert( Course(id=5005, name="CS249", section="001") )
-            self.insert( Course(id=5006, name="CS249", section="002") )
+            results, key = await self.search_courses( query, after=key,
+                                                      limit=cfg.search_page_size )
+            if not results:
+                break
 
-            # We wanna make some updates!
-            updates={"name": "CS126 - Combo Class"}
+            lines = "\n".join( self._format_course( row ) for row in results )
+
+            # let them know there's more than we showed
+            if key is not None and page == cfg.search_max_pages - 1:
+                lines += "\n\nMore courses match, try a narrower search."
+
+            embeds.append( await self.get_embed("course-search",
+                                                guild=msg.guild,
+                                                query=query,
+                                                page=page + 1,
+                                                results=lines) )
+
+            if key is None:
+                break
+
+        # nothing came back
+        if not embeds:
+            return await self.get_embed("course-search-empty",
+                                        guild=msg.guild,
+                                        query=query)
+
+        return embeds
+
+    @command("subscribe", "Post changes to a course in this channel, e.g. CS126.", args={"course": str})
+    async def subscribe(self, msg, course):
+
+        # notifications go to a server channel
+        if msg.guild is None:
+            return await self.get_embed("subscribe-no-guild")
+
+        course = self.course_key( course )
+
+        # only follow names the catalog has
+        if not await self.courses_named( [ course ] ):
+            return await self.get_embed("subscribe-unknown-course",
+                                        guild=msg.guild,
+                                        course=course,
+                                        prefix=self.prefix_for( msg.guild ))
+
+        await self.load_subscriptions()
+        following = self.channel_subscriptions.get( msg.channel.id, set() )
+        if course not in following and len(following) >= cfg.subscribe_max_per_channel:
+            return await self.get_embed("subscribe-limit",
+                                        guild=msg.guild,
+                                        limit=cfg.subscribe_max_per_channel,
+                                        prefix=self.prefix_for( msg.guild ))
+
+        if not await self.follow_course( msg.guild.id, msg.channel.id, course ):
+            return await self.get_embed("subscribe-exists",
+                                        guild=msg.guild,
+                                        course=course)
+
+        return await self.get_embed("subscribe-success",
+                                    guild=msg.guild,
+                                    course=course)
+
+    @command("unsubscribe", "Stop posting changes to a course in this channel.", args={"course": str})
+    async def unsubscribe(self, msg, course):
+
+        course = self.course_key( course )
+
+        if msg.guild is None or not await self.unfollow_course( msg.channel.id, course ):
+            return await self.get_embed("unsubscribe-missing",
+                                        guild=msg.guild,
+                                        course=course)
+
+        return await self.get_embed("unsubscribe-success",
+                                    guild=msg.guild,
+                                    course=course)
+
+    @command("subscriptions", "Courses this channel gets changes for.")
+    async def subscriptions(self, msg):
+
+        await self.load_subscriptions()
+        courses = sorted( self.channel_subscriptions.get( msg.channel.id, () ) )
+
+        return await self.get_embed("subscriptions-list",
+                                    guild=msg.guild,
+                                    courses=", ".join( courses ) or "none",
+                                    prefix=self.prefix_for( msg.guild ))
+
+    @command("stats", "Course database statistics.", admin_only=True)
+    async def stats(self, msg):
+
+        # all counted by SQLite
+        stats = await self.course_stats( top=cfg.stats_top )
+
+        names    = ", ".join( f"{name} ({total})" for name, total in stats["by_name"] ) or "none"
+        sections = ", ".join( f"{section} ({total})" for section, total in stats["by_section"] ) or "none"
+
+        last_sync = stats["last_sync"]
+        if last_sync:
+            changes = (f"{last_sync['added']} added, {last_sync['changed']} changed, "
+                       f"{last_sync['removed']} removed, {last_sync['unchanged']} unchanged "
+                       f"(<t:{int(last_sync['finished_at'])}:R>)")
+        else:
+            changes = "no sync yet"
+
+        return await self.get_embed("database-stats",
+                                    guild=msg.guild,
+                                    course_count=stats["course_count"],
+                                    names=names,
+                                    sections=sections,
+                                    changes=changes)
+
+    @command("guilds", "Guild setup checks. Add a guild id for its report.", admin_only=True,
+             args={"guild_id": int})
+    async def guild_report(self, msg, guild_id=None):
+
+        # one guild's report, checked now if the background job hasn't got to it yet
+        if guild_id is not None:
+            custom_guild = self.custom_guilds.get( guild_id )
+            if custom_guild is None:
+                return await self.get_embed("guild-not-found",
+                                            guild=msg.guild,
+                                            guild_id=guild_id)
+
+            return await self.get_embed("guild-report",
+                                        guild=msg.guild,
+                                        name=custom_guild.guild.name,
+                                        guild_id=guild_id,
+                                        report=self._format_validation( custom_guild.validate() ))
+
+        # counts for every guild, then the first few missing something
+        summary = self.validation_summary()
+        invalid = self.invalid_guilds()
+        lines = [ f"**{custom_guild.guild.name}** (`{custom_guild.id}`): {self._format_validation( custom_guild.report )}"
+                  for custom_guild in invalid[ :cfg.guild_report_max ] ]
+        if len(invalid) > cfg.guild_report_max:
+            lines.append( f"...and {len(invalid) - cfg.guild_report_max} more" )
+
+        return await self.get_embed("guild-validation",
+                                    guild=msg.guild,
+                                    total=len(self.custom_guilds),
+                                    valid=summary["valid"],
+                                    invalid=summary["invalid"],
+                                    pending=summary["pending"],
+                                    guilds="\n".join( lines ) or "Every checked guild is set up.")
+
+    @command("config", "Guild settings. Add prefix, channel, color <name> or reset, and a value.", admin_only=True,
+             args={"setting": str, "value": str})
+    async def configure(self, msg, setting="show", value=None):
+
+        # settings belong to a guild
+        if msg.guild is None:
+            return await self.get_embed("guild-config-no-guild")
+
+        setting = setting.lower()
+        updates = {}
+
+        if setting == "prefix" and value and len(value) <= 5 and not any( char.isspace() for char in value ):
+            updates["prefix"] = value
+
+        elif setting == "channel" and value:
+            channel = value.strip().lstrip("#")
+
+            # only channels the guild has, or embeds would have nowhere to go
+            if self.get_or_add_guild( msg.guild ).get_channel_obj( channel ) is None:
+                return await self.get_embed("guild-config-unknown-channel",
+                                            guild=msg.guild,
+                                            channel=channel)
+            updates["notify_channel"] = channel
+
+        elif setting == "color" and value:
+            updates = self._parse_color( value )
+
+        elif setting == "reset":
+            reset = ( value or "all" ).strip().lower()
+            columns = { "prefix": [ "prefix" ], "channel": [ "notify_channel" ],
+                        "color": list( COLOR_COLUMNS.values() ) }
+            columns["all"] = [ column for group in columns.values() for column in group ]
+            updates = dict.fromkeys( columns.get( reset, () ) )
+
+        # anything that didn't parse gets the usage
+        if setting != "show" and not updates:
+            return await self.get_embed("guild-config-invalid",
+                                        guild=msg.guild,
+                                        prefix=self.prefix_for( msg.guild ))
+
+        if updates:
+            await self.update_settings( msg.guild.id, **updates )
+
+        return await self.get_embed("guild-config",
+                                    guild=msg.guild,
+                                    name=msg.guild.name,
+                                    settings=self._format_settings( msg.guild ))
+
+    @command("metrics", "Latency and counters. Add on, off, reset or dump.", admin_only=True,
+             args={"action": str})
+    async def show_metrics(self, msg, action="show"):
+
+        action = action.lower()
+
+        # switch latency recording at runtime, counters are always kept
+        if action in ( "on", "off" ):
+            self.metrics.enabled = action == "on"
+
+        elif action == "reset":
+            self.metrics.clear()
+
+        elif action == "dump":
+            path = self.dump_metrics( cfg.metrics_dump_file )
+            return await self.get_embed("bot-metrics-dumped",
+                                        guild=msg.guild,
+                                        path=path)
+
+        elif action != "show":
+            return await self.get_embed("invalid-arguments",
+                                        guild=msg.guild,
+                                        usage=self.get_command("metrics").usage( self.prefix_for( msg.guild ) ))
+
+        # per command: calls, then p50/p99 when recording, else the average and max, then dispatch
+        lines = []
+        for name, stats in self.dispatch_stats().items():
+            if not stats["calls"]:
+                continue
+
+            dispatch = f"dispatch avg {stats['dispatch_avg_us']:.1f} µs, max {stats['dispatch_max_us']:.1f} µs"
+            p50 = COMMAND_SECONDS.quantile( 0.5, name )
+            if p50 is None:
+                lines.append( f"**{name}**: {stats['calls']} calls, "
+                              f"avg {stats['avg_ms']:.1f} ms, max {stats['max_ms']:.1f} ms, {dispatch}" )
+            else:
+                p99 = COMMAND_SECONDS.quantile( 0.99, name )
+                lines.append( f"**{name}**: {stats['calls']} calls, "
+                              f"p50 ≤ {p50 * 1000:g} ms, p99 ≤ {p99 * 1000:g} ms, {dispatch}" )
+
+        cache = self.queryCache.stats() if self.queryCache is not None else None
+        if cache is not None:
+            lookups = cache["hits"] + cache["misses"]
+            ratio = cache["hits"] / lookups * 100 if lookups else 0.0
+            cache = f"{cache['hits']} hits, {cache['misses']} misses ({ratio:.0f}% hit)"
+
+        drops = ", ".join( f"{scope} {stats['drops']}" for scope, stats in self.rate_limit_stats().items() )
+
+        sends = "sent inline"
+        if self.sendQueue is not None:
+            stats = self.sendQueue.stats()
+            sends = (f"{stats['sent']} sent, {stats['failed']} failed, "
+                     f"{stats['retries']} retries, {stats['depth']} queued")
+
+        return await self.get_embed("bot-metrics",
+                                    guild=msg.guild,
+                                    recording="on" if self.metrics.enabled else "off",
+                                    commands="\n".join( lines ) or "none run yet",
+                                    cache=cache or "off",
+                                    drops=drops,
+                                    sends=sends)
+
+    @command("update", "Force-updates the database.", admin_only=True)
+    async def force_update(self, msg):
+
+        # only one process writes the catalog, a second sync here would race it
+        if not self.runs_updates:
+            return await self.get_embed("update-database-elsewhere",
+                                        guild=msg.guild)
+
+        # joins the running update if there is one, progress goes to this channel
+        try:
+            diff = await self.join_update( msg.channel, force=True )
+
+        except CatalogPipeline.Cancelled:
+            return await self.get_embed("update-database-cancelled",
+                                        guild=msg.guild)
+
+        except Exception as e:
+            return await self.get_embed("update-database-failure",
+                                        guild=msg.guild,
+                                        e=e)
 
-            # Update a course's name
-            if self.needs_update(Course, record_id=1001, updates=updates):
-                self.update(Course, record_id=1001, updates=updates)
+        return await self.get_embed("update-database-success",
+                                    guild=msg.guild,
+                                    summary=self._format_sync( diff ))
 
-            self.ready = True
+    @command("cancelupdate", "Stops a running database update.", admin_only=True)
+    async def stop_update(self, msg):
+
+        # the update runs in another process, this one can't reach it
+        if not self.runs_updates:
+            return await self.get_embed("update-database-elsewhere",
+                                        guild=msg.guild)
+
+        # the old catalog stays in place
+        if self.cancel_update():
+            return await self.get_embed("update-database-cancelling",
+                                        guild=msg.guild)
+
+        return await self.get_embed("update-database-idle",
+                                    guild=msg.guild)
+
+    async def update_database(self, msg=None):
+
+        # try to update the db, in the background
+        try: 
+            await self.join_update( msg.channel if msg else None, force=msg is not None )
             
-        # Error in updating database
+        # Error in updating database, keep serving what we had
         except Exception as e:
-            
-            # Bot is not ready :(
-            self.ready = False
+            print(f"Database update failed: {e}")
 
         # get the summary
         return self.ready
@@ -116,7 +413,7 @@ class Bot( EmbedHandler, SQLHandler, GuildHandler, DatabaseHandler ):
     '''
     PRIVATE FUNCTIONS
     '''
-    def __init__(self, name, client, prefix, dft_color, TOKEN):
+    def __init__(self, name, client, prefix, dft_color, TOKEN, runs_updates=True):
 
         # Define ready flag
         self.ready = False
@@ -138,26 +435,120 @@ class Bot( EmbedHandler, SQLHandler, GuildHandler, DatabaseHandler ):
         self.required_channels = [ "general" ] # list of string names for channels
 
         # initialize inherited classes
-        DatabaseHandler.__init__( self )
-        GuildHandler.__init__( self )
-        EmbedHandler.__init__( self )
-        SQLHandler.__init__( self, cfg.db_path, dbg=True )
+        DatabaseHandler.__init__( self, runs_updates )
+        GuildHandler.__init__( self, self.required_channels, self.required_roles )
+        EmbedHandler.__init__( self, guildHandler=self )
+        # with several processes run_sharded resets the shared database, not us
+        reset_database = cfg.db_reset_on_start and cfg.shard_mode != "processes"
+        AsyncSQLHandler.__init__( self, cfg.db_path, dbg=reset_database,
+                                  cache=QueryCache( ttl=cfg.query_cache_ttl,
+                                                    max_rows=cfg.query_cache_max_rows,
+                                                    max_entries=cfg.query_cache_max_entries ),
+                                  profile=cfg.db_profiles[ cfg.db_profile ],
+                                  lazy=cfg.fast_start )
 
         # initialize all available commands for users to call
-        self.commands = {   
-                            self.prefix + "hello": ( self.hello,
-                                                    "Test me to say hello!",
-                                                    False
-                            ),
-                            self.prefix + "help": ( self.help, # command to run
-                                                    "List of commands", # help desc
-                                                    False, # is admin-only command
-                            ),
-                            self.prefix + "update":(
-                                                self.update_database,
-                                                "Force-updates the database.",
-                                                True
-                            ),
-                        }
+        self._help_cache = {} # (is_admin, prefix) -> help description
+        CommandHandler.__init__( self )
+        RateLimitHandler.__init__( self )
+        MetricsHandler.__init__( self )
+        SubscriptionHandler.__init__( self )
+        SettingsHandler.__init__( self )
+
+    def _build_help(self, is_admin, prefix):
+
+        # Help text, built from the @command registry
+        desc=f'''Hi, thanks for using {self.name}! 
+        
+        This bot was created by Claire Whittington. Try out the list of commands below:
+        
+        🤖💬
+        
+        '''
+
+        # iterate through the commands
+        for name, selected in self.commands.items():
+
+            if is_admin or not selected.admin_only:
+
+                desc += f"**{prefix}{name}**: {selected.text}\n"
+
+        return desc
+
+    def _format_sync(self, diff):
+        if diff["status"] == "skipped":
+            return f"Catalog unchanged ({diff['reason']}), nothing to do."
+        return (f"{len(diff['added'])} added, {len(diff['changed'])} changed, "
+                f"{len(diff['removed'])} removed, {diff['unchanged']} unchanged")
+
+    def _format_validation(self, report):
+        missing = [ f"#{name}" for name in report["missing_channels"] ] \
+                  + [ f"@{name}" for name in report["missing_roles"] ]
+        if not missing:
+            return f"set up (checked <t:{int(report['checked_at'])}:R>)"
+        return f"missing {', '.join( missing )} (checked <t:{int(report['checked_at'])}:R>)"
+
+    def _format_settings(self, guild):
+        settings = self.settings_for( guild )
+        channels = ", ".join( f"#{name}" for name in self.required_channels )
+
+        lines = [ f"**Prefix**: `{self.prefix_for( guild )}`" + ( "" if settings.get( "prefix" ) else " (default)" ),
+                  f"**Notification channel**: " + ( f"#{settings['notify_channel']}" if settings.get( "notify_channel" )
+                                                    else f"{channels} (default)" ) ]
+
+        for name, column in COLOR_COLUMNS.items():
+            color = settings.get( column )
+            shown = f"#{color:06X}" if color is not None else f"#{self._color_map[ name ]:06X} (default)"
+            lines.append( f"**{name.title()} color**: {shown}" )
+
+        return "\n".join( lines )
+
+    def _parse_color(self, value):
+        """Turn "success #21D375" into {"success_color": 0x21D375}, or {} if it doesn't parse."""
+        parts = value.split()
+        if len(parts) != 2 or parts[0].upper() not in COLOR_COLUMNS:
+            return {}
+
+        try:
+            color = int( parts[1].lstrip("#"), 16 )
+        except ValueError:
+            return {}
+
+        if not 0 <= color <= 0xFFFFFF:
+            return {}
+        return { COLOR_COLUMNS[ parts[0].upper() ]: color }
+
+    def _format_course(self, row):
+        section = f" - section {row['section']}" if row["section"] else ""
+        return f"**{row['name']}**{section} (`{row['id']}`)"
+
+    def _on_commands_changed(self):
+        self._help_cache.clear()
+
+    def _embed_style(self, guild, template):
+        return self.embed_style( guild, template )
+
+    def _on_settings_changed(self, guild_id):
+
+        # a prefix nobody uses anymore would stay cached for good, rebuilding is a few microseconds
+        self._help_cache.clear()
+
+        # a guild that picked its own channel needs that one instead of the defaults
+        custom_guild = self.custom_guilds.get( guild_id )
+        if custom_guild is not None:
+            custom_guild.set_required_channels( self._required_channels_for( guild_id ) )
+
+    def new_guild(self, guild):
+        custom_guild = GuildHandler.new_guild( self, guild )
+        custom_guild.set_required_channels( self._required_channels_for( guild.id ) )
+        return custom_guild
+
+    def _notify_channel_for(self, guild_id):
+        return self.notify_channel_for( guild_id )
+
+    def _required_channels_for(self, guild_id):
+        channel = self.guild_settings.get( guild_id, {} ).get( "notify_channel" )
+        return [ channel ] if channel else self.required_channels
+
     def _is_admin(self, author):
         return author.id in self.admin_list
\ No newline at end of file
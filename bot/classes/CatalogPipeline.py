@@ -0,0 +1,282 @@
+import os
+import csv
+import json
+import hashlib
+import tempfile
+
+# Streaming course catalog ingestion: fetch -> parse -> validate -> write
+class CatalogPipeline():
+
+    # Raised inside a run once cancel is set
+    class Cancelled(Exception):
+        pass
+
+    # Raised when a catalog looks broken, nothing from it is written
+    class Rejected(Exception):
+        pass
+
+    def __init__(self, source, batch_size=1000, progress=None, progress_every=10000, timeout=30,
+                 cache_dir=None, cancel=None, max_removed=0.5) -> None:
+        """
+        Args:
+            source (str): http(s) URL or local path of a CSV with id, name and section columns.
+            batch_size (int, optional): Rows written per statement.
+            progress (callable, optional): Called with the rows read so far.
+            progress_every (int, optional): Rows between progress calls.
+            timeout (float, optional): Seconds to wait on the server.
+            cache_dir (str, optional): Where to keep the last response and its ETag,
+                Last-Modified and hash. Without it every run is a full sync.
+            cancel (threading.Event, optional): Set it to stop the run. Nothing is
+                committed, so the database keeps what it had.
+            max_removed (float, optional): Most of the stored courses one run may remove,
+                as a share. A catalog that would remove more is rejected, None to allow anything.
+        """
+        self.source = source
+        self.batch_size = batch_size
+        self.progress = progress
+        self.progress_every = progress_every
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.cancel = cancel
+        self.max_removed = max_removed
+
+        # counters for the last run
+        self.read = 0
+        self.rejected = 0
+        self.errors = [] # first few rejected rows and why
+
+    def run(self, sqlHandler, force=False) -> dict:
+        """
+        Stream the catalog into the database. Blocking, run it off the event loop.
+
+        Args:
+            sqlHandler (SQLHandler): Where to write.
+            force (bool, optional): Sync even if the catalog didn't change.
+
+        Returns:
+            dict: The diff from SQLHandler.sync, plus read and rejected counts, and
+            status "changed", or "skipped" with the reason when nothing had to be done.
+
+        Example Usage:
+            pipeline = CatalogPipeline(cfg.catalog_source, cache_dir=cfg.catalog_cache_dir)
+            diff = await loop.run_in_executor(self._update_executor, lambda: pipeline.run(self.sqlHandler))
+        """
+        self.read = 0
+        self.rejected = 0
+        self.errors = []
+
+        path, state, reason = self.fetch( force )
+
+        # nothing changed, skip the parse and the database entirely
+        if path is None:
+            return { "added": [], "changed": [], "removed": [], "removed_rows": [], "unchanged": 0,
+                     "read": 0, "rejected": 0, "status": "skipped", "reason": reason }
+
+        # the ORM is loaded by now, sqlHandler is open
+        from classes.SQLHandler import Course
+
+        # a fresh download, not the source file or the cached body a forced 304 reads
+        downloaded = path not in ( self.source, self._cache_path( "catalog.csv" ) )
+
+        try:
+            diff = sqlHandler.sync( Course, self.records( path ), batch_size=self.batch_size,
+                                    check=self._check_sync )
+        except BaseException:
+            if downloaded:
+                os.remove( path )
+            raise
+
+        # only cache the body and remember the response once it made it into the
+        # database, a rejected catalog never gets here so the next run tries it again
+        if downloaded:
+            self._keep_download( path )
+        self._save_state( state )
+
+        # report the final count too
+        if self.progress is not None:
+            self.progress( self.read )
+
+        diff["read"] = self.read
+        diff["rejected"] = self.rejected
+        diff["status"] = "changed"
+        return diff
+
+    def records(self, path):
+        """Every valid record in a fetched catalog, one at a time."""
+        return self.validate( self.parse( self.lines( path ) ) )
+
+    def fetch(self, force=False):
+        """
+        Get the catalog onto disk, unless it hasn't changed.
+
+        Returns:
+            tuple: (path to read or None, state to save after the sync, skip reason)
+        """
+        if self.source.startswith( ("http://", "https://") ):
+            return self._fetch_http( force )
+        return self._fetch_file( force )
+
+    def lines(self, path):
+        """Yield the catalog line by line, without holding it all in memory."""
+        with open( path, "r", newline="", encoding="utf-8" ) as catalog:
+            yield from catalog
+
+    def parse(self, lines):
+        """Yield a dict per CSV row."""
+        for row in csv.DictReader( lines ):
+            self._check_cancelled()
+            self.read += 1
+
+            if self.progress is not None and self.read % self.progress_every == 0:
+                self.progress( self.read )
+
+            yield row
+
+    def validate(self, rows):
+        """Yield rows that fit the Course table, counting the rest."""
+        for row in rows:
+            try:
+                yield self._clean( row )
+            except ValueError as e:
+                self.rejected += 1
+                if len(self.errors) < 10:
+                    self.errors.append( f"row {self.read}: {e}" )
+
+    def _check_sync(self, diff, stored):
+        """
+        Refuse a catalog that would wipe out courses because it's empty, truncated
+        or unreadable, before sync removes anything.
+        """
+        if self.read == 0:
+            raise CatalogPipeline.Rejected( "the catalog has no rows" )
+
+        if self.rejected == self.read:
+            raise CatalogPipeline.Rejected( f"all {self.read} catalog rows were rejected, "
+                                            f"first error: {self.errors[0] if self.errors else 'none'}" )
+
+        removed = len( diff["removed"] )
+        if self.max_removed is not None and stored and removed / stored > self.max_removed:
+            raise CatalogPipeline.Rejected( f"the catalog would remove {removed} of {stored} courses, "
+                                            f"more than the {self.max_removed:.0%} allowed" )
+
+    def _fetch_http(self, force):
+        import requests # only needed for remote catalogs
+
+        state = self._load_state()
+        body_path = self._cache_path( "catalog.csv" )
+        cached = body_path is not None and os.path.exists( body_path )
+
+        # only ask for a 304 if we still have the body to fall back on
+        headers = {}
+        if cached:
+            if state.get("etag"):
+                headers["If-None-Match"] = state["etag"]
+            if state.get("last_modified"):
+                headers["If-Modified-Since"] = state["last_modified"]
+
+        with requests.get( self.source, headers=headers, stream=True, timeout=self.timeout ) as response:
+
+            if response.status_code == 304:
+                return ( body_path, state, None ) if force else ( None, state, "not-modified" )
+
+            response.raise_for_status()
+
+            # next to the cached body until it's synced, or a throwaway file without a cache
+            download_path = body_path + ".part" if body_path is not None else self._temp_path()
+
+            # stream to disk, hashing as we go, a cancelled or broken download isn't left behind
+            digest = hashlib.sha256()
+            try:
+                with open( download_path, "wb" ) as body:
+                    for chunk in response.iter_content( chunk_size=65536 ):
+                        self._check_cancelled()
+                        digest.update( chunk )
+                        body.write( chunk )
+            except BaseException:
+                os.remove( download_path )
+                raise
+
+            new_state = { "etag": response.headers.get("ETag"),
+                          "last_modified": response.headers.get("Last-Modified"),
+                          "sha256": digest.hexdigest() }
+
+        # same bytes under a new ETag, still nothing to do
+        if not force and new_state["sha256"] == state.get("sha256"):
+            self._keep_download( download_path )
+            self._save_state( new_state )
+            return None, new_state, "same-hash"
+
+        return download_path, new_state, None
+
+    def _fetch_file(self, force):
+        state = self._load_state()
+
+        digest = hashlib.sha256()
+        with open( self.source, "rb" ) as catalog:
+            for chunk in iter( lambda: catalog.read(65536), b"" ):
+                digest.update( chunk )
+
+        new_state = { "sha256": digest.hexdigest() }
+
+        if not force and new_state["sha256"] == state.get("sha256"):
+            return None, new_state, "same-hash"
+
+        return self.source, new_state, None
+
+    def _check_cancelled(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise CatalogPipeline.Cancelled("The update was cancelled.")
+
+    def _cache_path(self, name):
+        if self.cache_dir is None:
+            return None
+        os.makedirs( self.cache_dir, exist_ok=True )
+        return os.path.join( self.cache_dir, name )
+
+    def _temp_path(self):
+        handle, path = tempfile.mkstemp( suffix=".csv" )
+        os.close( handle )
+        return path
+
+    def _load_state(self) -> dict:
+        """The ETag, Last-Modified and hash saved after the last sync."""
+        path = self._cache_path( "catalog.json" )
+        if path is None or not os.path.exists( path ):
+            return {}
+
+        with open( path, "r" ) as state_file:
+            return json.load( state_file ).get( self.source, {} )
+
+    def _keep_download(self, path):
+        """Make a download the cached body, or throw it away if there's no cache."""
+        body_path = self._cache_path( "catalog.csv" )
+        if body_path is None:
+            os.remove( path )
+        else:
+            os.replace( path, body_path )
+
+    def _save_state(self, state):
+        path = self._cache_path( "catalog.json" )
+        if path is None:
+            return
+
+        # keyed by source, so switching sources doesn't reuse a stale hash
+        with open( path + ".part", "w" ) as state_file:
+            json.dump( { self.source: state }, state_file )
+        os.replace( path + ".part", path )
+
+    def _clean(self, row) -> dict:
+        """Turn a CSV row into a Course dict, or raise ValueError."""
+        record_id = int( row.get("id") or "" )
+        if record_id <= 0:
+            raise ValueError(f"bad id {record_id}")
+
+        name = ( row.get("name") or "" ).strip()
+        if not name or len(name) > 100:
+            raise ValueError(f"bad name '{name}'")
+
+        section = ( row.get("section") or "" ).strip() or None
+        if section is not None and len(section) > 3:
+            raise ValueError(f"bad section '{section}'")
+
+        return { "id": record_id, "name": name, "section": section }
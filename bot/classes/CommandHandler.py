@@ -0,0 +1,186 @@
+import time
+import inspect
+from classes.Metrics import COMMAND_SECONDS
+
+def command(name, text, admin_only=False, aliases=(), args=None):
+    """
+    Mark a method as a bot command. CommandHandler registers it on init.
+
+    Args:
+        name (str): Trigger without the prefix.
+        text (str): Description shown in help.
+        admin_only (bool, optional): Only admins can run it.
+        aliases (tuple, optional): Other triggers for the same command.
+        args (dict, optional): Argument name -> converter, in the order they are typed.
+            Arguments with a default in the method signature are optional,
+            and the last argument takes the rest of the message.
+
+    Example Usage:
+        @command("course", "Look up a course.", args={"name": str, "page": int})
+        async def course(self, msg, name, page=1):
+    """
+    def decorator(func):
+        func._command = ( name, text, admin_only, tuple(aliases), dict(args or {}) )
+        return func
+    return decorator
+
+# Overarching command class
+class CommandHandler():
+
+    # One registered command
+    class Command():
+        __slots__ = ( "name", "func", "text", "admin_only", "aliases", "args",
+                      "required", "calls", "total_time", "max_time", "dispatch_time", "max_dispatch" )
+
+        def __init__(self, name, func, text, admin_only=False, aliases=(), args=None):
+            self.name = name
+            self.func = func
+            self.text = text
+            self.admin_only = admin_only
+            self.aliases = tuple(aliases)
+            self.args = dict(args or {})
+
+            # arguments without a default have to be typed
+            parameters = inspect.signature(func).parameters
+            self.required = [ arg for arg in self.args
+                              if arg not in parameters
+                              or parameters[arg].default is inspect.Parameter.empty ]
+
+            # run time counters, the command itself without dispatch
+            self.calls = 0
+            self.total_time = 0.0
+            self.max_time = 0.0
+
+            # dispatch counters, from the message to the command starting
+            self.dispatch_time = 0.0
+            self.max_dispatch = 0.0
+
+        def parse(self, rest):
+            """
+            Turn the text after the trigger into keyword arguments.
+
+            Returns:
+                dict: Converted arguments, or None if they don't fit the schema.
+            """
+            if not self.args:
+                return {}
+
+            values = rest.split(None, len(self.args) - 1) if rest else []
+            if len(values) < len(self.required):
+                return None
+
+            try:
+                return { arg: convert(value)
+                         for (arg, convert), value in zip(self.args.items(), values) }
+            except ValueError:
+                return None
+
+        def usage(self, prefix):
+            """Get a usage line like '.course <name> [page]'."""
+            parts = [ prefix + self.name ]
+            for arg in self.args:
+                parts.append( f"<{arg}>" if arg in self.required else f"[{arg}]" )
+            return " ".join(parts)
+
+        def record(self, elapsed):
+            self.calls += 1
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+
+        def record_dispatch(self, elapsed):
+            self.dispatch_time += elapsed
+            self.max_dispatch = max(self.max_dispatch, elapsed)
+
+    def __init__(self) -> None:
+        self.commands = {} # name -> Command
+        self._triggers = {} # name or alias -> Command
+
+        # pick up every @command method, in the order they were defined
+        for cls in reversed(type(self).__mro__):
+            for attr, func in vars(cls).items():
+                options = getattr(func, "_command", None)
+                if options is not None:
+                    name, text, admin_only, aliases, args = options
+                    self.add_command( name, getattr(self, attr), text,
+                                      admin_only, aliases, args )
+
+    def add_command(self, name, func, text, admin_only=False, aliases=(), args=None):
+        """Register a command and its aliases."""
+        self.remove_command( name )
+
+        selected = self.Command( name, func, text, admin_only, aliases, args )
+        self.commands[ name ] = selected
+        for trigger in ( name, ) + selected.aliases:
+            self._triggers[ trigger.lower() ] = selected
+
+        self._on_commands_changed()
+        return selected
+
+    def remove_command(self, name):
+        """Unregister a command and its aliases."""
+        removed = self.commands.pop( name, None )
+
+        if removed is not None:
+            for trigger in ( removed.name, ) + removed.aliases:
+                self._triggers.pop( trigger.lower(), None )
+            self._on_commands_changed()
+
+        return removed
+
+    def get_command(self, trigger):
+        """Find a command by name or alias, without the prefix."""
+        return self._triggers.get( trigger.lower() )
+
+    def split_command(self, content, prefix):
+        """
+        Split a message into its trigger and the rest, only touching the first token.
+
+        Returns:
+            tuple: (trigger without prefix, rest of the message)
+        """
+        parts = content[ len(prefix): ].split( None, 1 )
+        if not parts:
+            return "", ""
+        return parts[0], parts[1] if len(parts) > 1 else ""
+
+    async def run_command(self, selected, msg, kwargs, received=None):
+        """
+        Run a command and record how long it took.
+
+        Args:
+            received (float, optional): perf_counter() when the message came in, to also
+                record the dispatch in front of it: prefix, lookup, checks and parsing.
+        """
+        start = time.perf_counter()
+        if received is not None:
+            selected.record_dispatch( start - received )
+
+        try:
+            return await selected.func( msg, **kwargs )
+        finally:
+            elapsed = time.perf_counter() - start
+            selected.record( elapsed )
+            COMMAND_SECONDS.observe( elapsed, selected.name )
+
+    def dispatch_stats(self) -> dict:
+        """
+        Get call counts, run times and dispatch times for every command.
+
+        Returns:
+            dict: name -> calls, average and max run time in milliseconds,
+            average and max dispatch time in microseconds.
+        """
+        return {
+            name: {
+                "calls": selected.calls,
+                "avg_ms": selected.total_time / selected.calls * 1000 if selected.calls else 0.0,
+                "max_ms": selected.max_time * 1000,
+                "dispatch_avg_us": selected.dispatch_time / selected.calls * 1e6 if selected.calls else 0.0,
+                "dispatch_max_us": selected.max_dispatch * 1e6,
+            }
+            for name, selected in self.commands.items()
+        }
+
+    def _on_commands_changed(self):
+        """Hook for anything cached from the command table."""
+        pass
@@ -0,0 +1,302 @@
+import bisect
+from array import array
+from itertools import chain
+
+# what SQLite's NOCASE folds, ASCII letters and nothing else
+_NOCASE = str.maketrans( "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz" )
+
+# where SQLite's case folding and str.lower() part ways
+_FOLD_EXCEPTIONS = { "\u0130": "\u0130", "\u03c2": "\u03c3" }
+
+def _fold(text):
+    """
+    Lower text the way the trigram tokenizer folds case, one character at a time.
+
+    str.lower() turns "İ" into two characters and keeps "ς" apart from "σ", SQLite
+    leaves the first alone and folds the second.
+    """
+    return "".join( _FOLD_EXCEPTIONS.get( char ) or char.lower() for char in text )
+
+# row lists kept across searches, about 8 bytes each
+_MAX_CACHED_ROWS = 1_000_000
+
+# rows one search may merge or walk on the event loop, about 0.4 us each;
+# broader words are left to SQLite on its own thread
+_MAX_WALK_ROWS = 20_000
+
+# Read-only, columnar copy of the course table for lookups that shouldn't touch SQLite
+class CourseIndex():
+    __slots__ = ( "sync_id", "ids", "names", "sections", "name_codes", "section_codes",
+                  "_name_postings", "_section_postings", "_name_text", "_section_text",
+                  "_folded", "_folded_postings", "_words", "_row_lists", "_cached_rows" )
+
+    # A catalog repeats a few thousand names across every section, so each
+    # distinct name and section is stored once and rows hold codes into them:
+    #   ids[row], names[name_codes[row]], sections[section_codes[row]]
+    # Rows are in id order, postings list the rows holding each name or section.
+
+    def __init__(self, ids, names, sections, name_codes, section_codes, sync_id=None):
+        """
+        Args:
+            ids (array): Course ids, ascending.
+            names (list): Distinct names.
+            sections (list): Distinct sections, None included.
+            name_codes (array): Index into names, by row.
+            section_codes (array): Index into sections, by row.
+            sync_id (int, optional): The SyncRun this copy was built from.
+        """
+        self.sync_id = sync_id
+        self.ids = ids
+        self.names = names
+        self.sections = sections
+        self.name_codes = name_codes
+        self.section_codes = section_codes
+
+        self._name_postings = self._postings( name_codes, len(names) )
+        self._section_postings = self._postings( section_codes, len(sections) )
+
+        # distinct values lowered into one string each, so a substring search is a str.find
+        self._name_text = self._search_text( names )
+        self._section_text = self._search_text( sections )
+
+        # distinct names in NOCASE order for prefix ranges, rows of names that fold together merged
+        groups = {}
+        for code, name in enumerate( names ):
+            groups.setdefault( name.translate( _NOCASE ), [] ).append( code )
+
+        # every page of a search asks again, word -> _match_word result, and
+        # (walked word, all words) -> _rows_of result
+        self._words = {}
+        self._row_lists = {}
+        self._cached_rows = 0
+
+        self._folded = sorted( groups )
+        self._folded_postings = [
+            self._name_postings[ codes[0] ] if len(codes) == 1
+            else array( "l", sorted( chain.from_iterable( self._name_postings[code] for code in codes ) ) )
+            for codes in ( groups[folded] for folded in self._folded )
+        ]
+
+    @classmethod
+    def build(cls, rows, sync_id=None):
+        """
+        Build an index from (id, name, section) rows in id order.
+
+        Example Usage:
+            index = CourseIndex.build(sqlHandler.iter_courses(), sync_id=7)
+        """
+        ids = array( "q" )
+        name_codes = array( "l" )
+        section_codes = array( "l" )
+        names = {}    # name -> code
+        sections = {} # section -> code
+
+        for record_id, name, section in rows:
+            ids.append( record_id )
+            name_codes.append( names.setdefault( name, len(names) ) )
+            section_codes.append( sections.setdefault( section, len(sections) ) )
+
+        return cls( ids, list(names), list(sections), name_codes, section_codes, sync_id )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, record_id):
+        """
+        Look a course up by id.
+
+        Returns:
+            dict: The course, or None.
+        """
+        row = bisect.bisect_left( self.ids, record_id )
+        if row < len(self.ids) and self.ids[row] == record_id:
+            return self._row( row )
+        return None
+
+    def search(self, query, after=None, limit=10):
+        """
+        Answer SQLHandler.search_courses from memory, with the same results and page keys.
+
+        Returns:
+            tuple: (list of course dicts, key for the next page or None), or None if
+            SQLite has to answer: the fuzzy fallback, or words too broad to walk here.
+        """
+        words = query.split()
+        long_words = [ _fold( word ) for word in words if len(word) >= 3 ]
+        mode = after[0] if after else None
+
+        if not long_words:
+            return self._search_prefix( query.strip(), after, limit )
+
+        if mode in ( None, "match" ):
+            found = self._search_match( long_words, after, limit )
+            if found is None:
+                return None
+
+            results, key = found
+            if results or mode == "match":
+                return results, key
+
+        return None
+
+    def _search_match(self, words, after, limit):
+        """Rows with every word somewhere in their name or section, in id order, or None if too broad."""
+        first = bisect.bisect_right( self.ids, after[1] ) if after else 0
+
+        # the names and sections each word is found in
+        matches = [ self._match_word( word ) for word in words ]
+        rarest = min( range( len(words) ), key=lambda i: matches[i][2] )
+        name_hits, section_hits, _ = matches[rarest]
+        checks = matches[:rarest] + matches[rarest + 1:]
+
+        # walk the rarest word's rows, checking the others against each one
+        rows_of_rarest = self._rows_of( ( words[rarest], frozenset( words ) ), name_hits, section_hits, checks )
+        if rows_of_rarest is None:
+            return None
+
+        candidates = rows_of_rarest[ bisect.bisect_left( rows_of_rarest, first ): ]
+
+        rows = []
+        name_codes, section_codes = self.name_codes, self.section_codes
+        for row in candidates:
+            if all( name_codes[row] in name_hits or section_codes[row] in section_hits
+                    for name_hits, section_hits, _ in checks ):
+                rows.append( row )
+                if len(rows) > limit:
+                    break
+
+        return self._page( rows, limit, lambda row: ( "match", self.ids[row] ) )
+
+    def _search_prefix(self, prefix, after, limit):
+        """Names starting with prefix, ignoring ASCII case, in name order."""
+        folded = prefix.translate( _NOCASE )
+
+        # start at the last page's name, or at the prefix itself on the first page
+        start_name = after[1].translate( _NOCASE ) if after else folded
+        first = bisect.bisect_right( self.ids, after[2] ) if after else 0
+
+        rows = []
+        group = bisect.bisect_left( self._folded, start_name )
+
+        while group < len(self._folded) and len(rows) <= limit:
+            name = self._folded[group]
+            if not name.startswith( folded ):
+                break
+
+            # only the last page's own name can hold rows that were already shown
+            postings = self._folded_postings[group]
+            skip = bisect.bisect_left( postings, first ) if name == start_name else 0
+            rows.extend( postings[ skip:skip + limit + 1 - len(rows) ] )
+            group += 1
+
+        return self._page( rows, limit,
+                           lambda row: ( "prefix", self.names[ self.name_codes[row] ], self.ids[row] ) )
+
+    def _match_word(self, word):
+        """
+        Find a word, remembering it until the next sync.
+
+        Returns:
+            tuple: (name codes, section codes, rows holding either)
+        """
+        match = self._words.get( word )
+
+        if match is None:
+            if len(self._words) >= 1024:
+                self._words.clear()
+
+            name_hits = self._find( self._name_text, word )
+            section_hits = self._find( self._section_text, word )
+            count = sum( len(self._name_postings[code]) for code in name_hits ) \
+                    + sum( len(self._section_postings[code]) for code in section_hits )
+            match = self._words[ word ] = ( name_hits, section_hits, count )
+
+        return match
+
+    def _rows_of(self, key, name_hits, section_hits, checks):
+        """
+        Rows holding one of name_hits or section_hits, in order, remembered under key.
+
+        A name or section is left out when some other word is in neither it nor any
+        section (or name), none of its rows could match.
+
+        Returns:
+            array: The rows, or None if there are more than _MAX_WALK_ROWS to merge or check.
+        """
+        rows = self._row_lists.get( key )
+
+        if rows is None:
+            names = [ code for code in name_hits
+                      if all( code in other_names or other_sections for other_names, other_sections, _ in checks ) ]
+            sections = [ code for code in section_hits
+                         if all( code in other_sections or other_names for other_names, other_sections, _ in checks ) ]
+            postings = [ self._name_postings[code] for code in names ] \
+                       + [ self._section_postings[code] for code in sections ]
+
+            # one list with nothing to check is only read up to the page, anything
+            # else is sorted or walked whole
+            if ( len(postings) > 1 or checks ) and sum( map( len, postings ) ) > _MAX_WALK_ROWS:
+                return None
+
+            # postings are sorted runs, sorted() merges those quickly; a row can only
+            # repeat when its name and its section both hold the word
+            if len(postings) == 1:
+                rows = postings[0]
+            else:
+                merged = chain.from_iterable( postings )
+                rows = array( "l", sorted( set( merged ) if names and sections else merged ) )
+
+            # the copy is replaced on every sync, the cache only has to stay small until then
+            self._cached_rows += len(rows)
+            if self._cached_rows > _MAX_CACHED_ROWS or len(self._row_lists) >= 1024:
+                self._row_lists.clear()
+                self._cached_rows = len(rows)
+
+            self._row_lists[ key ] = rows
+
+        return rows
+
+    def _find(self, text, word):
+        """Codes of every distinct value containing word."""
+        values, starts = text
+        codes = set()
+
+        offset = values.find( word )
+        while offset != -1:
+            code = bisect.bisect_right( starts, offset ) - 1
+            codes.add( code )
+
+            # one hit per value is enough, go on from the next one
+            offset = values.find( word, starts[code + 1] ) if code + 1 < len(starts) else -1
+
+        return codes
+
+    def _page(self, rows, limit, make_key):
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return [ self._row( row ) for row in rows ], ( make_key( rows[-1] ) if has_more else None )
+
+    def _row(self, row):
+        return { "id": self.ids[row],
+                 "name": self.names[ self.name_codes[row] ],
+                 "section": self.sections[ self.section_codes[row] ] }
+
+    @staticmethod
+    def _postings(codes, count):
+        postings = [ array( "l" ) for _ in range( count ) ]
+        for row, code in enumerate( codes ):
+            postings[code].append( row )
+        return postings
+
+    @staticmethod
+    def _search_text(values):
+        """
+        Fold every value into one "\\n" separated string, with where each one starts.
+        """
+        lowered = [ _fold( value or "" ) for value in values ]
+        starts = array( "l" )
+        offset = 0
+        for value in lowered:
+            starts.append( offset )
+            offset += len(value) + 1
+        return "\n".join( lowered ), starts
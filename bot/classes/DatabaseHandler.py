@@ -1,4 +1,178 @@
+import asyncio
+import threading
+import time
+import config as cfg
+from concurrent.futures import ThreadPoolExecutor
+from classes.CatalogPipeline import CatalogPipeline
+from classes.CourseIndex import CourseIndex
+
+# Runs catalog updates in the background, one at a time
 class DatabaseHandler():
 
-    def __init__(self) -> None:
-        pass
\ No newline at end of file
+    def __init__(self, runs_updates=True) -> None:
+        self.sync_diff = {}
+        self.runs_updates = runs_updates # False in processes that only follow another's updates
+
+        self._update_task = None      # the running update, shared by every caller
+        self._update_cancel = None    # set to stop the running update
+        self._update_channels = {}    # channel id -> channel that asked for progress
+        self._update_progress_at = 0.0
+        self._progress_tasks = set()  # progress sends in flight, held so they aren't collected
+        self._seen_sync_id = None     # newest sync this process has picked up
+
+        # updates get their own thread, so reads on the database worker keep going
+        self._update_executor = ThreadPoolExecutor( max_workers=1,
+                                                    thread_name_prefix="sql-update" )
+
+    def update_running(self) -> bool:
+        """Check if an update is in progress."""
+        return self._update_task is not None and not self._update_task.done()
+
+    async def join_update(self, channel=None, force=False) -> dict:
+        """
+        Start an update, or wait on the one already running.
+
+        The sync commits in a single transaction, so until it finishes every
+        read keeps seeing the previous catalog.
+
+        Args:
+            channel (discord.abc.Messageable, optional): Where to post progress.
+            force (bool, optional): Sync even if the catalog didn't change.
+                Ignored when joining a running update.
+
+        Returns:
+            dict: The result of CatalogPipeline.run.
+
+        Example Usage:
+            diff = await self.join_update(msg.channel, force=True)
+        """
+        if channel is not None:
+            self._update_channels[ channel.id ] = channel
+
+        if not self.update_running():
+            self._update_task = asyncio.create_task( self._run_update( force ) )
+
+        # one caller giving up doesn't cancel it for everyone else
+        return await asyncio.shield( self._update_task )
+
+    def cancel_update(self) -> bool:
+        """
+        Stop the running update, keeping the previous catalog.
+
+        Returns:
+            bool: True if there was an update to stop.
+        """
+        if not self.update_running():
+            return False
+
+        self._update_cancel.set()
+        return True
+
+    async def follow_updates(self):
+        """
+        Pick up a sync made by another process sharing the database.
+
+        Clears the query cache when a newer sync landed, and marks us ready
+        once there is data to serve.
+        """
+        sync_id = await self.last_sync_id()
+
+        if sync_id != self._seen_sync_id:
+            self._seen_sync_id = sync_id
+            self.clear_cache()
+            await self.refresh_course_index()
+
+        if not self.ready and sync_id is not None:
+            self.ready = True
+
+    async def _run_update(self, force):
+
+        # initialize variables
+        loop = asyncio.get_running_loop()
+        self._update_cancel = threading.Event()
+        self._update_progress_at = time.monotonic()
+
+        # progress comes from the update thread, hop back onto the loop
+        pipeline = CatalogPipeline( cfg.catalog_source,
+                                    batch_size=cfg.catalog_batch_size,
+                                    progress=lambda read: loop.call_soon_threadsafe( self._report_progress, read ),
+                                    cache_dir=cfg.catalog_cache_dir,
+                                    cancel=self._update_cancel,
+                                    max_removed=cfg.catalog_max_removed )
+
+        try:
+            # an empty database always syncs, otherwise an unchanged catalog is skipped
+            force = force or ( await self.summary() )["course_count"] == 0
+
+            # stream the catalog in, only writing what changed since the last sync
+            # (sqlHandler is looked up over there too, a forced first update opens the database)
+            diff = await loop.run_in_executor( self._update_executor,
+                                               lambda: pipeline.run( self.sqlHandler, force ) )
+
+            # let us know about bad rows
+            for error in pipeline.errors:
+                print(f"Skipped catalog {error}")
+
+            self.sync_diff = diff
+
+            # fresh data, start the query cache over and rebuild the in-memory copy
+            self.clear_cache()
+            await self.refresh_course_index()
+
+            # let subscribed channels know, the updating process reaches every shard's channels
+            self.schedule_notifications( diff )
+
+            self.ready = True
+            return diff
+
+        finally:
+            self._update_channels = {}
+
+    async def refresh_course_index(self):
+        """
+        Rebuild the in-memory course copy if the database moved past it, then swap it in.
+
+        Built on the update thread while searches keep using the old copy.
+        """
+        if not cfg.course_replica:
+            return
+
+        loop = asyncio.get_running_loop()
+        index = await loop.run_in_executor( self._update_executor, self._build_course_index,
+                                            self.courseIndex )
+        self.courseIndex = index
+
+    def _build_course_index(self, current):
+        sync_id = self.sqlHandler.last_sync_id()
+
+        # nothing synced since the copy we have
+        if current is not None and current.sync_id == sync_id:
+            return current
+
+        return CourseIndex.build( self.sqlHandler.iter_courses(), sync_id )
+
+    def _report_progress(self, read):
+        print(f"Catalog sync: {read} rows read")
+
+        # don't flood the channels
+        now = time.monotonic()
+        if now - self._update_progress_at < cfg.update_progress_interval:
+            return
+        self._update_progress_at = now
+
+        for channel in self._update_channels.values():
+            task = asyncio.create_task( self._send_progress( channel, read ) )
+            self._progress_tasks.add( task )
+            task.add_done_callback( self._progress_sent )
+
+    def _progress_sent(self, task):
+        self._progress_tasks.discard( task )
+
+        # nobody awaits these, print failures instead of losing them
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Failed to send update progress: {task.exception()}")
+
+    async def _send_progress(self, channel, read):
+        guild = getattr( channel, "guild", None )
+        embed = await self.get_embed("update-database-progress", guild=guild, read=read)
+        await embed.send( guild, channel )
@@ -1,17 +1,21 @@
 import json
+import string
 import discord
 import config as cfg
 import datetime
 from classes.GuildHandler import GuildHandler
+from classes.SendQueue import SendQueue
+from classes.Metrics import EMBED_SECONDS, SEND_SECONDS
 
 # Overarching handler
 class EmbedHandler ( ):
 
     # Custom embed class
     class CustomEmbed( discord.Embed ):
-        def __init__(self, *, guildHandler, channel_name, **kwargs):
+        def __init__(self, *, guildHandler, channel_name, sendQueue=None, **kwargs):
             super().__init__(**kwargs)
             self.guildHandler = guildHandler
+            self.sendQueue = sendQueue
             self.channel_name = channel_name
             self.channel_obj = None
             self.guild = None
@@ -28,8 +32,12 @@ class EmbedHandler ( ):
             else:
                 self.channel_obj = self.guild.get_channel_obj( self.channel_name )
 
+                # the guild doesn't have it (anymore), answer where we were asked instead
+                if self.channel_obj is None:
+                    self.channel_obj = msg_channel
+
         def set_guild(self, guild):
-            self.guild = self.guildHandler.new_guild( guild )
+            self.guild = self.guildHandler.get_or_add_guild( guild )
 
         async def send(self, guild, msg_channel:discord.channel=None):
             """Sends the embed to the assigned channel."""
@@ -39,20 +47,71 @@ class EmbedHandler ( ):
             self.set_channel_obj( msg_channel )
 
             # send the embed
-            if self.channel_obj is not None:
-
-                # Send the embed
-                async with self.channel_obj.typing():
-
-
-                    await self.channel_obj.send(embed=self)
-            else:
+            if self.channel_obj is None:
                 raise ValueError(f"Embed '{self.title}' needs a channel in order to be sent!.")
 
+            # hand it to the outbound queue, don't wait on the channel
+            if self.sendQueue is not None:
+                return self.sendQueue.enqueue( self.channel_obj, self )
+
+            # Send the embed
+            async with self.channel_obj.typing():
+
+                with SEND_SECONDS.time():
+                    return await self.channel_obj.send(embed=self)
+
+    # Compiled version of one json template
+    class EmbedTemplate():
+        __slots__ = ("key", "title", "description", "color", "color_name", "channel_name", "notify",
+                     "fields", "static")
+
+        def __init__(self, key, data, color_map):
+            self.key = key
+            self.title = data.get("title", "")
+            self.description = data.get("description", "")
+            self.channel_name = data.get("channel", "")
+            self.notify = data.get("notify", False) # goes to the guild's notification channel
+
+            # colors never change, build the Colour once
+            color = data.get("color")
+            if color not in color_map:
+                raise ValueError(f"Embed '{key}' has unknown color '{color}'.")
+            self.color = discord.Colour( color_map[color] )
+            self.color_name = color
+
+            # every placeholder used by the title and description
+            self.fields = self._parse_fields( self.title ) | self._parse_fields( self.description )
+
+            # nothing to fill in, format once now so {{ and }} still come out as { and }
+            self.static = None if self.fields else ( self.title.format(), self.description.format() )
+
+        def render(self, kwargs):
+            """Fill in the title and description, skipping format when there is nothing to fill."""
+            if self.static is not None:
+                return self.static
+
+            try:
+                return self.title.format(**kwargs), self.description.format(**kwargs)
+            except KeyError:
+                missing = sorted( field for field in self.fields if field not in kwargs )
+                raise ValueError(f"Embed '{self.key}' is missing fields: {', '.join(missing)}.") from None
+
+        def _parse_fields(self, text):
+            """Get the placeholder names in a format string."""
+            fields = set()
+            for _, field_name, _, _ in string.Formatter().parse( text ):
+                if field_name is None:
+                    continue
+                if field_name == "" or field_name.isdigit():
+                    raise ValueError(f"Embed '{self.key}' can only use named placeholders.")
+                fields.add( field_name.split(".")[0].split("[")[0] )
+            return fields
+
     # init
-    def __init__(self):
+    def __init__(self, guildHandler=None):
 
-        self.guildHandler = GuildHandler()
+        # share the registry of whoever owns us, if given
+        self.guildHandler = guildHandler if guildHandler is not None else GuildHandler()
 
         self._json_file = cfg.json_file
 
@@ -64,39 +123,63 @@ class EmbedHandler ( ):
 
         self.guild = None
 
+        # outbound queue shared by every embed we make
+        self.sendQueue = None
+        if cfg.send_queue:
+            self.sendQueue = SendQueue( max_concurrency=cfg.send_max_concurrency,
+                                        typing=cfg.send_typing )
+
         with open(self._json_file, 'r') as embed_file:
             self.messages = json.load(embed_file)
 
+        # compile every template once, bad templates fail here instead of mid-command
+        # (well under a millisecond, so fast_start doesn't defer it)
+        self._templates = {
+            key: EmbedHandler.EmbedTemplate( key, data, self._color_map )
+            for key, data in self.messages.items()
+            if not key.startswith("_")
+        }
+
     async def get_embed(self, key, **kwargs):
 
-        # get embed format
-        data = self._get_embed_format( key )
+        with EMBED_SECONDS.time( key ):
 
-        # retrieve channel name 
-        channel_name = data.get("channel")
+            # get compiled template
+            template = self._get_embed_format( key )
 
-        # create embed with channel obj
-        embed = EmbedHandler.CustomEmbed(
-            title=data.get("title").format(**kwargs),             # format the title w args
-            description=data.get("description").format(**kwargs), # format the body w args
-            color=self._color_map[(data.get("color"))],           # Get the hex color
-            channel_name = channel_name,                           # set destination channel
-            timestamp=datetime.datetime.now(tz=datetime.timezone.utc),             
-            guildHandler=self.guildHandler
-        )
+            # format the title and body w args
+            title, description = template.render( kwargs )
+
+            # the guild can change the color and where it goes
+            color, channel_name = self._embed_style( kwargs.get("guild"), template )
+
+            # create embed with channel obj
+            embed = EmbedHandler.CustomEmbed(
+                title=title,
+                description=description,
+                color=color,                                           # prebuilt Colour
+                channel_name = channel_name,                           # set destination channel
+                timestamp=datetime.datetime.now(tz=datetime.timezone.utc),             
+                guildHandler=self.guildHandler,
+                sendQueue=self.sendQueue
+            )
 
         # return the embed
         return embed
     
     def _get_embed_format( self, key ):
 
-        data = self.messages.get(key)
+        template = self._templates.get(key)
 
-        if not data:
+        if not template:
             raise ValueError(f"Embed key '{key}' not found in configuration.")
         
-        return data
+        return template
     
     def set_guild(self, guild):
         self.guild = guild
 
+    def _embed_style(self, guild, template):
+        """Hook for per-guild styles, the template's own color and channel by default."""
+        return template.color, template.channel_name
+
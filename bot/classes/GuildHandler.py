@@ -1,3 +1,5 @@
+import time
+import asyncio
 import discord
 from discord.utils import get
 
@@ -11,13 +13,63 @@ class GuildHandler():
             self.required_roles = required_roles
             self.required_channels = required_channels
 
+            # name -> object indexes, built on first lookup
+            self._channels = None
+            self._roles = None
+
+            # last validate() result, kept until a required channel or role changes
+            self.report = None
+
+        @property
+        def id(self):
+            """The id of the underlying guild."""
+            return self.guild.id
+
         def get_channel_obj(self, channel_name):
             """Get a channel object by name."""
-            return get(self.guild.channels, name=channel_name)
+            if self._channels is None:
+                self._channels = self._build_index(self.guild.channels)
+            return self._channels.get(channel_name)
 
         def get_role_obj(self, role_name):
             """Get a role object by name."""
-            return get(self.guild.roles, name=role_name)
+            if self._roles is None:
+                self._roles = self._build_index(self.guild.roles)
+            return self._roles.get(role_name)
+
+        def refresh_channels(self, *channel_names):
+            """Re-resolve the given channel names after a channel event."""
+            if self._channels is not None:
+                self._refresh_index(self._channels, self.guild.channels, channel_names)
+            self._revalidate(channel_names, self.required_channels)
+
+        def refresh_roles(self, *role_names):
+            """Re-resolve the given role names after a role event."""
+            if self._roles is not None:
+                self._refresh_index(self._roles, self.guild.roles, role_names)
+            self._revalidate(role_names, self.required_roles)
+
+        def _revalidate(self, names, required):
+            """Check again if the event touched something required, and we'd checked before."""
+            if self.report is not None and any(name in required for name in names):
+                self.report = None
+                self.validate()
+
+        def _build_index(self, objects):
+            """Map names to objects, first match wins like discord.utils.get."""
+            index = {}
+            for obj in objects:
+                index.setdefault(obj.name, obj)
+            return index
+
+        def _refresh_index(self, index, objects, names):
+            """Look the given names up again and patch the index."""
+            for name in names:
+                obj = get(objects, name=name)
+                if obj is None:
+                    index.pop(name, None)
+                else:
+                    index[name] = obj
 
         def validate_channel(self, channel_name):
             """Check if a channel exists in the guild."""
@@ -59,41 +111,105 @@ class GuildHandler():
 
             return all_valid
 
+        def set_required_channels(self, channel_names):
+            """Swap the channels this guild needs, checking again if it was checked before."""
+            if channel_names != self.required_channels:
+                self.required_channels = channel_names
+                if self.report is not None:
+                    self.report = None
+                    self.validate()
+
+        def validate(self):
+            """
+            Check the required channels and roles, reusing the last result until one of them changes.
+
+            Returns:
+                dict: valid, missing_channels, missing_roles and checked_at.
+            """
+            if self.report is None:
+                missing_channels = [name for name in self.required_channels if not self.validate_channel(name)]
+                missing_roles = [name for name in self.required_roles if not self.validate_role(name)]
+                self.report = {
+                    "valid": not missing_channels and not missing_roles,
+                    "missing_channels": missing_channels,
+                    "missing_roles": missing_roles,
+                    "checked_at": time.time(),
+                }
+            return self.report
+
         def validate_guild(self):
             """Validate the guild setup."""
-            channels_valid = self.validate_channels(verbose=False)
-            roles_valid = self.validate_roles(verbose=False)
-            return channels_valid and roles_valid
+            return self.validate()["valid"]
         
 
     def __init__(self, required_channels=None, required_roles=None) -> None:
-        self.custom_guilds = []
+        self.custom_guilds = {} # guild id -> CustomGuild
         self.required_channels = required_channels or []
         self.required_roles = required_roles or []
+        self._validation_task = None
 
 
     def add_guild( self, guild:discord.Guild ):
 
         # create custom guild obj
-        custom_guild = self.CustomGuild(guild, self.required_channels, self.required_roles)
+        custom_guild = self.new_guild( guild )
+
+        # Every guild is kept, commands still answer where the setup is incomplete;
+        # validate_guilds works out which ones are
+        self.custom_guilds[ guild.id ] = custom_guild
 
-        # Add in valid guild
-        if custom_guild.validate_guild:
-            self.custom_guilds.append( custom_guild )
+        return custom_guild
 
     def get_custom_guild( self, guild:discord.Guild ):
-        
-        # loop through our guilds
-        for custom_guild in self.custom_guilds:
-            
-            # see if the guild matches
-            if guild.id == custom_guild.id:
-                
-                # return correct guild
-                return custom_guild
-            
-        # No guild found 
-        return None
+
+        # DMs have no guild
+        if guild is None:
+            return None
+
+        # No guild found gives None
+        return self.custom_guilds.get( guild.id )
+
+    def get_or_add_guild( self, guild:discord.Guild ):
+
+        # reuse the registered guild if we have one
+        custom_guild = self.get_custom_guild( guild )
+
+        if custom_guild is None and guild is not None:
+            custom_guild = self.add_guild( guild )
+
+        return custom_guild
+
+    def remove_guild( self, guild:discord.Guild ):
+
+        # forget the guild, if we had it
+        return self.custom_guilds.pop( guild.id, None )
+
+    def refresh_channels( self, guild:discord.Guild, *channel_names ):
+
+        # patch the channel index of the guild, if we have it
+        custom_guild = self.get_custom_guild( guild )
+
+        if custom_guild is not None:
+            custom_guild.refresh_channels( *channel_names )
+
+    def refresh_roles( self, guild:discord.Guild, *role_names ):
+
+        # patch the role index of the guild, if we have it
+        custom_guild = self.get_custom_guild( guild )
+
+        if custom_guild is not None:
+            custom_guild.refresh_roles( *role_names )
+
+    def update_guild( self, before:discord.Guild, after:discord.Guild ):
+
+        # same guild, keep its lookups and validation and point it at the new object
+        custom_guild = self.get_custom_guild( before )
+
+        if custom_guild is None:
+            return self.add_guild( after )
+
+        custom_guild.guild = after
+        return custom_guild
             
     def initialize_guilds( self, client ):
 
@@ -103,9 +219,74 @@ class GuildHandler():
         # loop through guilds
         for guild in guilds:
 
+            # a reconnect hands back the same guilds, keep what we worked out for them
+            custom_guild = self.custom_guilds.get( guild.id )
+            if custom_guild is not None and custom_guild.guild is guild:
+                continue
+
             # add custom guild object
             self.add_guild( guild )
 
+    async def validate_guilds( self, batch_size=200 ):
+        """
+        Validate every guild that hasn't been yet, a batch at a time.
+
+        Cached reports are reused, so only new guilds and ones a channel or
+        role event touched cost anything.
+
+        Args:
+            batch_size (int, optional): Guilds checked before giving the event loop back.
+
+        Returns:
+            dict: The validation_summary once every guild is checked.
+        """
+        guilds = list( self.custom_guilds.values() )
+
+        for start in range( 0, len(guilds), batch_size ):
+            for custom_guild in guilds[ start:start + batch_size ]:
+                custom_guild.validate()
+
+            # let messages through between batches
+            await asyncio.sleep( 0 )
+
+        return self.validation_summary()
+
+    def start_guild_validation( self, batch_size=200 ):
+
+        # on_ready can fire again, one job at a time is enough
+        if self._validation_task is None or self._validation_task.done():
+            self._validation_task = asyncio.create_task( self._validate_in_background( batch_size ) )
+
+        return self._validation_task
+
+    def validation_summary( self ):
+        """
+        Count guilds by validation state.
+
+        Returns:
+            dict: valid, invalid and pending guild counts.
+        """
+        summary = { "valid": 0, "invalid": 0, "pending": 0 }
+
+        for custom_guild in self.custom_guilds.values():
+            report = custom_guild.report
+            state = "pending" if report is None else "valid" if report["valid"] else "invalid"
+            summary[ state ] += 1
+
+        return summary
+
+    def invalid_guilds( self ):
+        """Every guild whose last validation found something missing."""
+        return [ custom_guild for custom_guild in self.custom_guilds.values()
+                 if custom_guild.report is not None and not custom_guild.report["valid"] ]
+
+    async def _validate_in_background( self, batch_size ):
+        start = time.perf_counter()
+        summary = await self.validate_guilds( batch_size )
+
+        print(f"Validated {len(self.custom_guilds)} guilds in {time.perf_counter() - start:.2f}s, "
+              f"{summary['invalid']} missing required channels or roles")
+
     def new_guild(self, guild:discord.Guild ):
 
         #print(guild)
@@ -0,0 +1,188 @@
+import time
+import bisect
+import threading
+import config as cfg
+
+# upper bounds in seconds, from a quick cache hit to a slow catalog sync
+DEFAULT_BUCKETS = ( 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0 )
+
+# Handed out while metrics are off, so timing costs a flag check and nothing else
+class _NoTimer():
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NO_TIMER = _NoTimer()
+
+# Latency registry, rendered in the Prometheus text format
+class Metrics():
+
+    # One latency histogram, split by a single label
+    class Histogram():
+
+        # Times one block into the histogram
+        class Timer():
+            __slots__ = ( "histogram", "value", "start" )
+
+            def __init__(self, histogram, value):
+                self.histogram = histogram
+                self.value = value
+
+            def __enter__(self):
+                self.start = time.perf_counter()
+                return self
+
+            def __exit__(self, *exc):
+                self.histogram.observe( time.perf_counter() - self.start, self.value )
+                return False
+
+        def __init__(self, registry, name, text, label=None, buckets=DEFAULT_BUCKETS):
+            self.registry = registry
+            self.name = name
+            self.text = text
+            self.label = label
+            self.buckets = tuple(buckets)
+
+            self._series = {} # label value -> [bucket counts..., sum, count]
+            self._lock = threading.Lock()
+
+        def time(self, value=None):
+            """
+            Time a block, if metrics are on.
+
+            Example Usage:
+                with COMMAND_SECONDS.time("help"):
+                    ...
+            """
+            if not self.registry.enabled:
+                return NO_TIMER
+            return Metrics.Histogram.Timer( self, value )
+
+        def observe(self, seconds, value=None):
+            """Record one observation."""
+            if not self.registry.enabled:
+                return
+
+            index = bisect.bisect_left( self.buckets, seconds )
+
+            # the database thread and the event loop both record
+            with self._lock:
+                series = self._series.get( value )
+                if series is None:
+                    series = self._series[ value ] = [0] * ( len(self.buckets) + 2 )
+
+                # counts are per bucket here, made cumulative when rendered
+                if index < len(self.buckets):
+                    series[ index ] += 1
+                series[-2] += seconds
+                series[-1] += 1
+
+        def quantile(self, q, value=None):
+            """
+            Estimate a quantile as the upper bound of the bucket it falls in.
+
+            Returns:
+                float: Seconds, inf if it's past the last bucket, None with no observations.
+            """
+            series = self._series.get( value )
+            if not series or not series[-1]:
+                return None
+
+            target = q * series[-1]
+            seen = 0
+            for bound, count in zip( self.buckets, series ):
+                seen += count
+                if seen >= target:
+                    return bound
+            return float("inf")
+
+        def series(self) -> dict:
+            """label value -> (count, sum in seconds)."""
+            with self._lock:
+                return { value: ( series[-1], series[-2] ) for value, series in self._series.items() }
+
+        def render(self):
+            lines = [ f"# HELP {self.name} {self.text}", f"# TYPE {self.name} histogram" ]
+
+            with self._lock:
+                snapshot = { value: list(series) for value, series in self._series.items() }
+
+            for value, series in sorted( snapshot.items(), key=lambda item: str(item[0]) ):
+                labels = f'{self.label}="{_escape(value)}",' if self.label else ""
+
+                seen = 0
+                for bound, count in zip( self.buckets, series ):
+                    seen += count
+                    lines.append( f'{self.name}_bucket{{{labels}le="{bound}"}} {seen}' )
+                lines.append( f'{self.name}_bucket{{{labels}le="+Inf"}} {series[-1]}' )
+
+                labels = "{" + labels.rstrip(",") + "}" if labels else ""
+                lines.append( f"{self.name}_sum{labels} {series[-2]}" )
+                lines.append( f"{self.name}_count{labels} {series[-1]}" )
+
+            return lines
+
+        def clear(self):
+            with self._lock:
+                self._series.clear()
+
+    def __init__(self, enabled=False) -> None:
+        """
+        Args:
+            enabled (bool, optional): Record latencies. Counters kept by the handlers
+                themselves are always rendered.
+        """
+        self.enabled = enabled
+        self.histograms = {} # name -> Histogram
+
+    def histogram(self, name, text, label=None, buckets=DEFAULT_BUCKETS):
+        """Get a histogram, creating it the first time."""
+        histogram = self.histograms.get( name )
+        if histogram is None:
+            histogram = self.histograms[ name ] = Metrics.Histogram( self, name, text, label, buckets )
+        return histogram
+
+    def render(self, samples=()) -> str:
+        """
+        Render every histogram, plus extra samples, in the Prometheus text format.
+
+        Args:
+            samples (iterable, optional): (name, type, help, {label value tuple: value}, label names)
+                for counters and gauges owned by someone else.
+        """
+        lines = []
+
+        for name, kind, text, values, labels in samples:
+            lines.append( f"# HELP {name} {text}" )
+            lines.append( f"# TYPE {name} {kind}" )
+            for key, value in values.items():
+                key = key if isinstance( key, tuple ) else ( key, )
+                pairs = ",".join( f'{label}="{_escape(part)}"' for label, part in zip( labels, key ) )
+                lines.append( f"{name}{{{pairs}}} {value}" if pairs else f"{name} {value}" )
+
+        for histogram in self.histograms.values():
+            lines.extend( histogram.render() )
+
+        return "\n".join( lines ) + "\n"
+
+    def clear(self):
+        """Drop every observation."""
+        for histogram in self.histograms.values():
+            histogram.clear()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# process wide, like the config it's switched on from
+registry = Metrics( enabled=cfg.metrics_enabled )
+
+COMMAND_SECONDS = registry.histogram( "bot_command_seconds", "Time to run a command.", "command" )
+EMBED_SECONDS   = registry.histogram( "bot_embed_seconds", "Time to build an embed.", "key" )
+QUERY_SECONDS   = registry.histogram( "bot_query_seconds",
+                                      "Time for a database call, waiting on the worker included.", "operation" )
+SEND_SECONDS    = registry.histogram( "bot_send_seconds", "Time for Discord to take a send." )
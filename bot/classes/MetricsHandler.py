@@ -0,0 +1,132 @@
+import os
+import time
+import asyncio
+from classes.Metrics import registry
+
+# Overarching metrics class, pulls the counters every other handler already keeps
+class MetricsHandler():
+
+    def __init__(self) -> None:
+        self.metrics = registry
+        self._metrics_server = None
+        self.startup_times = {} # phase -> seconds since the process started
+
+    def record_startup(self, phase, started):
+        """Note how long it took to reach a startup phase, the first time only."""
+        if started is not None and phase not in self.startup_times:
+            self.startup_times[ phase ] = time.perf_counter() - started
+        return self.startup_times.get( phase )
+
+    def metrics_samples(self) -> list:
+        """
+        Get the counters and gauges kept by the other handlers.
+
+        Returns:
+            list: (name, type, help, {label values: value}, label names) per metric.
+        """
+        samples = []
+
+        dispatch = self.dispatch_stats()
+        samples.append( ( "bot_command_calls_total", "counter", "Commands run.",
+                          { name: stats["calls"] for name, stats in dispatch.items() }, ( "command", ) ) )
+        samples.append( ( "bot_command_dispatch_seconds_total", "counter",
+                          "Time from a message to its command starting: prefix, lookup, checks and parsing.",
+                          { name: selected.dispatch_time for name, selected in self.commands.items() }, ( "command", ) ) )
+
+        limits = self.rate_limit_stats()
+        samples.append( ( "bot_rate_limit_drops_total", "counter", "Messages and commands dropped by a rate limit.",
+                          { scope: stats["drops"] for scope, stats in limits.items() }, ( "scope", ) ) )
+        samples.append( ( "bot_rate_limit_buckets", "gauge", "Rate limit buckets held in memory.",
+                          { scope: stats["buckets"] for scope, stats in limits.items() }, ( "scope", ) ) )
+
+        cache = self.queryCache
+        if cache is not None:
+            stats = cache.stats()
+            samples.append( ( "bot_query_cache_total", "counter", "Query cache lookups and removals.",
+                              { event: stats[event] for event in ( "hits", "misses", "evictions", "expirations" ) },
+                              ( "event", ) ) )
+            samples.append( ( "bot_query_cache_size", "gauge", "Queries and rows held by the query cache.",
+                              { "entries": stats["entries"], "rows": stats["rows"] }, ( "unit", ) ) )
+
+        if self.sendQueue is not None:
+            stats = self.sendQueue.stats()
+            samples.append( ( "bot_send_total", "counter", "Embeds sent, messages used to send them, failures and retries.",
+                              { event: stats[event] for event in ( "sent", "messages", "failed", "retries" ) },
+                              ( "event", ) ) )
+            samples.append( ( "bot_send_queue_depth", "gauge", "Embeds waiting to be sent.",
+                              { (): stats["depth"] }, () ) )
+
+        if self.startup_times:
+            samples.append( ( "bot_startup_seconds", "gauge", "Seconds from process start to each startup phase.",
+                              dict( self.startup_times ), ( "phase", ) ) )
+
+        if self.courseIndex is not None:
+            samples.append( ( "bot_course_index_rows", "gauge", "Courses in the in-memory copy.",
+                              { (): len(self.courseIndex) }, () ) )
+
+        samples.append( ( "bot_guilds", "gauge", "Guilds by validation state.",
+                          self.validation_summary(), ( "state", ) ) )
+
+        samples.append( ( "bot_subscriptions", "gauge", "Channel and course pairs following changes.",
+                          { (): self.subscription_count() }, () ) )
+        samples.append( ( "bot_notifications_total", "counter", "Course change notification runs, channels reached and embeds queued.",
+                          dict( self.notify_stats ), ( "event", ) ) )
+
+        samples.append( ( "bot_ready", "gauge", "1 once the course database is usable.",
+                          { (): int(self.ready) }, () ) )
+
+        return samples
+
+    def metrics_text(self) -> str:
+        """Every metric in the Prometheus text format."""
+        return self.metrics.render( self.metrics_samples() )
+
+    def dump_metrics(self, path) -> str:
+        """
+        Write every metric to a file, replacing it in one go.
+
+        Returns:
+            str: The path written.
+        """
+        folder = os.path.dirname( path )
+        if folder:
+            os.makedirs( folder, exist_ok=True )
+
+        with open( path + ".part", "w" ) as dump:
+            dump.write( self.metrics_text() )
+        os.replace( path + ".part", path )
+
+        return path
+
+    async def start_metrics_server(self, port, host="0.0.0.0"):
+        """Serve GET /metrics for a Prometheus scraper, once."""
+        if self._metrics_server is None:
+            self._metrics_server = await asyncio.start_server( self._serve_metrics, host, port )
+            print(f"Serving metrics on port {port}")
+        return self._metrics_server
+
+    async def _serve_metrics(self, reader, writer):
+        try:
+            request = await asyncio.wait_for( reader.readline(), timeout=5 )
+            parts = request.decode( "latin-1" ).split()
+
+            # drain the headers, nothing in them matters
+            while ( await asyncio.wait_for( reader.readline(), timeout=5 ) ).strip():
+                pass
+
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.metrics_text().encode()
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+
+            writer.write( f"HTTP/1.1 {status}\r\n"
+                          f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                          f"Content-Length: {len(body)}\r\n"
+                          f"Connection: close\r\n\r\n".encode() + body )
+            await writer.drain()
+
+        except ( asyncio.TimeoutError, ConnectionError ):
+            pass
+
+        finally:
+            writer.close()
@@ -0,0 +1,136 @@
+import time
+import threading
+from collections import OrderedDict
+
+# Read-through cache for SQLHandler queries, LRU with a TTL
+class QueryCache():
+
+    def __init__(self, ttl=3600, max_rows=50000, max_entries=5000, clock=time.monotonic) -> None:
+        """
+        Args:
+            ttl (float, optional): Seconds before an entry has to be fetched again.
+            max_rows (int, optional): Most rows held across every entry, caps memory.
+            max_entries (int, optional): Most queries held.
+            clock (callable, optional): Returns the time in seconds, swap it out for tests.
+        """
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._entries = OrderedDict() # key -> (expires, rows, value), least recent first
+        self._keys_by_model = {}      # model name -> keys cached for it
+        self._rows = 0
+        self._lock = threading.Lock()
+
+        # moves on every invalidate and clear, a put read before that is stale
+        self.generation = 0
+
+        # counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, operation, model, filters=None):
+        """Build a cache key for a query."""
+        return ( operation, model.__name__, frozenset( (filters or {}).items() ) )
+
+    def get(self, key):
+        """
+        Look a query up.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            # too old, drop it and fetch again
+            if entry[0] <= self.clock():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[2]
+
+    def put(self, key, value, rows=1, generation=None):
+        """
+        Store a query result, evicting the least recent entries past the caps.
+
+        Args:
+            generation (int, optional): self.generation from before the query ran. A
+                write landed since if it moved, so the result is dropped instead.
+
+        Example Usage:
+            generation = cache.generation
+            cache.put(key, run_query(), generation=generation)
+        """
+
+        # too big to ever fit, don't push everything else out for it
+        if rows > self.max_rows:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            if key in self._entries:
+                self._drop(key)
+
+            self._entries[key] = ( self.clock() + self.ttl, rows, value )
+            self._keys_by_model.setdefault( key[1], set() ).add( key )
+            self._rows += rows
+
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                self._drop( next(iter(self._entries)) )
+                self.evictions += 1
+
+    def invalidate(self, model):
+        """Forget every query on a model, after it was written to."""
+        with self._lock:
+            self.generation += 1
+            for key in self._keys_by_model.pop( model.__name__, () ):
+                self._drop(key, keep_index=True)
+
+    def clear(self):
+        """Forget everything."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._keys_by_model.clear()
+            self._rows = 0
+
+    def stats(self) -> dict:
+        """
+        Get cache counters.
+
+        Returns:
+            dict: Hits, misses, evictions, expirations and current size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "rows": self._rows,
+        }
+
+    def _drop(self, key, keep_index=False):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        self._rows -= entry[1]
+        if not keep_index:
+            keys = self._keys_by_model.get( key[1] )
+            if keys is not None:
+                keys.discard(key)
@@ -0,0 +1,48 @@
+import time
+import config as cfg
+from classes.RateLimiter import RateLimiter
+
+# Overarching rate limit class
+class RateLimitHandler():
+
+    def __init__(self, clock=time.monotonic) -> None:
+
+        # (tokens per second, burst) for each scope, from config
+        self.user_limiter    = RateLimiter( *cfg.user_rate_limit,
+                                            max_buckets=cfg.rate_limit_max_buckets, clock=clock )
+        self.guild_limiter   = RateLimiter( *cfg.guild_rate_limit,
+                                            max_buckets=cfg.rate_limit_max_buckets, clock=clock )
+        self.command_limiter = RateLimiter( *cfg.command_rate_limit,
+                                            max_buckets=cfg.rate_limit_max_buckets, clock=clock )
+
+    def allow_message(self, msg) -> bool:
+        """Check the author's and the guild's limits before a message is handled."""
+
+        # spammers don't get to eat the guild's tokens
+        if not self.user_limiter.allow( msg.author.id ):
+            return False
+
+        # DMs have no guild
+        if msg.guild is None:
+            return True
+
+        return self.guild_limiter.allow( msg.guild.id )
+
+    def allow_command(self, msg, name) -> bool:
+        """Check a command's limit within the guild it was called from."""
+        guild_id = msg.guild.id if msg.guild is not None else None
+        return self.command_limiter.allow( (guild_id, name) )
+
+    def rate_limit_stats(self) -> dict:
+        """
+        Get drop counts and tracked buckets for every scope.
+
+        Returns:
+            dict: scope -> drops and buckets.
+        """
+        return {
+            scope: { "drops": limiter.drops, "buckets": len(limiter) }
+            for scope, limiter in ( ("user", self.user_limiter),
+                                    ("guild", self.guild_limiter),
+                                    ("command", self.command_limiter) )
+        }
@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+
+# Token bucket rate limiter with bounded memory
+class RateLimiter():
+
+    # One bucket per key
+    class Bucket():
+        __slots__ = ( "tokens", "updated" )
+
+        def __init__(self, tokens, updated):
+            self.tokens = tokens
+            self.updated = updated
+
+    def __init__(self, rate, burst, max_buckets=10000, clock=time.monotonic) -> None:
+        """
+        Args:
+            rate (float): Tokens added back per second.
+            burst (int): Most tokens a bucket can hold.
+            max_buckets (int, optional): Buckets kept before the least recent is dropped.
+            clock (callable, optional): Returns the time in seconds, swap it out for tests.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self.clock = clock
+
+        # a bucket left alone this long is full again, so forgetting it changes nothing
+        self.idle_time = burst / rate
+
+        self.buckets = OrderedDict() # key -> Bucket, least recently used first
+        self.drops = 0
+
+    def allow(self, key) -> bool:
+        """
+        Take a token for the key.
+
+        Returns:
+            bool: True if the key is under its limit, False if it should be dropped.
+
+        Example Usage:
+            if not limiter.allow(msg.author.id):
+                return
+        """
+        now = self.clock()
+        bucket = self.buckets.get(key)
+
+        if bucket is None:
+            bucket = self.buckets[key] = self.Bucket(self.burst, now)
+        else:
+            # refill for the time that passed
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            self.buckets.move_to_end(key)
+
+        self._evict(now)
+
+        if bucket.tokens < 1:
+            self.drops += 1
+            return False
+
+        bucket.tokens -= 1
+        return True
+
+    def _evict(self, now):
+        """Drop idle buckets, and the least recent ones once we hit max_buckets."""
+        while self.buckets:
+            key, oldest = next(iter(self.buckets.items()))
+            if len(self.buckets) <= self.max_buckets and now - oldest.updated < self.idle_time:
+                break
+            del self.buckets[key]
+
+    def __len__(self):
+        return len(self.buckets)
@@ -1,14 +1,64 @@
+import time
+import hashlib
+from itertools import islice
 from sqlmodel import SQLModel, Field, create_engine, Session, Relationship, select
+from sqlalchemy import delete, event, func, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 # Custom handler
 class SQLHandler:
-    def __init__(self, db_path, dbg=False) -> None:
-        self.engine = create_engine( f"sqlite:///{db_path}" )  
+    def __init__(self, db_path, dbg=False, cache=None, profile=None) -> None:
+        self.profile = profile or {}
+        self.engine = self._create_engine( db_path, self.profile )
         self.dbg = dbg
+        self.cache = cache # optional QueryCache for retrieve/check_exists
 
+        # debug mode starts from an empty database every time
         if self.dbg:
+            with self.engine.begin() as connection:
+                connection.execute(text("DROP TABLE IF EXISTS course_search"))
             SQLModel.metadata.drop_all(self.engine)
+
+        # a single lookup when everything is already there, which is every start but the first
+        if self.dbg or self._schema_missing():
             SQLModel.metadata.create_all(self.engine)
+            self._create_search_index()
+
+    def _create_engine(self, db_path, profile: dict):
+        """
+        Build the engine for an engine profile.
+
+        Args:
+            db_path (str): Path to the SQLite file.
+            profile (dict): Optional keys:
+                pragmas (dict): PRAGMA name -> value, run on every new connection.
+                pool_size (int): Connections kept open for reuse.
+                statement_cache (int): Prepared statements sqlite3 keeps per connection.
+                compiled_cache (int): SQL strings SQLAlchemy keeps compiled.
+
+        Example Usage:
+            engine = self._create_engine("courses.db", {"pragmas": {"journal_mode": "WAL"}})
+        """
+        engine = create_engine(
+            f"sqlite:///{db_path}",
+            pool_size=profile.get("pool_size", 5),
+            query_cache_size=profile.get("compiled_cache", 500),
+            connect_args={
+                "check_same_thread": False, # connections move between the pool's threads
+                "cached_statements": profile.get("statement_cache", 128),
+            },
+        )
+
+        pragmas = profile.get("pragmas", {})
+        if pragmas:
+            @event.listens_for(engine, "connect")
+            def set_pragmas(connection, _):
+                cursor = connection.cursor()
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name} = {value}")
+                cursor.close()
+
+        return engine
 
     def check_exists(self, model: SQLModel, filters: dict) -> bool:
         """
@@ -24,12 +74,23 @@ class SQLHandler:
         Example Usage:
             exists = self.check_exists(Student, {"id": "S001"})
         """
+        if self.cache is not None:
+            cache_key = self.cache.key("check_exists", model, filters)
+            generation = self.cache.generation
+            hit, exists = self.cache.get(cache_key)
+            if hit:
+                return exists
+
         with Session(self.engine) as session:
             query = select(model)
             for key, value in filters.items():
                 query = query.where(getattr(model, key) == value)
             result = session.exec(query).first()
-            return result is not None
+
+        if self.cache is not None:
+            self.cache.put(cache_key, result is not None, generation=generation)
+
+        return result is not None
         
     def insert(self, model_instance: SQLModel) -> bool:
         """
@@ -48,8 +109,340 @@ class SQLHandler:
             with Session(self.engine) as session:
                 session.add(model_instance)
                 session.commit()
-                return True
+            self._invalidate(model)
+            return True
             
+    def bulk_upsert(self, model: SQLModel, rows, batch_size: int = 500) -> dict:
+        """
+        Insert or update many records in a single transaction.
+
+        Each batch is compared against what is already stored with one SELECT,
+        and only new or changed rows are written with SQLite's
+        INSERT ... ON CONFLICT DO UPDATE.
+
+        Args:
+            model (SQLModel): The model class to write to.
+            rows (iterable): Model instances or dicts holding every column.
+            batch_size (int, optional): Number of rows written per statement.
+
+        Returns:
+            dict: Counts of inserted, updated and unchanged records.
+
+        Example Usage:
+            counts = handler.bulk_upsert(Course, [Course(id=1, name="CS126")])
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        table = model.__table__
+        columns = [column.name for column in table.columns]
+
+        # build the upsert once, every batch reuses it
+        statement = self._upsert_statement(table)
+
+        rows = iter(rows)
+        with Session(self.engine) as session:
+            while True:
+                batch = [self._as_row(row, columns) for row in islice(rows, batch_size)]
+                if not batch:
+                    break
+
+                # grab what we already have for this batch
+                ids = [row["id"] for row in batch]
+                stored = {
+                    record.id: record
+                    for record in session.execute(select(table).where(table.c.id.in_(ids)))
+                }
+
+                # only write rows that are new or differ
+                changed = []
+                for row in batch:
+                    record = stored.get(row["id"])
+                    if record is None:
+                        counts["inserted"] += 1
+                        changed.append(row)
+                    elif any(getattr(record, key) != value for key, value in row.items()):
+                        counts["updated"] += 1
+                        changed.append(row)
+                    else:
+                        counts["unchanged"] += 1
+
+                if changed:
+                    session.execute(statement, changed)
+
+            session.commit()
+
+        self._invalidate(model)
+        return counts
+
+    def sync(self, model: SQLModel, rows, batch_size: int = 500, remove_missing: bool = True,
+             check=None) -> dict:
+        """
+        Bring a table in line with a source, only writing rows that changed.
+
+        Every source row is fingerprinted (a hash of its fields) and compared
+        with the fingerprint stored on the last sync, so unchanged rows cost a
+        dict lookup instead of a query.
+
+        Args:
+            model (SQLModel): The model class to write to.
+            rows (iterable): Model instances or dicts holding every column.
+            batch_size (int, optional): Number of rows written per statement.
+            remove_missing (bool, optional): Delete stored rows the source no longer has.
+            check (callable, optional): Called with the diff and the number of rows stored
+                before the sync, once every source row is read and before anything is
+                removed. Raise from it to roll the whole sync back.
+
+        Returns:
+            dict: Ids that were added, changed and removed, the removed rows as
+            dicts, and the unchanged count.
+
+        Example Usage:
+            diff = handler.sync(Course, courses)
+        """
+        diff = {"added": [], "changed": [], "removed": [], "removed_rows": [], "unchanged": 0}
+        table = model.__table__
+        columns = [column.name for column in table.columns]
+        fingerprints = SyncFingerprint.__table__
+
+        statement = self._upsert_statement(table)
+        fingerprint_statement = self._upsert_statement(fingerprints, ["table_name", "id"])
+
+        rows = iter(rows)
+        with Session(self.engine) as session:
+
+            # every fingerprint from the last sync, in one query
+            stored = {
+                record.id: record.fingerprint
+                for record in session.execute(
+                    select(fingerprints).where(fingerprints.c.table_name == table.name)
+                )
+            }
+            seen = set()
+
+            while True:
+                batch = [self._as_row(row, columns) for row in islice(rows, batch_size)]
+                if not batch:
+                    break
+
+                # only write rows whose fingerprint moved
+                changed = []
+                for row in batch:
+                    fingerprint = self._fingerprint(row, columns)
+                    old = stored.get(row["id"])
+                    seen.add(row["id"])
+
+                    if old == fingerprint:
+                        diff["unchanged"] += 1
+                        continue
+
+                    diff["added" if old is None else "changed"].append(row["id"])
+                    changed.append((row, fingerprint))
+
+                if changed:
+                    session.execute(statement, [row for row, _ in changed])
+                    session.execute(fingerprint_statement, [
+                        {"table_name": table.name, "id": row["id"], "fingerprint": fingerprint}
+                        for row, fingerprint in changed
+                    ])
+
+            # anything we stored that the source dropped, kept whole since it's gone after this
+            if remove_missing:
+                diff["removed"] = [record_id for record_id in stored if record_id not in seen]
+
+            # nothing is committed yet, raising here leaves the table as it was
+            if check is not None:
+                check(diff, len(stored))
+
+            if remove_missing:
+                for start in range(0, len(diff["removed"]), batch_size):
+                    ids = diff["removed"][start:start + batch_size]
+                    diff["removed_rows"].extend(
+                        dict(row._mapping) for row in session.execute(select(table).where(table.c.id.in_(ids)))
+                    )
+                    session.execute(delete(table).where(table.c.id.in_(ids)))
+                    session.execute(delete(fingerprints).where(
+                        fingerprints.c.table_name == table.name,
+                        fingerprints.c.id.in_(ids)
+                    ))
+
+            # keep a record of the run for stats
+            session.add(SyncRun(
+                table_name=table.name,
+                finished_at=time.time(),
+                added=len(diff["added"]),
+                changed=len(diff["changed"]),
+                removed=len(diff["removed"]),
+                unchanged=diff["unchanged"],
+            ))
+            session.commit()
+
+        self._invalidate(model)
+        return diff
+
+    def search_courses(self, query: str, after=None, limit: int = 10) -> tuple:
+        """
+        Search course names and sections, one page at a time.
+
+        Words of three or more letters match anywhere in a name or section
+        through the course_search trigram index. When nothing matches, the
+        search falls back to ranking courses by how many trigrams they share
+        with the query, so small typos still find something. Queries that are
+        all short words fall back to a name prefix match.
+
+        Args:
+            query (str): What to look for, e.g. "cs126" or "CS126L 002".
+            after (tuple, optional): Key returned with the previous page.
+            limit (int, optional): Courses per page.
+
+        Returns:
+            tuple: (list of course dicts, key for the next page or None)
+
+        Example Usage:
+            page, key = handler.search_courses("cs12")
+            while key:
+                page, key = handler.search_courses("cs12", after=key)
+        """
+        words = query.split()
+        long_words = [word for word in words if len(word) >= 3]
+
+        # every key starts with the mode, so later pages keep using it
+        mode = after[0] if after else None
+
+        if not long_words:
+            return self._search_prefix(query.strip(), after, limit)
+
+        if mode in (None, "match"):
+            match = " AND ".join(self._quote(word) for word in long_words)
+            results, key = self._search_match(match, after, limit)
+            if results or mode == "match":
+                return results, key
+
+        # nothing matched, share as many trigrams as possible instead
+        trigrams = {word[i:i + 3].lower() for word in long_words for i in range(len(word) - 2)}
+        match = " OR ".join(self._quote(trigram) for trigram in sorted(trigrams))
+        return self._search_fuzzy(match, after, limit)
+
+    def _search_match(self, match: str, after, limit: int) -> tuple:
+        """Substring matches, in id order."""
+        last_id = after[1] if after else -1
+        rows = self._search("""
+            SELECT course.id, course.name, course.section FROM course_search
+            JOIN course ON course.id = course_search.rowid
+            WHERE course_search MATCH :match AND course_search.rowid > :last_id
+            ORDER BY course_search.rowid LIMIT :limit
+        """, match=match, last_id=last_id, limit=limit + 1)
+        return self._page(rows, limit, lambda row: ("match", row["id"]))
+
+    def _search_fuzzy(self, match: str, after, limit: int) -> tuple:
+        """Courses sharing the most trigrams with the query, best first."""
+        last_rank, last_id = (after[1], after[2]) if after else (float("-inf"), -1)
+        rows = self._search("""
+            SELECT course.id, course.name, course.section, course_search.rank AS rank
+            FROM course_search JOIN course ON course.id = course_search.rowid
+            WHERE course_search MATCH :match
+              AND (course_search.rank, course_search.rowid) > (:last_rank, :last_id)
+            ORDER BY course_search.rank, course_search.rowid LIMIT :limit
+        """, match=match, last_rank=last_rank, last_id=last_id, limit=limit + 1)
+        return self._page(rows, limit, lambda row: ("fuzzy", row.pop("rank"), row["id"]))
+
+    def _search_prefix(self, prefix: str, after, limit: int) -> tuple:
+        """Names starting with a short prefix, ignoring case, in name order."""
+        last_name, last_id = (after[1], after[2]) if after else ("", -1)
+        rows = self._search("""
+            SELECT id, name, section FROM course
+            WHERE name >= :prefix COLLATE NOCASE AND name < :prefix || char(1114111) COLLATE NOCASE
+              AND (name > :last_name COLLATE NOCASE
+                   OR (name = :last_name COLLATE NOCASE AND id > :last_id))
+            ORDER BY name COLLATE NOCASE, id LIMIT :limit
+        """, prefix=prefix, last_name=last_name, last_id=last_id, limit=limit + 1)
+        return self._page(rows, limit, lambda row: ("prefix", row["name"], row["id"]))
+
+    def _search(self, sql: str, **params) -> list:
+        with self.engine.connect() as connection:
+            return [dict(row._mapping) for row in connection.execute(text(sql), params)]
+
+    def _page(self, rows: list, limit: int, make_key) -> tuple:
+        """Cut the extra row off a page, and build the next key from the last row kept."""
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        keys = [make_key(row) for row in rows]
+        return rows, (keys[-1] if has_more else None)
+
+    def _quote(self, word: str) -> str:
+        """Quote a word for an FTS5 MATCH, so it can't be read as syntax."""
+        return '"' + word.replace('"', '""') + '"'
+
+    def _schema_missing(self) -> bool:
+        """Check sqlite_master for any table, index or trigger we'd create."""
+        expected = set(SQLModel.metadata.tables) | {
+            "course_search", "ix_course_name_nocase",
+            "course_search_insert", "course_search_delete", "course_search_update",
+        }
+
+        with self.engine.connect() as connection:
+            found = set(connection.execute(text("SELECT name FROM sqlite_master")).scalars())
+
+        return not expected <= found
+
+    def _create_search_index(self):
+        """Create the course_search trigram index and the triggers that keep it current."""
+        with self.engine.begin() as connection:
+            exists = connection.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE name = 'course_search'"
+            )).first()
+
+            for statement in (
+                "CREATE INDEX IF NOT EXISTS ix_course_name_nocase ON course (name COLLATE NOCASE, id)",
+                """CREATE VIRTUAL TABLE IF NOT EXISTS course_search USING fts5(
+                       name, section, content='course', content_rowid='id', tokenize='trigram')""",
+                """CREATE TRIGGER IF NOT EXISTS course_search_insert AFTER INSERT ON course BEGIN
+                       INSERT INTO course_search (rowid, name, section)
+                       VALUES (new.id, new.name, new.section);
+                   END""",
+                """CREATE TRIGGER IF NOT EXISTS course_search_delete AFTER DELETE ON course BEGIN
+                       INSERT INTO course_search (course_search, rowid, name, section)
+                       VALUES ('delete', old.id, old.name, old.section);
+                   END""",
+                """CREATE TRIGGER IF NOT EXISTS course_search_update AFTER UPDATE ON course BEGIN
+                       INSERT INTO course_search (course_search, rowid, name, section)
+                       VALUES ('delete', old.id, old.name, old.section);
+                       INSERT INTO course_search (rowid, name, section)
+                       VALUES (new.id, new.name, new.section);
+                   END""",
+            ):
+                connection.execute(text(statement))
+
+            # databases from before the index existed need it filled in
+            if not exists:
+                connection.execute(text(
+                    "INSERT INTO course_search (course_search) VALUES ('rebuild')"
+                ))
+
+    def _invalidate(self, model: SQLModel):
+        """Drop cached queries on a model after it was written to."""
+        if self.cache is not None:
+            self.cache.invalidate(model)
+
+    def _upsert_statement(self, table, keys: list = None):
+        """Build an INSERT ... ON CONFLICT DO UPDATE for a table."""
+        keys = keys or ["id"]
+        statement = sqlite_insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys],
+            set_={column.name: statement.excluded[column.name]
+                  for column in table.columns if column.name not in keys}
+        )
+
+    def _fingerprint(self, row: dict, columns: list) -> str:
+        """Hash the fields of a row, so a change in any of them changes the hash."""
+        values = repr(tuple(row[name] for name in columns))
+        return hashlib.blake2b(values.encode(), digest_size=16).hexdigest()
+
+    def _as_row(self, row, columns: list) -> dict:
+        """Turn a model instance or dict into a dict holding every column."""
+        if isinstance(row, SQLModel):
+            row = row.model_dump()
+        return {name: row.get(name) for name in columns}
+
     def needs_update(self, model: SQLModel, record_id: int, updates: dict) -> bool:
         """
         Check if a record in the database needs to be updated based on the provided information.
@@ -89,6 +482,7 @@ class SQLHandler:
             if result:
                 session.delete(result)
                 session.commit()
+                self._invalidate(model)
                 return True
         return False
 
@@ -100,10 +494,194 @@ class SQLHandler:
             dict: A dictionary with counts of courses and students.
         """
         with Session(self.engine) as session:
-            course_count = session.exec(select(Course)).all()
+            course_count = session.exec(select(func.count()).select_from(Course)).one()
             return {
-                "course_count": len(course_count),
+                "course_count": course_count,
                 }
+
+    def last_sync_id(self):
+        """
+        Get the id of the newest sync, so other processes can tell the data moved.
+
+        Returns:
+            int: The SyncRun id, or None if nothing was synced yet.
+        """
+        with Session(self.engine) as session:
+            return session.exec(select(func.max(SyncRun.id))).one()
+
+    def iter_courses(self, batch_size: int = 10000):
+        """
+        Yield every course as an (id, name, section) tuple, in id order, without building models.
+
+        Example Usage:
+            index = CourseIndex.build(handler.iter_courses())
+        """
+        with self.engine.connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(
+                text("SELECT id, name, section FROM course ORDER BY id")
+            )
+            for row in result:
+                yield tuple(row)
+
+    def courses_named(self, names, batch_size: int = 500) -> list:
+        """
+        Retrieve every course whose name is one of names, ignoring case.
+
+        Args:
+            names (iterable): Course names, e.g. "CS126".
+            batch_size (int, optional): Names looked up per statement.
+
+        Returns:
+            list: Course dicts, in name and id order within each batch.
+
+        Example Usage:
+            rows = handler.courses_named(["CS126", "cs249"])
+        """
+        names = list(names)
+        rows = []
+
+        # ix_course_name_nocase covers the lookup
+        with self.engine.connect() as connection:
+            for start in range(0, len(names), batch_size):
+                batch = names[start:start + batch_size]
+                params = {f"name_{i}": name for i, name in enumerate(batch)}
+                placeholders = ", ".join(f":{key}" for key in params)
+                rows.extend(dict(row._mapping) for row in connection.execute(text(f"""
+                    SELECT id, name, section FROM course
+                    WHERE name COLLATE NOCASE IN ({placeholders})
+                    ORDER BY name COLLATE NOCASE, id
+                """), params))
+
+        return rows
+
+    def subscriptions(self) -> list:
+        """
+        Retrieve every course subscription.
+
+        Returns:
+            list: (guild_id, channel_id, course) tuples.
+        """
+        with Session(self.engine) as session:
+            return [tuple(row) for row in session.execute(
+                select(Subscription.guild_id, Subscription.channel_id, Subscription.course)
+            )]
+
+    def add_subscription(self, guild_id: int, channel_id: int, course: str) -> bool:
+        """
+        Subscribe a channel to changes of a course.
+
+        Returns:
+            bool: True if the channel wasn't subscribed to it yet.
+
+        Example Usage:
+            handler.add_subscription(guild.id, channel.id, "CS126")
+        """
+        statement = sqlite_insert(Subscription.__table__).on_conflict_do_nothing()
+        with Session(self.engine) as session:
+            result = session.execute(statement, {"guild_id": guild_id, "channel_id": channel_id,
+                                                 "course": course})
+            session.commit()
+        return result.rowcount > 0
+
+    def remove_subscription(self, channel_id: int, course: str) -> bool:
+        """
+        Unsubscribe a channel from a course.
+
+        Returns:
+            bool: True if the channel was subscribed to it.
+        """
+        table = Subscription.__table__
+        with Session(self.engine) as session:
+            result = session.execute(delete(table).where(table.c.channel_id == channel_id,
+                                                         table.c.course == course))
+            session.commit()
+        return result.rowcount > 0
+
+    def guild_settings(self) -> list:
+        """
+        Retrieve the settings of every guild that changed one.
+
+        Returns:
+            list: GuildSettings rows as dicts.
+        """
+        table = GuildSettings.__table__
+        with self.engine.connect() as connection:
+            return [dict(row._mapping) for row in connection.execute(select(table))]
+
+    def update_guild_settings(self, guild_id: int, updates: dict) -> dict:
+        """
+        Change some of a guild's settings, None puts one back to its default.
+
+        A guild left with nothing but defaults loses its row.
+
+        Args:
+            guild_id (int): The guild.
+            updates (dict): Column name -> new value.
+
+        Returns:
+            dict: The guild's settings as stored now, every column included.
+
+        Example Usage:
+            settings = handler.update_guild_settings(guild.id, {"prefix": "!"})
+        """
+        table = GuildSettings.__table__
+        columns = [column.name for column in table.columns]
+
+        with Session(self.engine) as session:
+            stored = session.execute(select(table).where(table.c.guild_id == guild_id)).first()
+            row = dict(stored._mapping) if stored else {name: None for name in columns}
+            row.update(updates, guild_id=guild_id)
+
+            if all(row[name] is None for name in columns if name != "guild_id"):
+                session.execute(delete(table).where(table.c.guild_id == guild_id))
+            else:
+                session.execute(self._upsert_statement(table, ["guild_id"]), [row])
+            session.commit()
+
+        return row
+
+    def course_stats(self, top: int = 10) -> dict:
+        """
+        Retrieve course statistics, counted by SQLite instead of loading rows.
+
+        Args:
+            top (int, optional): How many names and sections to list.
+
+        Returns:
+            dict: Total courses, the most common names and sections as
+            (value, count) pairs, and the counts from the last sync.
+        """
+        with Session(self.engine) as session:
+            course_count = session.exec(select(func.count()).select_from(Course)).one()
+
+            by_name = session.exec(
+                select(Course.name, func.count().label("total"))
+                .group_by(Course.name)
+                .order_by(func.count().desc(), Course.name)
+                .limit(top)
+            ).all()
+
+            by_section = session.exec(
+                select(Course.section, func.count().label("total"))
+                .where(Course.section.is_not(None))
+                .group_by(Course.section)
+                .order_by(func.count().desc(), Course.section)
+                .limit(top)
+            ).all()
+
+            last_sync = session.exec(
+                select(SyncRun)
+                .where(SyncRun.table_name == Course.__tablename__)
+                .order_by(SyncRun.id.desc())
+                .limit(1)
+            ).first()
+
+            return {
+                "course_count": course_count,
+                "by_name": [tuple(row) for row in by_name],
+                "by_section": [tuple(row) for row in by_section],
+                "last_sync": last_sync.model_dump() if last_sync else None,
+            }
         
     def update(self, model: SQLModel, record_id: int, updates: dict) -> bool:
         """Update a record in the database."""
@@ -118,6 +696,7 @@ class SQLHandler:
                     setattr(record, key, value)
                 session.add(record)
                 session.commit()
+                self._invalidate(model)
                 return True
             
         return False
@@ -133,7 +712,15 @@ class SQLHandler:
         
         Returns:
             list[SQLModel]: A list of records that match the filters.
+            Cached results are shared, so treat them as read-only.
         """
+        if self.cache is not None:
+            cache_key = self.cache.key("retrieve", model, filters)
+            generation = self.cache.generation
+            hit, results = self.cache.get(cache_key)
+            if hit:
+                return list(results)
+
         with Session(self.engine) as session:
             # Start with a base query
             query = select(model)
@@ -146,7 +733,11 @@ class SQLHandler:
 
             # Execute the query and return results as a list
             results = session.exec(query).all()
-            return results
+
+        if self.cache is not None:
+            self.cache.put(cache_key, results, rows=len(results), generation=generation)
+
+        return list(results)
 
 # Course Table
 class Course(SQLModel, table=True):
@@ -154,6 +745,37 @@ class Course(SQLModel, table=True):
     name: str = Field(max_length=100, default=None )
     section: str = Field(max_length=3, default=None, nullable=True)
 
+# Fingerprint of every synced row, from the last sync
+class SyncFingerprint(SQLModel, table=True):
+    table_name: str = Field(primary_key=True)
+    id: int = Field(primary_key=True)
+    fingerprint: str
+
+# One completed sync and what it changed
+class SyncRun(SQLModel, table=True):
+    id: int = Field(default=None, primary_key=True)
+    table_name: str
+    finished_at: float
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+# What a guild changed from the defaults in config.py, None keeps the default
+class GuildSettings(SQLModel, table=True):
+    guild_id: int = Field(primary_key=True)
+    prefix: str = Field(max_length=5, default=None, nullable=True)
+    notify_channel: str = Field(max_length=100, default=None, nullable=True)
+    default_color: int = Field(default=None, nullable=True)
+    success_color: int = Field(default=None, nullable=True)
+    failure_color: int = Field(default=None, nullable=True)
+
+# A channel following changes to a course, by name
+class Subscription(SQLModel, table=True):
+    channel_id: int = Field(primary_key=True)
+    course: str = Field(primary_key=True, max_length=100)
+    guild_id: int
+
 def _main():
 
     # Initialize handler
@@ -0,0 +1,178 @@
+import time
+import asyncio
+import discord
+from classes.Metrics import SEND_SECONDS
+
+# Discord's limits for a single message
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+
+# Outbound dispatcher, one queue per channel
+class SendQueue():
+
+    def __init__(self, max_concurrency=5, typing=True, max_retries=3) -> None:
+        """
+        Args:
+            max_concurrency (int, optional): Channels sending at the same time.
+            typing (bool, optional): Show the typing indicator before each send.
+            max_retries (int, optional): Retries for a rate-limited send.
+        """
+        self.typing = typing
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore( max_concurrency )
+
+        self._queues = {}  # channel id -> asyncio.Queue
+        self._workers = {} # channel id -> worker task
+
+        # counters
+        self.sent = 0
+        self.messages = 0
+        self.failed = 0
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def enqueue(self, channel, embed) -> asyncio.Future:
+        """
+        Queue an embed for a channel and return right away.
+
+        Returns:
+            asyncio.Future: Resolves to the sent message once it goes out.
+
+        Example Usage:
+            queue.enqueue(msg.channel, embed)
+        """
+        queue = self._queues.get( channel.id )
+
+        # first embed for this channel, start its worker
+        if queue is None:
+            queue = self._queues[ channel.id ] = asyncio.Queue()
+            self._workers[ channel.id ] = asyncio.create_task( self._worker( channel, queue ) )
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback( self._report_failure )
+        queue.put_nowait( ( embed, future, time.perf_counter() ) )
+
+        return future
+
+    def depth(self) -> int:
+        """Number of embeds waiting to be sent."""
+        return sum( queue.qsize() for queue in self._queues.values() )
+
+    def stats(self) -> dict:
+        """
+        Get queue depth and send latency counters.
+
+        Returns:
+            dict: Counters, latencies in milliseconds.
+        """
+        return {
+            "depth": self.depth(),
+            "channels": len(self._queues),
+            "sent": self.sent,
+            "messages": self.messages,
+            "failed": self.failed,
+            "retries": self.retries,
+            "avg_latency_ms": self.total_latency / self.sent * 1000 if self.sent else 0.0,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+    async def close(self):
+        """Stop every worker, dropping anything still queued."""
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather( *self._workers.values(), return_exceptions=True )
+        self._queues.clear()
+        self._workers.clear()
+
+    async def _worker(self, channel, queue):
+
+        pending = None # pulled from the queue, but didn't fit in the last batch
+
+        while True:
+
+            # wait for work, then coalesce whatever else is already waiting
+            batch = [ pending if pending is not None else await queue.get() ]
+            chars = len( batch[0][0] )
+            pending = None
+
+            while len(batch) < MAX_EMBEDS and not queue.empty():
+                item = queue.get_nowait()
+                if chars + len( item[0] ) > MAX_EMBED_CHARS:
+                    pending = item
+                    break
+                batch.append( item )
+                chars += len( item[0] )
+
+            await self._send_batch( channel, batch )
+
+            # nothing left, let the channel go
+            if pending is None and queue.empty():
+                del self._queues[ channel.id ]
+                del self._workers[ channel.id ]
+                return
+
+    async def _send_batch(self, channel, batch):
+
+        embeds = [ embed for embed, _, _ in batch ]
+
+        for attempt in range( self.max_retries + 1 ):
+            try:
+                # only held while sending, a rate-limited channel waits without a slot
+                async with self._semaphore:
+                    message = await self._send( channel, embeds )
+                break
+
+            except Exception as error:
+
+                # give up on anything that isn't a rate limit, or once we run out of retries
+                retry_after = self._retry_after( error )
+                if retry_after is None or attempt == self.max_retries:
+                    self.failed += len(batch)
+                    for _, future, _ in batch:
+                        if not future.done():
+                            future.set_exception( error )
+                    return
+
+                self.retries += 1
+                await asyncio.sleep( retry_after )
+
+        # record latency from enqueue to delivery
+        now = time.perf_counter()
+        self.messages += 1
+        for _, future, queued_at in batch:
+            latency = now - queued_at
+            self.sent += 1
+            self.total_latency += latency
+            self.max_latency = max( self.max_latency, latency )
+            if not future.done():
+                future.set_result( message )
+
+    async def _send(self, channel, embeds):
+        if self.typing:
+            async with channel.typing():
+                with SEND_SECONDS.time():
+                    return await channel.send( embeds=embeds )
+        with SEND_SECONDS.time():
+            return await channel.send( embeds=embeds )
+
+    def _retry_after(self, error):
+        """Seconds to wait before retrying, or None if the error isn't a rate limit."""
+        if isinstance( error, discord.RateLimited ):
+            return error.retry_after
+
+        if getattr( error, "status", None ) != 429:
+            return None
+
+        # fall back to the header, then to a second
+        retry_after = getattr( error, "retry_after", None )
+        if retry_after is None:
+            headers = getattr( error.response, "headers", None ) or {}
+            retry_after = float( headers.get( "Retry-After", 1 ) )
+
+        return retry_after
+
+    def _report_failure(self, future):
+        # nobody has to await the future, so print failures instead of losing them
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Failed to send embed: {future.exception()}")
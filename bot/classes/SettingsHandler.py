@@ -0,0 +1,143 @@
+import time
+import asyncio
+import discord
+
+# embed color name -> GuildSettings column
+COLOR_COLUMNS = {
+    "DEFAULT": "default_color",
+    "SUCCESS": "success_color",
+    "FAILURE": "failure_color",
+}
+
+# Per-guild settings, kept in SQLite and read from memory
+class SettingsHandler():
+
+    def __init__(self) -> None:
+        # only guilds that changed something are in here, the rest use config.py
+        self.guild_settings = {}  # guild id -> stored GuildSettings row
+        self.guild_prefixes = {}  # guild id -> prefix, what on_message checks
+        self._guild_colors = {}   # guild id -> color name -> discord.Colour
+
+        self._settings_loaded = False
+        self._settings_lock = asyncio.Lock()
+        self._settings_task = None
+
+    async def load_guild_settings(self):
+        """Read every guild's settings into memory, the first time only."""
+        async with self._settings_lock:
+            if self._settings_loaded:
+                return
+
+            for row in await self.run_sql( "guild_settings" ):
+                self._cache_guild_settings( row )
+            self._settings_loaded = True
+
+    def start_settings_load(self):
+        """Load settings without holding up on_ready, guilds use the defaults until they arrive."""
+
+        # on_ready can fire again, and a load that failed is tried again
+        if not self._settings_loaded and ( self._settings_task is None or self._settings_task.done() ):
+            self._settings_task = asyncio.create_task( self._load_settings_in_background() )
+
+        return self._settings_task
+
+    async def update_settings(self, guild_id, **updates) -> dict:
+        """
+        Change a guild's settings, in the database first and then in memory.
+
+        The cache is only touched once the write went through, so it never
+        holds something the database doesn't.
+
+        Args:
+            guild_id (int): The guild.
+            **updates: GuildSettings column -> value, None for the default.
+
+        Returns:
+            dict: The guild's settings as stored now.
+
+        Example Usage:
+            await self.update_settings(guild.id, prefix="!")
+        """
+        await self.load_guild_settings()
+        row = await self.update_guild_settings( guild_id, updates )
+        self._cache_guild_settings( row )
+        return row
+
+    def prefix_for(self, guild) -> str:
+        """The prefix commands use in a guild, a dict lookup."""
+        if guild is None:
+            return self.prefix
+        return self.guild_prefixes.get( guild.id, self.prefix )
+
+    def settings_for(self, guild) -> dict:
+        """The settings a guild changed, empty if none."""
+        if guild is None:
+            return {}
+        return self.guild_settings.get( guild.id, {} )
+
+    def embed_style(self, guild, template):
+        """
+        Get the color and destination channel of an embed in a guild.
+
+        Returns:
+            tuple: (discord.Colour, channel name)
+        """
+        settings = self.guild_settings.get( guild.id ) if guild is not None else None
+        if settings is None:
+            return template.color, template.channel_name
+
+        color = self._guild_colors[ guild.id ].get( template.color_name, template.color )
+
+        # notifications, and embeds that go to a named channel, go to the guild's own if it picked one
+        channel_name = template.channel_name
+        if settings["notify_channel"] and ( channel_name or template.notify ):
+            channel_name = settings["notify_channel"]
+
+        return color, channel_name
+
+    def notify_channel_for(self, guild_id):
+        """
+        The channel a guild picked for notifications.
+
+        Returns:
+            discord.abc.GuildChannel: The channel, or None if the guild didn't pick one or
+            it isn't in this process, e.g. on another shard.
+        """
+        name = self.guild_settings.get( guild_id, {} ).get( "notify_channel" )
+        custom_guild = self.custom_guilds.get( guild_id ) if name else None
+        return custom_guild.get_channel_obj( name ) if custom_guild is not None else None
+
+    def _cache_guild_settings(self, row):
+        guild_id = row["guild_id"]
+
+        # back to every default, forget the guild
+        if all( value is None for key, value in row.items() if key != "guild_id" ):
+            self.guild_settings.pop( guild_id, None )
+            self.guild_prefixes.pop( guild_id, None )
+            self._guild_colors.pop( guild_id, None )
+
+        else:
+            self.guild_settings[ guild_id ] = row
+            self._guild_colors[ guild_id ] = { name: discord.Colour( row[column] )
+                                               for name, column in COLOR_COLUMNS.items()
+                                               if row[column] is not None }
+            if row["prefix"] is not None:
+                self.guild_prefixes[ guild_id ] = row["prefix"]
+            else:
+                self.guild_prefixes.pop( guild_id, None )
+
+        self._on_settings_changed( guild_id )
+
+    async def _load_settings_in_background(self):
+        start = time.perf_counter()
+        try:
+            await self.load_guild_settings()
+            print(f"Loaded settings for {len(self.guild_settings)} guilds in {time.perf_counter() - start:.2f}s")
+
+        # the defaults still work, .config tries again when it's used
+        except Exception as e:
+            print(f"Loading guild settings failed: {e}")
+
+    def _on_settings_changed(self, guild_id):
+        """Hook for anything worked out from a guild's settings."""
+        pass
@@ -0,0 +1,218 @@
+import asyncio
+import string
+import config as cfg
+from classes.RateLimiter import RateLimiter
+
+# SQLite's NOCASE only folds ASCII, str.upper would fold more and miss rows
+_ASCII_UPPER = str.maketrans( string.ascii_lowercase, string.ascii_uppercase )
+
+# Course change notifications, fanned out to the channels that follow a course
+class SubscriptionHandler():
+
+    def __init__(self) -> None:
+        self.subscribers = {}           # course -> {channel id: guild id}, the inverted index
+        self.channel_subscriptions = {} # channel id -> set of courses
+        self.notify_stats = { "runs": 0, "channels": 0, "embeds": 0 }
+
+        self._subscriptions_loaded = False
+        self._subscriptions_lock = asyncio.Lock()
+        self._notify_task = None
+
+        # paces channels, the send queue batches and retries within each one
+        self._notify_limiter = RateLimiter( *cfg.notify_rate_limit )
+
+    @staticmethod
+    def course_key(name) -> str:
+        """How a course name is stored and matched, e.g. " cs126 " -> "CS126"."""
+        return ( name or "" ).strip().translate( _ASCII_UPPER )
+
+    async def load_subscriptions(self, reload=False):
+        """
+        Read every subscription into the inverted index.
+
+        Args:
+            reload (bool): Rebuild it even if it was read already, to pick up
+                subscriptions made by other processes.
+        """
+        async with self._subscriptions_lock:
+            await self._read_subscriptions( reload )
+
+    async def follow_course(self, guild_id, channel_id, course) -> bool:
+        """
+        Subscribe a channel to a course, in the database and the index.
+
+        Returns:
+            bool: True if the channel wasn't following it yet.
+        """
+        # under the lock, a reload reading the table mid-write would undo it
+        async with self._subscriptions_lock:
+            await self._read_subscriptions()
+            added = await self.run_sql( "add_subscription", guild_id, channel_id, course )
+            self._index_subscription( guild_id, channel_id, course )
+            return added
+
+    async def unfollow_course(self, channel_id, course) -> bool:
+        """
+        Unsubscribe a channel from a course, in the database and the index.
+
+        Returns:
+            bool: True if the channel was following it.
+        """
+        async with self._subscriptions_lock:
+            await self._read_subscriptions()
+            removed = await self.run_sql( "remove_subscription", channel_id, course )
+
+            channels = self.subscribers.get( course, {} )
+            channels.pop( channel_id, None )
+            if not channels:
+                self.subscribers.pop( course, None )
+
+            courses = self.channel_subscriptions.get( channel_id, set() )
+            courses.discard( course )
+            if not courses:
+                self.channel_subscriptions.pop( channel_id, None )
+
+            return removed
+
+    def schedule_notifications(self, diff):
+        """Notify subscribers of a sync in the background, so nobody waiting on the update waits on this too."""
+        self._notify_task = asyncio.create_task( self._notify_in_background( diff ) )
+        return self._notify_task
+
+    async def notify_subscribers(self, diff) -> int:
+        """
+        Tell every subscribed channel which of its courses a sync added, changed or removed.
+
+        The changes are worked out once for the whole sync, then grouped by
+        channel, so a channel following many courses gets one digest and a
+        course with many followers costs one lookup.
+
+        Args:
+            diff (dict): The result of CatalogPipeline.run.
+
+        Returns:
+            int: Embeds handed to the send queue.
+        """
+        if not cfg.notify_subscribers or diff.get( "status" ) != "changed":
+            return 0
+
+        # the first sync adds the whole catalog, that isn't news to anyone
+        if not ( diff["changed"] or diff["removed"] or diff["unchanged"] ):
+            return 0
+
+        # other shards and processes subscribe too, the database has all of them
+        await self.load_subscriptions( reload=True )
+        if not self.subscribers:
+            return 0
+
+        changes = await self.course_changes( diff )
+
+        # channel id -> (guild id, lines), each course's lines are formatted once
+        subscribed = {}
+        for course, lines in changes.items():
+            for channel_id, guild_id in self.subscribers.get( course, {} ).items():
+                subscribed.setdefault( channel_id, ( guild_id, [] ) )[1].extend( lines )
+
+        # destination id -> (channel, lines), a guild that picked a notification channel
+        # gets every digest there, a course followed from several channels listed once
+        channels = {}
+        for channel_id, ( guild_id, lines ) in subscribed.items():
+            channel = self._notify_channel_for( guild_id )
+
+            # no cache lookup, so a channel on another shard or process works too
+            if channel is None:
+                channel = self.client.get_partial_messageable( channel_id, guild_id=guild_id )
+
+            channels.setdefault( channel.id, ( channel, {} ) )[1].update( dict.fromkeys( lines ) )
+
+        embeds = 0
+        for channel, lines in channels.values():
+            lines = list( lines )
+
+            # wait for a token instead of bursting into Discord's global limit
+            while not self._notify_limiter.allow( "notify" ):
+                await asyncio.sleep( 1 / self._notify_limiter.rate )
+
+            for start in range( 0, len(lines), cfg.notify_lines_per_embed ):
+                embed = await self.get_embed("course-changes",
+                                             changes="\n".join( lines[ start:start + cfg.notify_lines_per_embed ] ))
+                await self._deliver( channel, embed )
+                embeds += 1
+
+        self.notify_stats["runs"] += 1
+        self.notify_stats["channels"] += len(channels)
+        self.notify_stats["embeds"] += embeds
+        return embeds
+
+    async def course_changes(self, diff) -> dict:
+        """
+        Find what a sync did to the courses someone follows.
+
+        Returns:
+            dict: course -> formatted lines, only for courses with subscribers.
+        """
+        kinds = dict.fromkeys( diff["added"], "added" )
+        kinds.update( dict.fromkeys( diff["changed"], "changed" ) )
+
+        # one query for every followed name, not one per subscriber
+        changes = {}
+        for row in await self.courses_named( list( self.subscribers ) ):
+            kind = kinds.get( row["id"] )
+            if kind is not None:
+                changes.setdefault( self.course_key( row["name"] ), [] ).append( self._format_change( kind, row ) )
+
+        # removed rows are gone from the database, the sync kept them
+        for row in diff.get( "removed_rows", () ):
+            course = self.course_key( row["name"] )
+            if course in self.subscribers:
+                changes.setdefault( course, [] ).append( self._format_change( "removed", row ) )
+
+        return changes
+
+    def subscription_count(self) -> int:
+        """Number of (channel, course) subscriptions held in the index."""
+        return sum( len(courses) for courses in self.channel_subscriptions.values() )
+
+    def _notify_channel_for(self, guild_id):
+        """Hook for a guild's own notification channel, None to post where they subscribed."""
+        return None
+
+    async def _notify_in_background(self, diff):
+        try:
+            embeds = await self.notify_subscribers( diff )
+            if embeds:
+                print(f"Queued {embeds} course change notifications")
+
+        # the sync already landed, a failed notification shouldn't look like a failed update
+        except Exception as e:
+            print(f"Course change notifications failed: {e}")
+
+    async def _deliver(self, channel, embed):
+        if self.sendQueue is not None:
+            return self.sendQueue.enqueue( channel, embed )
+
+        try:
+            return await channel.send( embed=embed )
+        except Exception as e:
+            print(f"Failed to send embed: {e}")
+
+    async def _read_subscriptions(self, reload=False):
+        # callers hold _subscriptions_lock
+        if self._subscriptions_loaded and not reload:
+            return
+
+        rows = await self.run_sql( "subscriptions" )
+
+        # nothing awaits between the reset and the refill, readers never see half an index
+        self.subscribers, self.channel_subscriptions = {}, {}
+        for guild_id, channel_id, course in rows:
+            self._index_subscription( guild_id, channel_id, course )
+        self._subscriptions_loaded = True
+
+    def _index_subscription(self, guild_id, channel_id, course):
+        self.subscribers.setdefault( course, {} )[ channel_id ] = guild_id
+        self.channel_subscriptions.setdefault( channel_id, set() ).add( course )
+
+    def _format_change(self, kind, row):
+        section = f" - section {row['section']}" if row["section"] else ""
+        return f"**{row['name']}**{section} (`{row['id']}`) {kind}"
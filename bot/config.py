@@ -8,6 +8,31 @@ json_file = "json/embeds.json"
 # path to the database
 db_path = "database/NAUCourses.db"
 
+# wipe the database every start, otherwise it persists across restarts
+db_reset_on_start = False
+
+# SQLite engine profiles, pick one with db_profile
+db_profiles = {
+    # SQLite's own settings
+    "default": {},
+
+    # readers don't wait on the sync writer, fewer fsyncs, bigger caches
+    "wal": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",  # safe with WAL, only the last commits can be lost on power loss
+            "cache_size": -64000,     # KiB, so 64 MB
+            "mmap_size": 268435456,   # 256 MB
+            "temp_store": "MEMORY",
+            "busy_timeout": 5000,     # ms to wait on a locked database
+        },
+        "pool_size": 5,               # connections kept open
+        "statement_cache": 256,       # prepared statements per connection
+        "compiled_cache": 1000,       # SQL strings SQLAlchemy keeps compiled
+    },
+}
+db_profile = "wal"
+
 # strings
 name="MediumBot"
 prefix="."
@@ -21,5 +46,73 @@ error_color   = 0xF95C52 # hex
 admin_list=[owner]
 staff_list=admin_list + []
 
+# startup
+fast_start     = True # connect first, the ORM and database load on first use
+startup_budget = 5.0  # seconds from launch to on_ready before a warning is printed
+
+# guilds validated per batch after on_ready, before messages get a turn
+guild_validation_batch = 200
+
 # how often the bot updates (in hours)
 HOURS_UPDATE = 12
+
+# where the course catalog comes from, an http(s) URL or a local CSV
+# with id, name and section columns
+catalog_source     = "fixtures/courses.csv"
+catalog_batch_size = 1000 # rows written per statement
+catalog_cache_dir  = "database/catalog_cache" # last response, ETag, Last-Modified and hash
+catalog_max_removed = 0.5 # share of the stored courses one update may remove, None for no limit
+update_progress_interval = 10 # seconds between progress embeds during an update
+
+# rate limits as (tokens per second, burst)
+user_rate_limit    = (0.5, 5)  # per user
+guild_rate_limit   = (5, 20)   # per guild
+command_rate_limit = (2, 10)   # per command, per guild
+
+# most buckets each rate limiter keeps in memory
+rate_limit_max_buckets = 10000
+
+# outbound sends
+send_queue           = True # queue embeds per channel instead of sending inline
+send_max_concurrency = 5    # channels sending at the same time
+send_typing          = True # show the typing indicator before sending
+
+# course search
+search_page_size = 10 # courses per embed
+search_max_pages = 3  # embeds per search
+
+# query cache for course lookups
+query_cache_ttl         = 3600  # seconds an entry stays fresh
+query_cache_max_rows    = 50000 # rows held across all entries, caps memory
+query_cache_max_entries = 5000  # queries held
+
+# keep a read-only copy of the course table in memory, .course searches use it
+# instead of SQLite (roughly 50 MB per million courses)
+course_replica = True
+
+# course change notifications, from .subscribe
+notify_subscribers        = True
+notify_rate_limit         = (20, 40) # channels notified per second and burst, under Discord's 50 requests a second
+notify_lines_per_embed    = 20       # changed courses listed per embed
+subscribe_max_per_channel = 25       # courses one channel can follow
+
+# guilds listed by .guilds
+guild_report_max = 20
+
+# names and sections listed by .stats
+stats_top = 5
+
+# sharding
+#   "single"    - one connection, one process
+#   "auto"      - discord.py picks the shard count, all shards in this process
+#   "processes" - shard_count shards split across shard_processes processes
+shard_mode            = "single"
+shard_count           = 4
+shard_processes       = 2
+shard_refresh_minutes = 5 # how often non-updating processes check for a new sync
+
+# metrics
+metrics_enabled   = False # record latency histograms, costs two clock reads per timed call
+metrics_port      = None  # serve http://0.0.0.0:<port>/metrics in the Prometheus text format, None to turn off
+                          # (with shard_mode "processes" each process adds its first shard id)
+metrics_dump_file = "database/metrics.prom" # where .metrics dump writes
@@ -1,5 +1,12 @@
+import time
+started = time.perf_counter() # before anything heavy is imported
+
 import bot
+import config as cfg
 
 if __name__ == '__main__':
     #run the bot
-    bot.run_discord_bot()
+    if cfg.shard_mode == "processes":
+        bot.run_sharded()
+    else:
+        bot.run_discord_bot( started=started )
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import tempfile
+
+# let the script import the bot's classes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot"))
+
+from classes.SQLHandler import SQLHandler, Course
+
+def make_courses(count, suffix=""):
+    """
+    Build a list of fake course sections.
+
+    Args:
+        count (int): Number of courses to build.
+        suffix (str, optional): Added to every name so a second pass counts as an update.
+
+    Returns:
+        list[dict]: Rows ready to be written.
+    """
+    return [
+        {"id": i, "name": f"CS{i % 500:03d}{suffix}", "section": f"{i % 1000:03d}"}
+        for i in range(count)
+    ]
+
+def per_row(handler, rows):
+    """The old path: insert, then needs_update + update for every row."""
+    for row in rows:
+        if not handler.insert(Course(**row)):
+            updates = {"name": row["name"], "section": row["section"]}
+            if handler.needs_update(Course, record_id=row["id"], updates=updates):
+                handler.update(Course, record_id=row["id"], updates=updates)
+
+def bulk(handler, rows):
+    """The new path: one transaction, batched upserts."""
+    handler.bulk_upsert(Course, rows)
+
+def timed(func, handler, rows):
+    start = time.perf_counter()
+    func(handler, rows)
+    return time.perf_counter() - start
+
+def bench(count, include_per_row=True):
+
+    # fresh database for every run
+    for name, func in (("per-row", per_row), ("bulk_upsert", bulk)):
+
+        if name == "per-row" and not include_per_row:
+            continue
+
+        with tempfile.TemporaryDirectory() as folder:
+            handler = SQLHandler(os.path.join(folder, "bench.db"), dbg=True)
+
+            first  = timed(func, handler, make_courses(count))
+            second = timed(func, handler, make_courses(count, suffix="L"))
+            third  = timed(func, handler, make_courses(count, suffix="L"))
+
+            print(f"{count:>7} rows | {name:<11} | "
+                  f"insert {first:8.2f}s | update {second:8.2f}s | unchanged {third:8.2f}s")
+
+            handler.engine.dispose()
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_bulk_upsert.py [sizes...] [--skip-per-row]
+    sizes = [int(arg) for arg in sys.argv[1:] if arg.isdigit()] or [10_000, 100_000]
+    include_per_row = "--skip-per-row" not in sys.argv
+
+    for size in sizes:
+        bench(size, include_per_row)
@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+
+# let the script import the bot's classes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot"))
+
+from classes.SQLHandler import SQLHandler, Course
+from classes.CourseIndex import CourseIndex
+
+DEPARTMENTS = ["CS", "MAT", "PHY", "ENG", "BIO", "CHM", "HIS", "PSY", "ECO", "ART"]
+
+def make_rows(count):
+    """A catalog shaped like the real one: a few thousand names, each with many sections."""
+    random.seed(count)
+    for i in range(1, count + 1):
+        name = f"{random.choice(DEPARTMENTS)}{random.randint(100, 499)}{random.choice(['', 'L', 'H'])}"
+        yield i, name, f"{random.randint(1, 30):03d}"
+
+def allocated(build):
+    """Bytes still held by what build returns."""
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    held = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return kept, held
+
+def bench_memory(count):
+
+    index, index_bytes = allocated(lambda: CourseIndex.build(make_rows(count)))
+    del index
+
+    models, model_bytes = allocated(lambda: [Course(id=i, name=name, section=section)
+                                             for i, name, section in make_rows(count)])
+    del models
+
+    print(f"{count:>9} rows | CourseIndex {index_bytes / 2**20:8.1f} MB | "
+          f"Course models {model_bytes / 2**20:8.1f} MB | {model_bytes / index_bytes:4.1f}x smaller")
+
+def bench_lookups(count, number=2_000):
+
+    with tempfile.TemporaryDirectory() as folder:
+
+        handler = SQLHandler(os.path.join(folder, "index.db"), dbg=True, profile={})
+        handler.sync(Course, ({"id": i, "name": name, "section": section}
+                              for i, name, section in make_rows(count)))
+
+        start = time.perf_counter()
+        index = CourseIndex.build(handler.iter_courses(), handler.last_sync_id())
+        print(f"{count:>9} rows | built from SQLite in {time.perf_counter() - start:.2f}s")
+
+        queries = ["cs1", "MAT2", "phy3 012", "c", "bi", "eng499h"]
+
+        for name, search in (("SQLite", handler.search_courses), ("CourseIndex", index.search)):
+            start = time.perf_counter()
+            for i in range(number):
+                search(queries[i % len(queries)], limit=10)
+            elapsed = time.perf_counter() - start
+            print(f"{'':>9}      | {name:<11} {number / elapsed:9.0f} searches/s")
+
+        # the first search for a word runs on the event loop uncached, broad words go to SQLite
+        worst, sent = 0.0, 0
+        for query in queries + ["mat", "mat 01", "cs1 012", "001"]:
+            index._words.clear()
+            index._row_lists.clear()
+            start = time.perf_counter()
+            sent += index.search(query, limit=10) is None
+            worst = max(worst, time.perf_counter() - start)
+        print(f"{'':>9}      | slowest cold search {worst * 1000:.1f} ms on the loop, "
+              f"{sent} of {len(queries) + 4} left to SQLite")
+
+        handler.engine.dispose()
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_course_index.py [sizes...]
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+
+    for size in sizes:
+        bench_memory(size)
+
+    bench_lookups(min(sizes))
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import random
+import tempfile
+
+# let the script import the bot's classes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot"))
+
+from classes.SQLHandler import SQLHandler, Course
+
+SUBJECTS = ["CS", "MAT", "PHY", "CHM", "BIO", "ENG", "HIS", "EE", "ME", "STA"]
+
+def make_courses(count):
+    """Build fake course sections spread over a few subjects."""
+    return [
+        {"id": i, "name": f"{SUBJECTS[i % len(SUBJECTS)]}{100 + (i // 10) % 400}{'L' if i % 3 == 0 else ''}",
+         "section": f"{i % 50:03d}"}
+        for i in range(count)
+    ]
+
+def bench(count, searches=2_000):
+
+    with tempfile.TemporaryDirectory() as folder:
+        handler = SQLHandler(os.path.join(folder, "bench.db"), dbg=True)
+
+        start = time.perf_counter()
+        handler.sync(Course, make_courses(count))
+        print(f"{count} rows loaded and indexed in {time.perf_counter() - start:.2f}s")
+
+        queries = {
+            "substring": [f"{random.choice(SUBJECTS)}{random.randint(100, 499)}" for _ in range(searches)],
+            "prefix":    [random.choice(SUBJECTS)[:2] for _ in range(searches)],
+            "fuzzy":     [f"{random.choice(SUBJECTS)}{random.randint(100, 499)}x" for _ in range(searches)],
+        }
+
+        for mode, words in queries.items():
+
+            # first page, then follow the key to the second
+            timings = []
+            for word in words:
+                start = time.perf_counter()
+                _, key = handler.search_courses(word)
+                if key:
+                    handler.search_courses(word, after=key)
+                timings.append(time.perf_counter() - start)
+
+            timings.sort()
+            print(f"  {mode:<9} | p50 {timings[len(timings) // 2] * 1000:6.3f} ms | "
+                  f"p99 {timings[int(len(timings) * 0.99)] * 1000:6.3f} ms  (two pages)")
+
+        handler.engine.dispose()
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_course_search.py [rows...]
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000]
+
+    for size in sizes:
+        bench(size)
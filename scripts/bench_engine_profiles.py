@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import random
+import tempfile
+import threading
+
+# let the script import the bot's classes, profiles live in config
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot")
+sys.path.insert(0, BOT_DIR)
+
+import config as cfg
+from classes.SQLHandler import SQLHandler, Course
+
+def writes(handler, count, start_id):
+    """Single-row writes, one transaction each, like the old sync path."""
+    for i in range(start_id, start_id + count):
+        handler.insert(Course(id=i, name=f"CS{i % 500:03d}", section=f"{i % 10:03d}"))
+
+def reads(handler, count, max_id, stop=None):
+    """Lookups by id, stops early if told to."""
+    done = 0
+    for _ in range(count):
+        if stop is not None and stop.is_set():
+            break
+        handler.retrieve(Course, {"id": random.randrange(max_id)})
+        done += 1
+    return done
+
+def bench(name, profile, rows=5_000, operations=5_000, readers=4):
+
+    with tempfile.TemporaryDirectory() as folder:
+
+        # no query cache, we want to hit SQLite
+        handler = SQLHandler(os.path.join(folder, "bench.db"), dbg=True, profile=profile)
+        handler.bulk_upsert(Course, ({"id": i, "name": f"CS{i % 500:03d}", "section": None}
+                                     for i in range(rows)))
+
+        start = time.perf_counter()
+        writes(handler, operations // 5, rows)
+        write_rate = operations // 5 / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        reads(handler, operations, rows)
+        read_rate = operations / (time.perf_counter() - start)
+
+        # readers alongside a writer, count what the readers got through
+        stop = threading.Event()
+        counts = []
+        threads = [threading.Thread(target=lambda: counts.append(reads(handler, 10**9, rows, stop)))
+                   for _ in range(readers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        writes(handler, operations // 5, rows + operations)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        mixed_rate = sum(counts) / (time.perf_counter() - start)
+
+        print(f"{name:<8} | writes {write_rate:8.0f}/s | reads {read_rate:8.0f}/s | "
+              f"reads during writes ({readers} threads) {mixed_rate:8.0f}/s")
+
+        handler.engine.dispose()
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_engine_profiles.py [profile names...]
+    names = sys.argv[1:] or list(cfg.db_profiles)
+
+    for name in names:
+        bench(name, cfg.db_profiles[name])
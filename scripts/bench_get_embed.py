@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import asyncio
+import datetime
+
+# let the script import the bot's classes, json paths are relative to bot/
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot")
+sys.path.insert(0, BOT_DIR)
+os.chdir(BOT_DIR)
+
+from classes.EmbedHandler import EmbedHandler
+
+async def old_get_embed(handler, key, **kwargs):
+    """The old path: look the raw json up and format it on every call."""
+    data = handler.messages.get(key)
+    return EmbedHandler.CustomEmbed(
+        title=data.get("title").format(**kwargs),
+        description=data.get("description").format(**kwargs),
+        color=handler._color_map[(data.get("color"))],
+        channel_name=data.get("channel"),
+        timestamp=datetime.datetime.now(tz=datetime.timezone.utc),
+        guildHandler=handler.guildHandler
+    )
+
+async def new_get_embed(handler, key, **kwargs):
+    """The new path: compiled templates."""
+    return await handler.get_embed(key, **kwargs)
+
+async def bench(renders):
+
+    handler = EmbedHandler()
+
+    # a mix of static and formatted templates
+    calls = [
+        ("hello", {"prefix": "."}),
+        ("invalid-command", {"prefix": "."}),
+        ("bot-not-ready", {"mention": "<@1>"}),
+        ("help", {"desc": "**.hello**: Test me to say hello!\n" * 5}),
+        ("bot-start", {}),
+    ]
+
+    for name, func in (("before", old_get_embed), ("after", new_get_embed)):
+        start = time.perf_counter()
+        for i in range(renders):
+            key, kwargs = calls[i % len(calls)]
+            await func(handler, key, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:<6} | {renders} renders | {renders / elapsed:10.0f} renders/s")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_get_embed.py [renders]
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+
+    asyncio.run(bench(renders))
@@ -0,0 +1,44 @@
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+# let the script import the bot's classes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot"))
+
+from classes.GuildHandler import GuildHandler
+
+def make_guilds(count):
+    """Build fake guilds with just enough attributes for GuildHandler."""
+    return [SimpleNamespace(id=i, channels=[], roles=[]) for i in range(count)]
+
+def list_lookup(custom_guilds, guild):
+    """The old path: scan a list of custom guilds."""
+    for custom_guild in custom_guilds:
+        if guild.id == custom_guild.id:
+            return custom_guild
+    return None
+
+def bench(count, number=10_000):
+
+    guilds  = make_guilds(count)
+    handler = GuildHandler()
+    handler.initialize_guilds(SimpleNamespace(guilds=guilds))
+
+    # worst case for the scan, the last guild we added
+    guild = guilds[-1]
+    as_list = list(handler.custom_guilds.values())
+
+    scan = timeit.timeit(lambda: list_lookup(as_list, guild), number=number)
+    keyed = timeit.timeit(lambda: handler.get_custom_guild(guild), number=number)
+
+    print(f"{count:>6} guilds | list scan {scan / number * 1e6:9.2f} us | "
+          f"dict lookup {keyed / number * 1e6:6.2f} us")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_guild_lookup.py [sizes...]
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000]
+
+    for size in sizes:
+        bench(size)
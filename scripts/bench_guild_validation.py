@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import random
+import asyncio
+
+# let the script import the bot's classes
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, "..", "bot"))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from fake_discord import FakeClient, FakeGuild
+from classes.GuildHandler import GuildHandler
+
+def make_guilds(count, channels=40, roles=20, missing=0.1):
+    """Guilds with a realistic number of channels and roles, some without #general."""
+    random.seed(count)
+    guilds = []
+    for i in range(count):
+        names = [f"channel-{j}" for j in range(channels - 1)]
+        if random.random() >= missing:
+            names.append("general")
+        guilds.append(FakeGuild(name=f"guild-{i}", channels=names,
+                                roles=["@everyone"] + [f"role-{j}" for j in range(roles - 1)]))
+    return guilds
+
+async def longest_stall(job):
+    """Run job while a ticker measures the longest time the event loop was held."""
+    gaps = []
+    done = False
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    result = await job
+    done = True
+    await task
+    return result, max(gaps)
+
+async def bench(count, batch_size=200):
+
+    client = FakeClient(make_guilds(count))
+    handler = GuildHandler(["general"], [])
+
+    # what on_ready waits on
+    start = time.perf_counter()
+    handler.initialize_guilds(client)
+    ready = time.perf_counter() - start
+
+    # validating inline in on_ready holds the loop for all of it
+    serial = GuildHandler(["general"], [])
+    serial.initialize_guilds(client)
+    start = time.perf_counter()
+    for custom_guild in serial.custom_guilds.values():
+        custom_guild.validate()
+    inline = time.perf_counter() - start
+
+    # the background job, in batches
+    start = time.perf_counter()
+    summary, stall = await longest_stall(handler.validate_guilds(batch_size))
+    background = time.perf_counter() - start
+
+    # a second pass only reads the cached reports
+    start = time.perf_counter()
+    await handler.validate_guilds(batch_size)
+    cached = time.perf_counter() - start
+
+    # a required channel deleted, the one guild it happened in is checked again
+    guild = client.guilds[0]
+    guild.channels = [channel for channel in guild.channels if channel.name != "general"]
+    start = time.perf_counter()
+    handler.refresh_channels(guild, "general")
+    event = time.perf_counter() - start
+    assert not handler.get_custom_guild(guild).report["valid"]
+
+    print(f"{count:>6} guilds | on_ready {ready * 1000:7.1f} ms | inline check {inline * 1000:7.1f} ms | "
+          f"background {background * 1000:7.1f} ms, longest stall {stall * 1000:5.1f} ms | "
+          f"cached pass {cached * 1000:6.1f} ms | event {event * 1e6:5.1f} us | "
+          f"{summary['invalid']} invalid")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_guild_validation.py [sizes...]
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 5_000, 20_000]
+
+    for size in sizes:
+        asyncio.run(bench(size))
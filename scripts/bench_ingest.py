@@ -0,0 +1,54 @@
+import os
+import sys
+import csv
+import time
+import resource
+import tempfile
+
+# let the script import the bot's classes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot"))
+
+from classes.SQLHandler import SQLHandler
+from classes.CatalogPipeline import CatalogPipeline
+
+def write_feed(path, count):
+    """Write a synthetic catalog, with every thousandth row broken."""
+    with open(path, "w", newline="", encoding="utf-8") as feed:
+        writer = csv.writer(feed)
+        writer.writerow(["id", "name", "section"])
+        for i in range(1, count + 1):
+            section = "BAD!" if i % 1000 == 0 else f"{i % 40:03d}"
+            writer.writerow([i, f"CS{i % 700:03d}", section])
+
+def bench(count):
+
+    with tempfile.TemporaryDirectory() as folder:
+        feed = os.path.join(folder, "catalog.csv")
+        write_feed(feed, count)
+        print(f"{count} row feed, {os.path.getsize(feed) / 1024 / 1024:.1f} MiB on disk")
+
+        handler = SQLHandler(os.path.join(folder, "bench.db"), dbg=True)
+
+        for run in ("first load", "no changes"):
+            pipeline = CatalogPipeline(feed, progress=lambda read: None)
+
+            start = time.perf_counter()
+            diff = pipeline.run(handler)
+            elapsed = time.perf_counter() - start
+
+            # peak resident memory of the whole process so far, in KiB on Linux
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            print(f"  {run:<10} | {count / elapsed:9.0f} rows/s | {elapsed:6.2f}s | "
+                  f"peak RSS {peak / 1024:7.1f} MiB | added {len(diff['added'])} "
+                  f"unchanged {diff['unchanged']} rejected {diff['rejected']}")
+
+        handler.engine.dispose()
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_ingest.py [rows...]
+    sizes = [int(arg) for arg in sys.argv[1:]] or [500_000]
+
+    for size in sizes:
+        bench(size)
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+import asyncio
+
+# let the script import the bot's classes, json paths are relative to bot/
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot")
+sys.path.insert(0, BOT_DIR)
+os.chdir(BOT_DIR)
+
+from classes.EmbedHandler import EmbedHandler
+from classes.Metrics import registry, EMBED_SECONDS
+
+async def bench(renders):
+
+    handler = EmbedHandler()
+
+    # the timer alone, against an empty block
+    for enabled in (False, True):
+        registry.enabled = enabled
+        start = time.perf_counter()
+        for _ in range(renders):
+            with EMBED_SECONDS.time("bench"):
+                pass
+        elapsed = time.perf_counter() - start
+        print(f"timer only, metrics {'on ' if enabled else 'off'} | {elapsed / renders * 1e9:6.0f} ns/call")
+
+    # a real render with the timer inside
+    for enabled in (False, True):
+        registry.enabled = enabled
+        start = time.perf_counter()
+        for _ in range(renders):
+            await handler.get_embed("hello", prefix=".")
+        elapsed = time.perf_counter() - start
+        print(f"get_embed,  metrics {'on ' if enabled else 'off'} | {renders / elapsed:9.0f} renders/s")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_metrics.py [renders]
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    asyncio.run(bench(renders))
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import random
+
+# let the script import the bot's classes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot"))
+
+from classes.RateLimiter import RateLimiter
+
+class FakeClock():
+    """A clock we move by hand, so a simulated minute takes no real time."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def check_limits():
+    """The three things the limiter promises, on a fake clock so they're exact."""
+    clock = FakeClock()
+    limiter = RateLimiter(0.5, 5, max_buckets=100, clock=clock)
+
+    # a burst past capacity: exactly burst allowed, the rest rejected and counted
+    results = [limiter.allow("spammer") for _ in range(8)]
+    assert results == [True] * 5 + [False] * 3, results
+    assert limiter.drops == 3
+
+    # refill: one token per 1/rate seconds, not before, and never past burst
+    clock.now += 1 / limiter.rate - 0.5
+    assert not limiter.allow("spammer"), "refilled early"
+    clock.now += 0.5
+    assert limiter.allow("spammer") and not limiter.allow("spammer")
+
+    clock.now += 10 * limiter.idle_time
+    results = [limiter.allow("spammer") for _ in range(6)]
+    assert results == [True] * 5 + [False], f"refilled past burst: {results}"
+
+    # size cap: the least recent buckets go, an active key stays and stays limited
+    for key in range(1_000):
+        clock.now += 0.001
+        limiter.allow(key)
+        if key % 10 == 0:
+            assert not limiter.allow("spammer"), "spammer got a fresh bucket"
+        assert len(limiter) <= limiter.max_buckets
+    assert len(limiter) == limiter.max_buckets
+    assert 0 not in limiter.buckets and 999 in limiter.buckets and "spammer" in limiter.buckets
+
+    # idle buckets: gone once they'd be full again, without waiting for the cap
+    clock.now += limiter.idle_time + 0.001
+    limiter.allow("late")
+    assert list(limiter.buckets) == ["late"], len(limiter)
+
+def simulate(users, messages, spammers=10, max_buckets=10_000):
+
+    clock = FakeClock()
+    rate, burst = 0.5, 5
+    limiter = RateLimiter(rate, burst, max_buckets=max_buckets, clock=clock)
+    allowed = { "normal": 0, "spam": 0 }
+    peak = 0
+
+    start = time.perf_counter()
+    for i in range(messages):
+
+        # messages arrive 1ms apart, spammers send a tenth of all traffic
+        clock.now += 0.001
+        if i % 10 == 0:
+            key, kind = -(i // 10 % spammers) - 1, "spam"
+        else:
+            key, kind = random.randrange(users), "normal"
+
+        if limiter.allow(key):
+            allowed[kind] += 1
+        peak = max(peak, len(limiter))
+    elapsed = time.perf_counter() - start
+
+    # memory stays bounded, and eviction never handed a spammer a fresh bucket
+    assert peak <= max_buckets, peak
+    assert allowed["spam"] <= spammers * (burst + rate * clock.now), allowed
+
+    print(f"{users:>7} users | {messages} msgs | {messages / elapsed:9.0f} checks/s | "
+          f"peak buckets {peak:>6} | spam allowed {allowed['spam']:>5} | drops {limiter.drops}")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_rate_limiter.py [users...]
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 50_000]
+
+    check_limits()
+    print("ok: burst rejected past capacity, refilled on time, idle and excess buckets evicted")
+
+    for size in sizes:
+        simulate(size, 200_000)
@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+# let the script import the bot's classes, json paths are relative to bot/
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.join(SCRIPTS_DIR, "..", "bot")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+os.chdir(BOT_DIR)
+
+from fake_discord import FakeGuild, make_bot
+
+DEPARTMENTS = ["CS", "MAT", "PHY", "ENG", "BIO", "CHM", "HIS", "PSY", "ECO", "ART"]
+
+def make_catalog(count):
+    """A few thousand names, each with several sections."""
+    random.seed(count)
+    return [{"id": i, "name": f"{random.choice(DEPARTMENTS)}{random.randint(100, 499)}",
+             "section": f"{random.randint(1, 30):03d}"} for i in range(1, count + 1)]
+
+def change_catalog(rows, share):
+    """Move a share of the sections and drop a few rows, like a term's edits."""
+    random.seed(len(rows) + 1)
+    changed = [dict(row, section=f"{random.randint(31, 60):03d}") if random.random() < share else row
+               for row in rows]
+    return [row for row in changed if random.random() >= share / 10]
+
+def subscribe_all(handler, names, channels, per_channel):
+    """Subscriptions written straight to SQLite, the setup isn't what's measured."""
+    random.seed(channels)
+    pairs = 0
+    for channel_id in range(1, channels + 1):
+        guild_id = 10_000_000 + channel_id // 3 # a few channels per guild
+        for course in random.sample(names, per_channel):
+            pairs += handler.add_subscription(guild_id, channel_id, course)
+    return pairs
+
+async def naive_lookups(bot, sample):
+    """What one query per subscription would cost, timed on a sample."""
+    start = time.perf_counter()
+    for course in sample:
+        await bot.courses_named([course])
+    return (time.perf_counter() - start) / len(sample)
+
+async def run(args):
+    import config as cfg
+
+    with tempfile.TemporaryDirectory() as folder:
+        bot = make_bot(os.path.join(folder, "subscriptions.db"), [FakeGuild()])
+        from classes.SQLHandler import Course
+
+        rows = make_catalog(args.courses)
+        bot.sqlHandler.sync(Course, rows)
+
+        names = sorted({row["name"] for row in rows})
+        start = time.perf_counter()
+        pairs = subscribe_all(bot.sqlHandler, names, args.channels, args.per_channel)
+        print(f"{pairs} subscriptions across {args.channels} channels, written in "
+              f"{time.perf_counter() - start:.2f}s")
+
+        diff = bot.sqlHandler.sync(Course, change_catalog(rows, args.share))
+        diff["status"] = "changed"
+        print(f"sync: {len(diff['added'])} added, {len(diff['changed'])} changed, "
+              f"{len(diff['removed'])} removed")
+
+        # count database round trips during the fan-out
+        calls = []
+        run_sql = bot.run_sql
+        async def counting(name, *rest):
+            calls.append(name)
+            return await run_sql(name, *rest)
+        bot.run_sql = counting
+
+        start = time.perf_counter()
+        await bot.load_subscriptions()
+        print(f"index loaded in {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{len(bot.subscribers)} courses followed")
+
+        # pacing off to time the work itself, the paced run is worked out below
+        bot._notify_limiter.rate = bot._notify_limiter.burst = 1e9
+        calls.clear()
+        start = time.perf_counter()
+        embeds = await bot.notify_subscribers(diff)
+        elapsed = time.perf_counter() - start
+
+        sent = sum(channel.sent for channel in bot.client.partial_channels.values())
+        print(f"fan-out: {embeds} embeds to {bot.notify_stats['channels']} channels in "
+              f"{elapsed * 1000:.0f} ms, {len(calls)} queries, {sent} messages")
+
+        rate = cfg.notify_rate_limit[0]
+        print(f"paced at {rate} channels/s: about {bot.notify_stats['channels'] / rate:.0f}s of sending")
+
+        per_query = await naive_lookups(bot, random.sample(sorted(bot.subscribers), min(200, len(bot.subscribers))))
+        print(f"one query per subscription instead: {pairs} queries, about "
+              f"{pairs * per_query * 1000:.0f} ms before sending anything")
+
+        bot.close()
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Time the course change fan-out with thousands of subscriptions.")
+    parser.add_argument("--courses", type=int, default=50_000, help="catalog rows")
+    parser.add_argument("--channels", type=int, default=2_000, help="subscribed channels")
+    parser.add_argument("--per-channel", type=int, default=5, help="courses each channel follows")
+    parser.add_argument("--share", type=float, default=0.05, help="share of rows the second sync changes")
+    asyncio.run(run(parser.parse_args()))
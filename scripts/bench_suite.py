@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+# let the script import the bot's classes, json paths are relative to bot/
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.join(SCRIPTS_DIR, "..", "bot")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+os.chdir(BOT_DIR)
+
+from fake_discord import FakeGuild, FakeUser, FakeMessage, make_bot
+
+BASELINE = os.path.join(SCRIPTS_DIR, "bench_baseline.json")
+
+# under this p50 a case is mostly the timer and the loop around it, and swings by a third between runs
+FAST_US = 5.0
+
+async def measure(func, ops, warmup=200, max_seconds=3.0, min_seconds=0.25):
+    """
+    Call func ops times, timing every call. Slow cases stop after max_seconds,
+    fast ones keep going until they've run for min_seconds.
+
+    Returns:
+        dict: ops per second, p50 and p99 in microseconds.
+    """
+    is_async = asyncio.iscoroutinefunction(func)
+
+    for i in range(min(warmup, ops // 10)):
+        result = func(i)
+        if is_async:
+            await result
+
+    timings = []
+    clock = time.perf_counter_ns
+    started = clock()
+    deadline = started + max_seconds * 1e9
+    i = 0
+    while True:
+        start = clock()
+        result = func(i)
+        if is_async:
+            await result
+        end = clock()
+        timings.append(end - start)
+        i += 1
+
+        # enough samples for a p99 and we're out of time
+        if end > deadline and len(timings) >= 100:
+            break
+
+        # a few milliseconds of a sub-microsecond case is all noise, keep it going a while
+        if i >= ops and end - started >= min_seconds * 1e9:
+            break
+
+    timings.sort()
+    total = sum(timings) / 1e9
+    return {
+        "ops_per_sec": len(timings) / total,
+        "p50_us": timings[len(timings) // 2] / 1000,
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))] / 1000,
+    }
+
+def make_cases(bot, guilds, author, admin):
+    """name -> function of the call number, one per hot path."""
+    from classes.SQLHandler import Course
+
+    sql = bot.sqlHandler
+    commands = [".hello", ".help", ".course cs12", ".nope"]
+    messages = [FakeMessage(commands[i % len(commands)], author, guilds[i % len(guilds)])
+                for i in range(len(commands) * 7)]
+    stats_message = FakeMessage(".stats", admin, guilds[0])
+    channel = guilds[0].channels[0]
+
+    # dispatch alone: find the command and parse its arguments, nothing run
+    dispatched = [message.content for message in messages] + [".course cs12", ".subscribe MAT210"]
+    def command_dispatch(i):
+        trigger, rest = bot.split_command(dispatched[i % len(dispatched)], ".")
+        selected = bot.get_command(trigger)
+        return selected.parse(rest) if selected is not None else None
+
+    # end to end: dispatch, rate limits, permissions, the command itself and its embed
+    async def handle_command(i):
+        return await bot.handle_command(messages[i % len(messages)])
+
+    async def handle_admin_stats(i):
+        return await bot.handle_command(stats_message)
+
+    async def get_embed(i):
+        return await bot.get_embed("hello", guild=guilds[0], prefix=".")
+
+    async def send_embed(i):
+        embed = await bot.get_embed("hello", guild=guilds[0], prefix=".")
+        return await embed.send(guilds[i % len(guilds)], channel)
+
+    def guild_lookup(i):
+        return bot.get_or_add_guild(guilds[i % len(guilds)]).get_channel_obj("general")
+
+    def sql_check_exists(i):
+        return sql.check_exists(Course, {"id": i % 10_000})
+
+    def sql_search(i):
+        return sql.search_courses(("cs1", "mat", "CS126")[i % 3], limit=10)
+
+    def sql_retrieve_uncached(i):
+        sql.cache.clear()
+        return sql.retrieve(Course, {"id": i % 10_000})
+
+    async def async_retrieve(i):
+        return await bot.retrieve(Course, {"id": i % 10_000})
+
+    return {
+        "command_dispatch": command_dispatch,
+        "handle_command": handle_command,
+        "handle_admin_stats": handle_admin_stats,
+        "get_embed": get_embed,
+        "send_embed": send_embed,
+        "guild_lookup": guild_lookup,
+        "sql_check_exists": sql_check_exists,
+        "sql_search": sql_search,
+        "sql_retrieve_uncached": sql_retrieve_uncached,
+        "async_retrieve": async_retrieve,
+    }
+
+async def run(ops, only):
+
+    from classes.SQLHandler import Course
+
+    with tempfile.TemporaryDirectory() as folder:
+
+        guilds = [FakeGuild(name=f"guild-{i}") for i in range(1_000)]
+        bot = make_bot(os.path.join(folder, "bench.db"), guilds)
+
+        # a catalog big enough for the indexes to matter
+        bot.sqlHandler.sync(Course, ({"id": i, "name": f"{('CS', 'MAT')[i % 2]}{100 + i % 400}",
+                                      "section": f"{i % 20:03d}"} for i in range(10_000)))
+
+        cases = make_cases(bot, guilds, FakeUser(), FakeUser(id=bot.owner))
+
+        results = {}
+        for name, func in cases.items():
+            if only and name not in only:
+                continue
+            results[name] = await measure(func, ops)
+
+        bot.close()
+        return results
+
+def compare(results, baseline, tolerance, fast_tolerance):
+    """Print every case against the baseline, return the names that regressed."""
+    regressed = []
+
+    print(f"{'case':<22} {'ops/s':>10} {'p50 us':>9} {'p99 us':>9} {'vs baseline':>12}")
+    for name, result in results.items():
+        line = (f"{name:<22} {result['ops_per_sec']:>10.0f} "
+                f"{result['p50_us']:>9.1f} {result['p99_us']:>9.1f}")
+
+        base = baseline.get(name)
+        if base:
+            change = result["ops_per_sec"] / base["ops_per_sec"] - 1
+            line += f" {change:>+11.0%}"
+            allowed = max(tolerance, fast_tolerance) if base["p50_us"] < FAST_US else tolerance
+            if change < -allowed:
+                line += "  REGRESSED"
+                regressed.append(name)
+
+        print(line)
+
+    return regressed
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmark the bot's hot paths without Discord.")
+    parser.add_argument("--ops", type=int, default=5_000, help="calls timed per case")
+    parser.add_argument("--only", nargs="*", help="cases to run, all by default")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if a case is slower than the baseline by more than the tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="fraction of ops/s a case may lose before it counts as a regression")
+    parser.add_argument("--fast-tolerance", type=float, default=0.5,
+                        help=f"the same for cases whose baseline p50 is under {FAST_US:g} us")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.ops, args.only))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    regressed = compare(results, baseline, args.tolerance, args.fast_tolerance)
+
+    # a noisy neighbour can cost a single run, time regressed cases again and keep the best
+    if args.check and regressed:
+        print(f"Re-running {', '.join(regressed)}")
+        retry = asyncio.run(run(args.ops, regressed))
+        for name, result in retry.items():
+            if result["ops_per_sec"] > results[name]["ops_per_sec"]:
+                results[name] = result
+        regressed = compare({name: results[name] for name in regressed}, baseline, args.tolerance,
+                            args.fast_tolerance)
+
+    if args.save:
+        # keep cases we didn't run this time
+        baseline.update(results)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=4, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.check and regressed:
+        print(f"{len(regressed)} case(s) regressed: {', '.join(regressed)}")
+        sys.exit(1)
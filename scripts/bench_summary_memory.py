@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+# let the script import the bot's classes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot"))
+
+from sqlmodel import Session, select
+from classes.SQLHandler import SQLHandler, Course
+
+def make_courses(count):
+    """Yield fake course sections without holding them all in memory."""
+    for i in range(count):
+        yield {"id": i, "name": f"CS{i % 700:03d}", "section": f"{i % 40:03d}"}
+
+def old_summary(handler):
+    """The old path: load every Course just to count them."""
+    with Session(handler.engine) as session:
+        return {"course_count": len(session.exec(select(Course)).all())}
+
+def measure(func, *args):
+    """Peak Python memory and time for one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+def bench(count, include_old=True):
+
+    with tempfile.TemporaryDirectory() as folder:
+        handler = SQLHandler(os.path.join(folder, "bench.db"), dbg=True)
+        handler.bulk_upsert(Course, make_courses(count), batch_size=5000)
+
+        runs = [("summary", handler.summary), ("course_stats", handler.course_stats)]
+        if include_old:
+            runs.insert(0, ("old summary", lambda: old_summary(handler)))
+
+        for name, func in runs:
+            peak, elapsed = measure(func)
+            print(f"{count:>8} rows | {name:<12} | peak {peak / 1024 / 1024:8.2f} MiB | {elapsed * 1000:9.1f} ms")
+
+        handler.engine.dispose()
+
+if __name__ == '__main__':
+
+    # usage: python scripts/bench_summary_memory.py [rows...] [--skip-old]
+    sizes = [int(arg) for arg in sys.argv[1:] if arg.isdigit()] or [100_000, 1_000_000]
+    include_old = "--skip-old" not in sys.argv
+
+    for size in sizes:
+        bench(size, include_old)
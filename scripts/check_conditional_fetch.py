@@ -0,0 +1,175 @@
+import os
+import sys
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# let the script import the bot's classes, json paths are relative to bot/
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.join(SCRIPTS_DIR, "..", "bot")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+os.chdir(BOT_DIR)
+
+from classes.SQLHandler import SQLHandler
+from classes.CatalogPipeline import CatalogPipeline
+
+LAST_MODIFIED = "Wed, 01 Oct 2026 12:00:00 GMT"
+
+def make_catalog(count, section="001"):
+    lines = ["id,name,section"] + [f"{i},CS{i:03d},{section}" for i in range(1, count + 1)]
+    return ("\n".join(lines) + "\n").encode()
+
+class CatalogServer(ThreadingHTTPServer):
+    """Serves one catalog body, answering conditional requests like the real feed."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), CatalogRequest)
+        self.body = b""
+        self.validators = True # send ETag and Last-Modified at all
+        self.etag_version = 0  # bump to change the ETag without changing the body
+        self.requests = []     # (request headers, status, body bytes sent)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/catalog.csv"
+
+    @property
+    def etag(self):
+        return f'"{hashlib.sha256(self.body).hexdigest()[:16]}-{self.etag_version}"'
+
+class CatalogRequest(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        conditional = server.validators and (self.headers.get("If-None-Match") == server.etag
+                                             or self.headers.get("If-Modified-Since") == LAST_MODIFIED
+                                             and "If-None-Match" not in self.headers)
+
+        # recorded before any byte goes out, the client can't read the log ahead of it
+        body = b"" if conditional else server.body
+        server.requests.append((dict(self.headers), 304 if conditional else 200, len(body)))
+
+        self.send_response(304 if conditional else 200)
+        if server.validators:
+            self.send_header("ETag", server.etag)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def sync(pipeline, handler, force=False):
+    """Run the pipeline, returning (status or skip reason, diff or why it was rejected)."""
+    try:
+        diff = pipeline.run(handler, force)
+    except CatalogPipeline.Rejected as e:
+        return "rejected", str(e)
+    return diff.get("reason") or diff["status"], diff
+
+def run(args):
+    with tempfile.TemporaryDirectory() as folder:
+        server = CatalogServer()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        handler = SQLHandler(os.path.join(folder, "fetch.db"))
+        cache_dir = os.path.join(folder, "cache")
+        pipeline = CatalogPipeline(server.url, cache_dir=cache_dir)
+
+        def last_request():
+            return server.requests[-1]
+
+        # first fetch: nothing cached, nothing conditional, a full sync
+        server.body = make_catalog(args.rows)
+        status, diff = sync(pipeline, handler)
+        headers, code, sent = last_request()
+        assert status == "changed" and len(diff["added"]) == args.rows, diff
+        assert "If-None-Match" not in headers and "If-Modified-Since" not in headers, headers
+        assert code == 200 and sent == len(server.body)
+        sync_id = handler.last_sync_id()
+
+        # unchanged: both validators go out, the server answers 304 with no body, no sync
+        status, diff = sync(pipeline, handler)
+        headers, code, sent = last_request()
+        assert status == "not-modified", diff
+        assert headers["If-None-Match"] == server.etag and headers["If-Modified-Since"] == LAST_MODIFIED
+        assert code == 304 and sent == 0
+        assert handler.last_sync_id() == sync_id, "a 304 still wrote a sync"
+
+        # new ETag for the same bytes: downloaded, hashed, still skipped
+        server.etag_version += 1
+        status, diff = sync(pipeline, handler)
+        assert status == "same-hash" and last_request()[1] == 200, diff
+        assert handler.last_sync_id() == sync_id
+
+        # and the new ETag was kept, the next run is a 304 again
+        status, diff = sync(pipeline, handler)
+        assert status == "not-modified" and last_request()[1] == 304, diff
+
+        # a server without validators: always a full download, the hash still skips it
+        server.validators = False
+        status, diff = sync(pipeline, handler)
+        assert status == "same-hash" and last_request()[1] == 200, diff
+        server.validators = True
+
+        # new content goes through
+        server.body = make_catalog(args.rows, section="002")
+        status, diff = sync(pipeline, handler)
+        assert status == "changed" and len(diff["changed"]) == args.rows, diff
+        assert handler.last_sync_id() != sync_id
+        sync_id = handler.last_sync_id()
+
+        # forced on a 304, synced from the cached body: nothing to change
+        status, diff = sync(pipeline, handler, force=True)
+        assert status == "changed" and last_request()[1] == 304, diff
+        assert diff["unchanged"] == args.rows and not (diff["added"] or diff["changed"] or diff["removed"]), diff
+
+        # a truncated catalog is refused, and the good one it replaced is still what's cached
+        good = server.body
+        server.body = make_catalog(args.rows // 10, section="002")
+        status, reason = sync(pipeline, handler)
+        assert status == "rejected", reason
+        assert handler.summary()["course_count"] == args.rows
+
+        server.body = good
+        status, diff = sync(pipeline, handler)
+        assert status == "not-modified", diff
+        status, diff = sync(pipeline, handler, force=True)
+        assert status == "changed" and diff["unchanged"] == args.rows, diff
+
+        # cancelled mid-download: nothing synced, no half-written body left next to the cache
+        pipeline.cancel = threading.Event()
+        pipeline.cancel.set()
+        server.body = make_catalog(args.rows, section="003")
+        try:
+            sync(pipeline, handler)
+            raise AssertionError("a cancelled download went through")
+        except CatalogPipeline.Cancelled:
+            pass
+        assert sorted(os.listdir(cache_dir)) == ["catalog.csv", "catalog.json"], os.listdir(cache_dir)
+        pipeline.cancel = None
+        server.body = good
+
+        # no cache dir: every run is a full download and sync, the download is deleted after
+        uncached = CatalogPipeline(server.url)
+        for _ in range(2):
+            status, diff = sync(uncached, handler)
+            headers, code, _ = last_request()
+            assert status == "changed" and code == 200 and "If-None-Match" not in headers, diff
+        assert sorted(os.listdir(cache_dir)) == ["catalog.csv", "catalog.json"], os.listdir(cache_dir)
+
+        served = sum(sent for _, _, sent in server.requests)
+        server.shutdown()
+        print(f"ok: {len(server.requests)} requests, {sum(code == 304 for _, code, _ in server.requests)} "
+              f"answered 304, {served / 1024:.0f} KiB served for {args.rows} rows")
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Check ETag, Last-Modified and hash skipping against a local server.")
+    parser.add_argument("--rows", type=int, default=2_000, help="catalog rows")
+    run(parser.parse_args())
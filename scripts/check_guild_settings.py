@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+# let the script import the bot's classes, json paths are relative to bot/
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.join(SCRIPTS_DIR, "..", "bot")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+os.chdir(BOT_DIR)
+
+from fake_discord import FakeGuild, FakeUser, FakeMessage, make_bot
+
+def stored(bot):
+    """guild id -> settings, straight from SQLite."""
+    return {row["guild_id"]: row for row in bot.sqlHandler.guild_settings()}
+
+def check(bot, guilds, step):
+    """The cache, what the database holds and what the bot does with them have to agree."""
+    rows = stored(bot)
+    assert bot.guild_settings == rows, f"{step}: cache {bot.guild_settings} != database {rows}"
+
+    for guild in guilds:
+        row = rows.get(guild.id, {})
+        assert bot.prefix_for(guild) == (row.get("prefix") or bot.prefix), step
+
+        custom_guild = bot.get_custom_guild(guild)
+        notify = row.get("notify_channel")
+        assert custom_guild.required_channels == ([notify] if notify else bot.required_channels), step
+
+async def run(number):
+    random.seed(number)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "settings.db")
+        guilds = [FakeGuild(name=f"guild-{i}", channels=("general", "announcements", "bots")) for i in range(5)]
+        bot = make_bot(path, guilds)
+        admin = FakeUser(id=bot.owner)
+
+        await bot.load_guild_settings()
+        await bot.validate_guilds()
+        check(bot, guilds, "start")
+
+        # random changes through the admin command, checked after every one
+        commands = ["prefix !", "prefix ??", "channel announcements", "channel bots", "channel missing",
+                    "color success #123456", "color default 0a0b0c", "color failure #zzzzzz",
+                    "reset prefix", "reset channel", "reset color", "reset", "prefix too-long"]
+        for step in range(number):
+            guild = random.choice(guilds)
+            content = f"{bot.prefix_for(guild)}config {random.choice(commands)}"
+            embed = await bot.handle_command(FakeMessage(content, admin, guild))
+            assert embed is not None, content
+            check(bot, guilds, content)
+
+        # the channel a guild picked is what validation asks for
+        for guild in guilds:
+            report = bot.get_custom_guild(guild).validate()
+            assert report["valid"], report
+
+        # a fresh process reads back exactly what this one cached, in the background like on_ready,
+        # answering with the defaults until it arrives
+        cached = dict(bot.guild_settings)
+        bot.close()
+        fresh = make_bot(path, guilds)
+        load = fresh.start_settings_load()
+        assert all(fresh.prefix_for(guild) == fresh.prefix for guild in guilds), "on_ready waited for settings"
+        await load
+        assert fresh.start_settings_load() is load, "loaded twice"
+        assert fresh.guild_settings == cached
+        check(fresh, guilds, "reload")
+
+        # what on_message pays for the prefix check
+        guild = guilds[0]
+        start = time.perf_counter()
+        for _ in range(100_000):
+            fresh.prefix_for(guild)
+        lookup = (time.perf_counter() - start) / 100_000
+
+        fresh.close()
+        print(f"{number} updates, cache matched the database after each one and after a reload; "
+              f"prefix lookup {lookup * 1e9:.0f} ns")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/check_guild_settings.py [updates]
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 300))
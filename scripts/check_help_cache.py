@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+# let the script import the bot's classes, json paths are relative to bot/
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.join(SCRIPTS_DIR, "..", "bot")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+os.chdir(BOT_DIR)
+
+from fake_discord import FakeGuild, FakeUser, FakeMessage, make_bot
+
+def listed(desc):
+    """Command names a help text lists, in order."""
+    lines = [line.strip() for line in desc.splitlines()]
+    return [line.split("**")[1] for line in lines if line.startswith("**")]
+
+def expected(bot, is_admin, prefix):
+    """What help should list, worked out from the registry and not from _build_help."""
+    return [f"{prefix}{name}" for name, selected in bot.commands.items()
+            if is_admin or not selected.admin_only]
+
+async def check(bot, guild, user, is_admin, step):
+    """Ask for help and compare it against the registry."""
+    embed = await bot.handle_command(FakeMessage(f"{bot.prefix_for(guild)}help", user, guild))
+    names = listed(embed.description)
+    assert names == expected(bot, is_admin, bot.prefix_for(guild)), f"{step}: {names}"
+    return names
+
+async def run():
+    with tempfile.TemporaryDirectory() as folder:
+        guilds = [FakeGuild(name="default"), FakeGuild(name="custom")]
+        bot = make_bot(os.path.join(folder, "help.db"), guilds)
+        admin, user = FakeUser(id=bot.owner), FakeUser(id=bot.owner + 1)
+
+        await bot.load_guild_settings()
+        await bot.update_settings(guilds[1].id, prefix="!")
+
+        # count real builds, everything else has to come from the cache
+        builds = []
+        build = bot._build_help
+        bot._build_help = lambda *key: builds.append(key) or build(*key)
+
+        admin_only = {name for name, selected in bot.commands.items() if selected.admin_only}
+        assert admin_only, "no admin commands to hide"
+
+        # each tier and prefix built once, then served from the cache
+        for _ in range(3):
+            for guild in guilds:
+                admin_view = await check(bot, guild, admin, True, "admin")
+                user_view = await check(bot, guild, user, False, "user")
+
+                prefix = bot.prefix_for(guild)
+                assert not {f"{prefix}{name}" for name in admin_only} & set(user_view), "user sees admin commands"
+                assert set(user_view) < set(admin_view)
+
+        assert sorted(builds) == sorted({(tier, bot.prefix_for(guild)) for guild in guilds for tier in (True, False)}), builds
+        assert len(bot._help_cache) == 4
+
+        # a new command shows up, the cache was dropped
+        async def ping(msg):
+            return await bot.get_embed("help", guild=msg.guild, desc="pong")
+        bot.add_command("ping", ping, "Replies pong.")
+        assert not bot._help_cache
+        assert f"{bot.prefix}ping" in await check(bot, guilds[0], user, False, "after add")
+
+        # an admin command only shows up for admins
+        bot.add_command("secret", ping, "Admins only.", admin_only=True)
+        assert f"{bot.prefix}secret" not in await check(bot, guilds[0], user, False, "admin add, user")
+        assert f"{bot.prefix}secret" in await check(bot, guilds[0], admin, True, "admin add, admin")
+
+        # and removed ones go away
+        bot.remove_command("ping")
+        bot.remove_command("secret")
+        assert not bot._help_cache
+        names = await check(bot, guilds[0], admin, True, "after remove")
+        assert f"{bot.prefix}ping" not in names and f"{bot.prefix}secret" not in names
+
+        # a prefix change drops the cache, the old prefix isn't kept around
+        await check(bot, guilds[1], user, False, "old prefix")
+        await bot.update_settings(guilds[1].id, prefix="?")
+        assert not bot._help_cache, "help cached for a prefix nobody uses"
+        assert (await check(bot, guilds[1], user, False, "new prefix"))[0].startswith("?")
+
+        # and however often prefixes change, only ones in use get cached
+        for prefix in ("a", "b", "c", "d", "e", "?"):
+            await bot.update_settings(guilds[1].id, prefix=prefix)
+            await check(bot, guilds[1], user, False, f"prefix {prefix}")
+        assert set(bot._help_cache) == {(False, "?")}, bot._help_cache
+
+        # what the cache saves per .help
+        key = (False, bot.prefix)
+        start = time.perf_counter()
+        for _ in range(10_000):
+            build(*key)
+        built = (time.perf_counter() - start) / 10_000
+
+        start = time.perf_counter()
+        for _ in range(10_000):
+            bot._help_cache.get(key)
+        cached = (time.perf_counter() - start) / 10_000
+
+        bot.close()
+        print(f"ok: help built {len(builds)} times over every step, both tiers matched the registry; "
+              f"build {built * 1e6:.1f} us, cached {cached * 1e9:.0f} ns")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/check_help_cache.py
+    asyncio.run(run())
@@ -0,0 +1,107 @@
+import os
+import sys
+import csv
+import time
+import asyncio
+import argparse
+import tempfile
+
+# let the script import the bot's classes, json paths are relative to bot/
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.join(SCRIPTS_DIR, "..", "bot")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+os.chdir(BOT_DIR)
+
+from fake_discord import FakeGuild, FakeUser, FakeMessage, make_bot
+
+def write_catalog(path, count, section):
+    """A catalog csv like the real feed, every section moved between the two runs."""
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["id", "name", "section"])
+        for i in range(1, count + 1):
+            writer.writerow([i, f"CS{i % 500:03d}", f"{section:03d}"])
+
+async def heartbeat(interval, lags, stop):
+    """Sleep for interval over and over, recording how late each wake-up was."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - expected)
+
+async def commands(bot, message, latencies, stop):
+    """A user sending commands the whole time, each one timed."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await bot.handle_command(message)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+async def measure(bot, work, interval, message):
+    """Run work with the heartbeat and command traffic going, return (lags, latencies, seconds)."""
+    lags, latencies, stop = [], [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(interval, lags, stop))
+    traffic = asyncio.create_task(commands(bot, message, latencies, stop))
+
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await asyncio.gather(beat, traffic)
+    return lags, latencies, elapsed
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+async def run(args):
+    import config as cfg
+
+    with tempfile.TemporaryDirectory() as folder:
+        cfg.catalog_cache_dir = os.path.join(folder, "cache")
+        cfg.catalog_source = os.path.join(folder, "courses.csv")
+        cfg.catalog_max_removed = None
+
+        guild = FakeGuild()
+        bot = make_bot(os.path.join(folder, "loop.db"), [guild])
+        message = FakeMessage(f"{bot.prefix}search CS1", FakeUser(), guild)
+
+        # first sync also opens the database, then fills it, the second rewrites every row
+        for run_number, section in enumerate((1, 2), start=1):
+            write_catalog(cfg.catalog_source, args.rows, section)
+            lags, latencies, elapsed = await measure(bot, lambda: bot.join_update(force=True),
+                                                     args.interval, message)
+
+            worst = max(lags)
+            print(f"sync {run_number}: {args.rows} rows in {elapsed:.2f}s | {len(lags)} beats, "
+                  f"lag p99 {percentile(lags, 0.99) * 1000:.1f} ms, max {worst * 1000:.1f} ms | "
+                  f"{len(latencies)} commands, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+            assert bot.sync_diff["status"] == "changed", bot.sync_diff
+            assert len(lags) >= elapsed / args.interval / 2, "the heartbeat barely ran during the sync"
+            assert worst <= args.max_lag, f"loop stalled {worst * 1000:.0f} ms, over {args.max_lag * 1000:.0f} ms"
+            # the first command waits for the database to open, so not the worst one
+            assert latencies and percentile(latencies, 0.99) <= args.max_lag, "commands stalled behind the sync"
+
+        # the same sync run straight on the loop, what run_sql and the update thread spare us
+        write_catalog(cfg.catalog_source, args.rows, 3)
+        from classes.CatalogPipeline import CatalogPipeline
+        pipeline = CatalogPipeline(cfg.catalog_source, batch_size=cfg.catalog_batch_size,
+                                   cache_dir=cfg.catalog_cache_dir)
+        start = time.perf_counter()
+        pipeline.run(bot.sqlHandler, True)
+        print(f"inline, the loop would have been blocked {time.perf_counter() - start:.2f}s in one go")
+
+        bot.close()
+        print(f"ok: max loop lag stayed under {args.max_lag * 1000:.0f} ms")
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Check the event loop keeps running while a sync runs.")
+    parser.add_argument("--rows", type=int, default=100_000, help="catalog rows per sync")
+    parser.add_argument("--interval", type=float, default=0.01, help="heartbeat sleep in seconds")
+    parser.add_argument("--max-lag", type=float, default=0.1, help="worst heartbeat lag allowed in seconds")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,116 @@
+import os
+import sys
+import asyncio
+import tempfile
+
+# let the script import the bot's classes, json paths are relative to bot/
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.join(SCRIPTS_DIR, "..", "bot")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+os.chdir(BOT_DIR)
+
+from fake_discord import FakeGuild, FakeUser, FakeMessage, make_bot
+
+def write_catalog(path, section):
+    with open(path, "w") as catalog:
+        catalog.write("id,name,section\n")
+        for i in range(1, 21):
+            catalog.write(f"{i},CS{100 + i},{section if i == 1 else '001'}\n")
+
+def record(channel):
+    """Keep every embed a channel is sent."""
+    channel.received = []
+    async def send(content=None, *, embed=None, embeds=None):
+        channel.received.extend([embed] if embed is not None else embeds)
+    channel.send = send
+    return channel
+
+def take(channel):
+    """Titles of what a channel got since the last take, the embeds stay in channel.taken."""
+    channel.taken, channel.received = channel.received, []
+    return [embed.title for embed in channel.taken]
+
+async def command(bot, content, user, guild, channel=None):
+    """Run a command and send its answer the way on_message does."""
+    channel = channel or guild.channels[0]
+    embed = await bot.handle_command(FakeMessage(f"{bot.prefix_for(guild)}{content}", user, guild, channel))
+    for page in embed if isinstance(embed, list) else [embed]:
+        await page.send(guild, channel)
+    return embed
+
+async def run():
+    import config as cfg
+
+    with tempfile.TemporaryDirectory() as folder:
+        cfg.catalog_source = os.path.join(folder, "courses.csv")
+        cfg.catalog_cache_dir = os.path.join(folder, "cache")
+        cfg.catalog_max_removed = None
+
+        routed = FakeGuild(name="routed", channels=("general", "announcements", "bots"))
+        plain = FakeGuild(name="plain", channels=("general",))
+        bot = make_bot(os.path.join(folder, "notify.db"), [routed, plain])
+        admin = FakeUser(id=bot.owner)
+
+        general, announcements, bots = (record(channel) for channel in routed.channels)
+        plain_general = record(plain.channels[0])
+
+        # subscription digests go out by channel id, hand back the real channels
+        for channel in routed.channels + plain.channels:
+            bot.client.partial_channels[channel.id] = channel
+
+        write_catalog(cfg.catalog_source, "001")
+        await bot.join_update(force=True)
+        await bot.load_guild_settings()
+
+        # the routed guild picks a channel; the answer to the command itself isn't a notification
+        await command(bot, "config channel #announcements", admin, routed)
+        assert take(general) == ["Settings - routed"] and not take(announcements), "config answer moved"
+
+        # both of its channels follow the same course, and so does the plain guild
+        await command(bot, "subscribe CS101", admin, routed, general)
+        await command(bot, "subscribe CS101", admin, routed, bots)
+        await command(bot, "subscribe CS101", admin, plain)
+        take(general), take(bots), take(plain_general)
+
+        # .update asked for in general, the result lands in announcements
+        write_catalog(cfg.catalog_source, "002")
+        await command(bot, "update", admin, routed, general)
+        await bot._notify_task
+        got = take(announcements)
+        assert "Updated Database" in got, got
+        assert not take(general) and not take(bots), "update result or digest went to the old channels"
+
+        # one digest for the guild, the course listed once though two channels follow it
+        assert got.count("Course Updates") == 1, got
+        digest = next(embed.description for embed in announcements.taken if embed.title == "Course Updates")
+        assert digest.count("CS101") == 1, digest
+
+        # the plain guild still gets its digest where it subscribed, and its results in place
+        assert take(plain_general) == ["Course Updates"]
+        await command(bot, "update", admin, plain)
+        assert take(plain_general) == ["Updated Database"]
+
+        # progress embeds follow the same setting
+        await bot._send_progress(general, 10_000)
+        await bot._send_progress(plain_general, 10_000)
+        assert take(announcements) == ["Updating Database"] and not take(general)
+        assert take(plain_general) == ["Updating Database"]
+
+        # reset: everything goes back to where it was asked for or subscribed
+        await command(bot, "config reset channel", admin, routed)
+        take(general)
+        write_catalog(cfg.catalog_source, "003")
+        await command(bot, "update", admin, routed, general)
+        await bot._notify_task
+        assert sorted(take(general)) == ["Course Updates", "Updated Database"], general.taken
+        assert take(bots) == ["Course Updates"] and not take(announcements)
+
+        bot.close()
+        print("ok: update results, progress and course digests landed in the configured channel, "
+              "and back in place after a reset")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/check_notify_channel.py
+    asyncio.run(run())
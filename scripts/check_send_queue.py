@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import asyncio
+from types import SimpleNamespace
+
+# let the script import the bot's classes, json paths are relative to bot/
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.join(SCRIPTS_DIR, "..", "bot")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+os.chdir(BOT_DIR)
+
+import discord
+from fake_discord import FakeChannel
+from classes.SendQueue import SendQueue, MAX_EMBEDS, MAX_EMBED_CHARS
+
+class RecordingChannel(FakeChannel):
+    """A channel that takes a while to send, fails on cue and keeps every batch."""
+
+    active = 0 # sends in flight across every channel
+    peak = 0
+
+    def __init__(self, name, delay=0.0, failures=()):
+        super().__init__(name)
+        self.delay = delay
+        self.failures = list(failures) # raised in order, one per send, before anything goes out
+        self.batches = []
+
+    async def send(self, content=None, *, embed=None, embeds=None):
+        RecordingChannel.active += 1
+        RecordingChannel.peak = max(RecordingChannel.peak, RecordingChannel.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                raise self.failures.pop(0)
+            self.batches.append(list(embeds))
+            return await super().send(content, embed=embed, embeds=embeds)
+        finally:
+            RecordingChannel.active -= 1
+
+def embed(i, size=10):
+    return discord.Embed(title=f"#{i}", description="x" * size)
+
+def too_many_requests(retry_after):
+    """An HTTP 429 without retry_after on it, so the header is what's read."""
+    response = SimpleNamespace(status=429, reason="Too Many Requests", headers={"Retry-After": str(retry_after)})
+    return discord.HTTPException(response, "You are being rate limited.")
+
+async def drained(queue, futures):
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    assert queue.depth() == 0 and queue.stats()["channels"] == 0, "workers left behind"
+    return results
+
+async def check_coalescing():
+    queue, channel = SendQueue(typing=False), RecordingChannel("coalesce")
+
+    # queued before the worker gets to run, so it sees them all at once
+    embeds = [embed(i) for i in range(25)]
+    futures = [queue.enqueue(channel, item) for item in embeds]
+    assert queue.depth() == 25
+    messages = await drained(queue, futures)
+
+    assert [len(batch) for batch in channel.batches] == [MAX_EMBEDS, MAX_EMBEDS, 5], channel.batches
+    assert [item for batch in channel.batches for item in batch] == embeds, "order changed"
+    assert len({id(message) for message in messages}) == 3, "futures don't share their message"
+
+    # six big embeds, only two fit under the character limit at a time
+    big = [embed(i, size=MAX_EMBED_CHARS // 2 - 10) for i in range(6)]
+    await drained(queue, [queue.enqueue(channel, item) for item in big])
+    assert [len(batch) for batch in channel.batches[3:]] == [2, 2, 2], channel.batches[3:]
+    assert all(sum(len(item) for item in batch) <= MAX_EMBED_CHARS for batch in channel.batches)
+
+    stats = queue.stats()
+    assert (stats["sent"], stats["messages"], stats["failed"], stats["retries"]) == (31, 6, 0, 0), stats
+    return stats
+
+async def check_retry_after():
+    queue = SendQueue(typing=False, max_retries=3)
+
+    # both kinds of rate limit, waited out, then delivered exactly once
+    channel = RecordingChannel("limited", failures=[discord.RateLimited(0.05), too_many_requests(0.05)])
+    start = time.perf_counter()
+    await drained(queue, [queue.enqueue(channel, embed(i)) for i in range(3)])
+    waited = time.perf_counter() - start
+
+    assert waited >= 0.1, f"retried after {waited:.3f}s, before retry_after"
+    assert [len(batch) for batch in channel.batches] == [3]
+    assert queue.retries == 2 and queue.failed == 0 and queue.sent == 3
+
+    # out of retries, every embed in the batch fails with the error
+    channel = RecordingChannel("exhausted", failures=[discord.RateLimited(0.01)] * 4)
+    results = await drained(queue, [queue.enqueue(channel, embed(i)) for i in range(2)])
+    assert all(isinstance(result, discord.RateLimited) for result in results), results
+    assert queue.retries == 5 and queue.failed == 2 and not channel.batches
+
+    # anything else isn't retried at all
+    channel = RecordingChannel("forbidden", failures=[RuntimeError("missing access")])
+    results = await drained(queue, [queue.enqueue(channel, embed(0))])
+    assert isinstance(results[0], RuntimeError) and queue.retries == 5 and queue.failed == 3
+
+async def check_backoff_releases():
+    queue = SendQueue(max_concurrency=1, typing=False)
+
+    # one slot: the limited channel backs off, the other one sends in the meantime
+    limited = RecordingChannel("backing-off", failures=[discord.RateLimited(0.3)])
+    other = RecordingChannel("other")
+    start = time.perf_counter()
+    futures = [queue.enqueue(limited, embed(0))]
+    await asyncio.sleep(0.05)
+
+    await queue.enqueue(other, embed(1))
+    other_done = time.perf_counter() - start
+    await drained(queue, futures)
+    limited_done = time.perf_counter() - start
+
+    assert other_done < 0.2, f"waited {other_done:.3f}s behind another channel's retry_after"
+    assert limited_done >= 0.3 and limited.sent == 1 and other.sent == 1
+    return other_done
+
+async def check_concurrency(channels, delay, limit):
+    queue = SendQueue(max_concurrency=limit, typing=False)
+    RecordingChannel.peak = 0
+
+    targets = [RecordingChannel(f"channel-{i}", delay=delay) for i in range(channels)]
+    start = time.perf_counter()
+    await drained(queue, [queue.enqueue(channel, embed(i)) for i, channel in enumerate(targets)])
+    elapsed = time.perf_counter() - start
+
+    # one message per channel, at most limit of them in flight
+    assert RecordingChannel.peak == limit, f"{RecordingChannel.peak} sends at once, limit {limit}"
+    assert all(channel.sent == 1 for channel in targets)
+    assert elapsed >= channels / limit * delay * 0.9, "the limit wasn't applied"
+
+    stats = queue.stats()
+    assert stats["max_latency_ms"] >= stats["avg_latency_ms"] > 0
+    assert stats["max_latency_ms"] >= (channels / limit - 1) * delay * 1000, stats
+    return elapsed
+
+async def run():
+    stats = await check_coalescing()
+    await check_retry_after()
+    other_done = await check_backoff_releases()
+    elapsed = await check_concurrency(channels=20, delay=0.05, limit=5)
+
+    print(f"ok: {stats['sent']} embeds in {stats['messages']} messages, retries waited out, "
+          f"20 channels at most 5 at a time in {elapsed:.2f}s, "
+          f"a backing-off channel let another send after {other_done * 1000:.0f} ms")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/check_send_queue.py
+    asyncio.run(run())
@@ -0,0 +1,99 @@
+import sys
+import itertools
+from types import SimpleNamespace
+
+# Just enough of discord.py for the bot's handlers to run without a token
+
+_ids = itertools.count(1)
+
+class FakeChannel():
+    def __init__(self, name, guild=None, id=None):
+        self.id = id if id is not None else next(_ids)
+        self.name = name
+        self.guild = guild
+        self.sent = 0 # messages "sent"
+        self.embeds = 0
+
+    def typing(self):
+        return FakeTyping()
+
+    async def send(self, content=None, *, embed=None, embeds=None):
+        self.sent += 1
+        self.embeds += 1 if embed is not None else len(embeds or ())
+        return SimpleNamespace(id=next(_ids), channel=self, content=content)
+
+class FakeTyping():
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeRole():
+    def __init__(self, name, id=None):
+        self.id = id if id is not None else next(_ids)
+        self.name = name
+
+class FakeGuild():
+    def __init__(self, id=None, name="guild", channels=("general",), roles=("@everyone",)):
+        self.id = id if id is not None else next(_ids)
+        self.name = name
+        self.channels = [FakeChannel(channel, self) for channel in channels]
+        self.roles = [FakeRole(role) for role in roles]
+
+class FakeUser():
+    def __init__(self, id=None, name="user"):
+        self.id = id if id is not None else next(_ids)
+        self.name = name
+        self.mention = f"<@{self.id}>"
+
+class FakeMessage():
+    def __init__(self, content, author, guild, channel=None):
+        self.id = next(_ids)
+        self.content = content
+        self.author = author
+        self.guild = guild
+        self.channel = channel if channel is not None else guild.channels[0]
+        self.attachments = []
+
+class FakeClient():
+    def __init__(self, guilds=()):
+        self.guilds = list(guilds)
+        self.user = FakeUser(name="bot")
+        self.partial_channels = {} # channel id -> FakeChannel handed out by id
+
+    def get_partial_messageable(self, id, *, guild_id=None, type=None):
+        channel = self.partial_channels.get(id)
+        if channel is None:
+            channel = self.partial_channels[id] = FakeChannel("partial", id=id)
+        return channel
+
+    async def change_presence(self, *, activity=None, status=None):
+        self.activity = activity
+
+def install_fake_secret():
+    """The bot imports secret.py for its token, stand in for it."""
+    sys.modules.setdefault("secret", SimpleNamespace(TOKEN="", invite_link=""))
+
+def make_bot(db_path, guilds=()):
+    """
+    Build a Bot on a fake client, rate limits and the send queue out of the way.
+
+    Example Usage:
+        bot = make_bot("/tmp/bench.db", [FakeGuild()])
+    """
+    install_fake_secret()
+
+    import config as cfg
+    cfg.db_path = db_path
+    cfg.db_reset_on_start = False
+    cfg.send_queue = False
+    cfg.user_rate_limit = cfg.guild_rate_limit = cfg.command_rate_limit = (1e9, 1e9)
+
+    from classes.Bot import Bot
+
+    client = FakeClient(guilds)
+    bot = Bot(cfg.name, client, cfg.prefix, cfg.dft_color, "")
+    bot.initialize_guilds(client)
+    bot.ready = True
+    return bot
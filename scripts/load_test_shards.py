@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import multiprocessing
+from types import SimpleNamespace
+
+# let the script import the bot's classes, json paths are relative to bot/
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot")
+sys.path.insert(0, BOT_DIR)
+os.chdir(BOT_DIR)
+
+COMMANDS = [".hello", ".help", ".course cs12", ".course mat1", ".nope"]
+
+def shard_for(guild_id, shard_count):
+    """Discord's shard formula."""
+    return (guild_id >> 22) % shard_count
+
+def worker(db_path, inbox, results):
+    """One shard process: its own Bot, registry and caches, the shared database."""
+
+    # no token needed, nothing connects to Discord
+    sys.modules["secret"] = SimpleNamespace(TOKEN="", invite_link="")
+
+    import config as cfg
+    cfg.db_path = db_path
+    cfg.db_reset_on_start = False
+    cfg.send_queue = False
+    cfg.user_rate_limit = cfg.guild_rate_limit = cfg.command_rate_limit = (1e9, 1e9)
+
+    from classes.Bot import Bot
+
+    bot = Bot(cfg.name, None, cfg.prefix, cfg.dft_color, "")
+    bot.ready = True
+
+    async def handle(batch):
+        for guild_id, author_id, content in batch:
+            guild = SimpleNamespace(id=guild_id, channels=[], roles=[])
+            msg = SimpleNamespace(content=content, guild=guild,
+                                  author=SimpleNamespace(id=author_id, mention=f"<@{author_id}>"))
+            if bot.allow_message(msg):
+                await bot.handle_command(msg)
+        return len(batch)
+
+    async def main():
+        handled = 0
+        results.put("ready")
+        while True:
+            batch = inbox.get()
+            if batch is None:
+                break
+            handled += await handle(batch)
+        results.put(handled)
+
+    asyncio.run(main())
+
+def make_traffic(messages, guilds):
+    """Synthetic gateway traffic: (guild id, author id, content)."""
+    guild_ids = [random.getrandbits(63) for _ in range(guilds)]
+    return [(random.choice(guild_ids), random.randrange(100_000), random.choice(COMMANDS))
+            for _ in range(messages)]
+
+def run(shards, traffic, db_path, batch_size=200):
+
+    inboxes = [multiprocessing.Queue() for _ in range(shards)]
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(db_path, inbox, results))
+                 for inbox in inboxes]
+
+    for process in processes:
+        process.start()
+    for _ in processes:
+        results.get()
+
+    # the fake gateway, route every message to its shard's process
+    start = time.perf_counter()
+    batches = [[] for _ in range(shards)]
+    for message in traffic:
+        batch = batches[shard_for(message[0], shards)]
+        batch.append(message)
+        if len(batch) >= batch_size:
+            inboxes[shard_for(message[0], shards)].put(batch[:])
+            batch.clear()
+
+    for inbox, batch in zip(inboxes, batches):
+        if batch:
+            inbox.put(batch)
+        inbox.put(None)
+
+    handled = sum(results.get() for _ in processes)
+    elapsed = time.perf_counter() - start
+
+    for process in processes:
+        process.join()
+
+    print(f"{shards:>2} shard process(es) | {handled} msgs | {handled / elapsed:9.0f} msgs/s")
+
+if __name__ == '__main__':
+
+    # usage: python scripts/load_test_shards.py [shard counts...]
+    counts = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4]
+
+    from classes.SQLHandler import SQLHandler, Course
+
+    with tempfile.TemporaryDirectory() as folder:
+
+        # one shared database with a catalog in it
+        db_path = os.path.join(folder, "shared.db")
+        handler = SQLHandler(db_path, dbg=True, profile={"pragmas": {"journal_mode": "WAL"}})
+        handler.sync(Course, ({"id": i, "name": f"{('CS', 'MAT')[i % 2]}{100 + i % 400}",
+                               "section": f"{i % 20:03d}"} for i in range(10_000)))
+        handler.engine.dispose()
+
+        traffic = make_traffic(40_000, guilds=2_000)
+        for count in counts:
+            run(count, traffic, db_path)
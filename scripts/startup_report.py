@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+# let the script import the bot's classes, json paths are relative to bot/
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.abspath(os.path.join(SCRIPTS_DIR, "..", "bot"))
+
+def import_times(fast_start):
+    """
+    Import bot.py, then the ORM the bot opens the database with, under -X importtime in a fresh interpreter.
+
+    Returns:
+        tuple: (bot.py's imports, the ORM's on top of them), each top level package ->
+        (self, total) microseconds, slowest first.
+    """
+    code = ("import sys; sys.path.insert(0, %r); "
+            "from fake_discord import install_fake_secret; install_fake_secret(); "
+            "import config; config.fast_start = %r; import bot; import classes.SQLHandler" % (SCRIPTS_DIR, fast_start))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=BOT_DIR, capture_output=True, text=True, check=True)
+
+    lines = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2 # top level imports are 0
+        lines.append((int(own), int(cumulative), name.strip(), depth))
+
+    # a module is listed after everything it imported, so bot's imports run from the top level
+    # import before it (site, config, the fake secret) up to its own line
+    tops = [i for i, (_, _, _, depth) in enumerate(lines) if depth == 0]
+    end = next(i for i in tops if lines[i][2] == "bot") + 1
+    start = max([i + 1 for i in tops if i < end - 1], default=0)
+    return by_package(lines[start:end]), by_package(lines[end:])
+
+def by_package(lines):
+    """Add up importtime lines per top level package, without counting a nested import twice."""
+    packages = {}
+    importers = [] # top level package of the module at each depth, walking the tree from the top
+
+    for own, cumulative, name, depth in reversed(lines):
+        top = name.split(".")[0]
+        del importers[depth:]
+        importers.append(top)
+
+        # the total is what the package's outermost imports took, whoever imported them
+        own_total, cumulative_total = packages.get(top, (0, 0))
+        outermost = depth == 0 or importers[depth - 1] != top
+        packages[top] = (own_total + own, cumulative_total + (cumulative if outermost else 0))
+
+    return dict(sorted(packages.items(), key=lambda item: -item[1][1]))
+
+def print_imports(title, packages, top):
+    print(f"{title:<20} {'self ms':>8} {'total ms':>9}")
+    for name, (own, cumulative) in list(packages.items())[:top]:
+        print(f"{name:<20} {own / 1000:>8.1f} {cumulative / 1000:>9.1f}")
+    print(f"{'all':<20} {sum(own for own, _ in packages.values()) / 1000:>8.1f}")
+
+def phase_times(fast_start, guilds):
+    """Time the startup phases in a fresh interpreter, everything but the gateway handshake."""
+    with tempfile.TemporaryDirectory() as folder:
+        result = subprocess.run([sys.executable, __file__, "--phases-only", str(int(fast_start)),
+                                 "--guilds", str(guilds), "--db", os.path.join(folder, "startup.db")],
+                                cwd=BOT_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+def run_phases(fast_start, guilds, db_path):
+    """Runs in the child: the same steps as run.py and on_ready, on a fake client."""
+    started = time.perf_counter()
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    sys.path.insert(0, BOT_DIR)
+    os.chdir(BOT_DIR)
+
+    from fake_discord import install_fake_secret, FakeClient, FakeGuild, FakeUser, FakeMessage
+    install_fake_secret()
+
+    import asyncio
+    import config as cfg
+    cfg.fast_start = fast_start
+    cfg.db_path = db_path
+    cfg.send_queue = False
+
+    import bot  # noqa: F401, what run.py imports
+    import discord
+    from classes.Bot import Bot
+    times = {"imports": time.perf_counter() - started}
+
+    client = FakeClient([FakeGuild(name=f"guild-{i}") for i in range(guilds)])
+    instance = Bot(cfg.name, client, cfg.prefix, cfg.dft_color, "")
+    times["bot"] = time.perf_counter() - started
+
+    async def on_ready():
+        # what bot.py's on_ready does before the bot says it's running, in the same order
+        await client.change_presence(activity=discord.Game(name=f"Hi, I'm {instance.name}! Try {instance.prefix}help"))
+        instance.initialize_guilds(client)
+        settings = instance.start_settings_load()
+        validation = instance.start_guild_validation(cfg.guild_validation_batch)
+        times["on_ready"] = time.perf_counter() - started
+
+        # and what it left running in the background
+        await settings
+        times["settings_loaded"] = time.perf_counter() - started
+        await validation
+        times["guilds_validated"] = time.perf_counter() - started
+
+    async def first_commands():
+        await on_ready()
+
+        message = FakeMessage(".hello", FakeUser(), client.guilds[0])
+        await instance.handle_command(message)
+        times["first_command"] = time.perf_counter() - started
+
+        # first database call, where a fast start pays for the ORM
+        await instance.summary()
+        times["first_query"] = time.perf_counter() - started
+
+    asyncio.run(first_commands())
+    instance.close()
+
+    print(json.dumps(times))
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Break down where startup time goes.")
+    parser.add_argument("--guilds", type=int, default=1_000, help="fake guilds on the client")
+    parser.add_argument("--top", type=int, default=10, help="packages listed per import breakdown")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="exit 1 if on_ready takes longer, in seconds (config.startup_budget by default)")
+    parser.add_argument("--phases-only", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--db", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phases_only is not None:
+        run_phases(bool(args.phases_only), args.guilds, args.db)
+        sys.exit(0)
+
+    sys.path.insert(0, BOT_DIR)
+    import config as cfg
+    budget = args.budget if args.budget is not None else cfg.startup_budget
+
+    over = False
+    for fast_start in (False, True):
+        print(f"== fast_start = {fast_start}")
+
+        packages, orm = import_times(fast_start)
+        print_imports("bot.py imports", packages, args.top)
+        print_imports("ORM, first db use" if fast_start else "ORM, in Bot()", orm, args.top)
+
+        phases = phase_times(fast_start, args.guilds)
+        print("phases (s since start): " + ", ".join(f"{phase} {seconds:.3f}" for phase, seconds in phases.items()))
+
+        if fast_start == cfg.fast_start and phases["on_ready"] > budget:
+            print(f"on_ready took {phases['on_ready']:.3f}s, over the {budget}s budget")
+            over = True
+        print()
+
+    sys.exit(1 if over else 0)